@@ -0,0 +1,137 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List
+
+from client_registry import ClientRegistry, registry as client_registry
+
+
+class AccountInfoCache:
+    """
+    Read-through cache of algod account information, keyed by address.
+
+    An entry is dropped when a transaction touching its address is submitted
+    (`invalidate`) and is treated as stale once a round newer than the one it was
+    read at has been observed (`observe_round`). At most `max_size` entries are
+    kept, evicting the least recently used.
+    """
+
+    def __init__(self, clients: ClientRegistry = None, max_size: int = None, prefetch_workers: int = 8):
+        self.clients = clients or client_registry
+        self.max_size = max_size or int(os.getenv("ACCOUNT_CACHE_SIZE", "4096"))
+        self.prefetch_workers = prefetch_workers
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self.latest_round = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _cached(self, address: str):
+        # Caller holds self._lock
+        info = self._entries.get(address)
+        if info is None:
+            return None
+        if info.get("round", 0) < self.latest_round:
+            del self._entries[address]
+            return None
+        self._entries.move_to_end(address)
+        return info
+
+    def _store(self, address: str, info: dict):
+        with self._lock:
+            self.latest_round = max(self.latest_round, info.get("round", 0))
+            self._entries[address] = info
+            self._entries.move_to_end(address)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get(self, address: str) -> dict:
+        """
+        Returns the account information of an address, reading it from algod on a miss.
+        The returned dict is shared with the cache and must not be modified.
+        """
+        with self._lock:
+            info = self._cached(address)
+            if info is not None:
+                self.hits += 1
+                return info
+            self.misses += 1
+
+        info = self.clients.algod().account_info(address)
+        self._store(address, info)
+        return info
+
+    def prefetch(self, addresses: Iterable[str]) -> Dict[str, dict]:
+        """
+        Returns the account information of many addresses (e.g. a cohort roster),
+        fetching all misses concurrently. Addresses that could not be read are left out.
+        """
+        result = {}
+        missing: List[str] = []
+        with self._lock:
+            for address in dict.fromkeys(addresses):
+                info = self._cached(address)
+                if info is not None:
+                    self.hits += 1
+                    result[address] = info
+                else:
+                    self.misses += 1
+                    missing.append(address)
+
+        def fetch(address):
+            try:
+                info = self.clients.algod().account_info(address)
+                self._store(address, info)
+                return address, info
+            except Exception as e:
+                logging.error(f"Error prefetching account info of {address}: {e}")
+                return address, None
+
+        if missing:
+            with ThreadPoolExecutor(max_workers=min(self.prefetch_workers, len(missing))) as executor:
+                for address, info in executor.map(fetch, missing):
+                    if info is not None:
+                        result[address] = info
+        return result
+
+    def invalidate(self, *addresses: str):
+        with self._lock:
+            for address in addresses:
+                self._entries.pop(address, None)
+
+    def observe_round(self, round_number: int):
+        """
+        Records a round seen on chain; entries read at an older round become stale.
+        """
+        with self._lock:
+            if round_number and round_number > self.latest_round:
+                self.latest_round = round_number
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "latest_round": self.latest_round,
+            }
+
+
+def touched_addresses(txn) -> List[str]:
+    """
+    Returns the addresses whose account information a transaction changes.
+    """
+    addresses = [txn.sender]
+    for field in ("receiver", "close_remainder_to", "revocation_target", "close_assets_to"):
+        address = getattr(txn, field, None)
+        if address:
+            addresses.append(address)
+    return addresses
+
+
+account_cache = AccountInfoCache()
@@ -1,38 +1,81 @@
+import json
 import logging
-from typing import Union
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List, Optional, Tuple, Union
 from algosdk import kmd, mnemonic
-from algosdk.wallet import Wallet
-from algosdk.v2client import algod  
-from algosdk import transaction
+from algosdk import constants, encoding, error, transaction
+from account_cache import AccountInfoCache, account_cache as shared_account_cache, touched_addresses
+from client_registry import ClientRegistry, registry as client_registry
+from faucet import Faucet, faucet as shared_faucet
+from params_cache import SuggestedParamsCache, params_cache as shared_params_cache
+from tx_tracker import ConfirmationTracker, tracker as shared_tracker
+from wallet_sessions import WalletSessionCache, wallet_sessions as shared_wallet_sessions
 
 
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 
 DEFAULT_KMD_WALLET_NAME = "unencrypted-default-wallet"
 DEFAULT_KMD_WALLET_PASSWORD = ""
+MAX_GROUP_SIZE = 16  # protocol limit on transactions per atomic group
+
+# algod's rejection of a transaction whose validity window no longer (or not yet)
+# covers the current round, e.g. "txn dead: round 1200 outside of 100--1100"
+_VALIDITY_WINDOW_ERROR = re.compile(r"txn dead|round \d+ outside of \d+--\d+")
+
+# Accounts checked (and funded if needed) by this process, see Algorand.provision_account
+_provisioning = {}
+_provisioning_lock = threading.Lock()
+_provisioning_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="provisioning")
 # default_wallet = kmd_algo.create_user_wallet(wallet_name=DEFAULT_KMD_WALLET_NAME, wallet_password=DEFAULT_KMD_WALLET_PASSWORD)
 
+class DeliveryRejected(Exception):
+    """
+    Raised when the node refuses a delivery group, most likely because it expired;
+    the trainee has to sign a new one.
+    """
+
+
+def _is_validity_window_error(e: error.AlgodHTTPError) -> bool:
+    """
+    Whether algod rejected a transaction for being outside its validity window,
+    the one rejection fresh suggested params can fix.
+    """
+    return bool(_VALIDITY_WINDOW_ERROR.search(str(e)))
+
+
 class Algorand:
     """
     Create wallets, list available wallets, fetch account in wallet and query account information
     Also, get passphrase(mnemonic) and public and private keys from mnemonic
     """
     
+    def __init__(self, clients: ClientRegistry = None, params: SuggestedParamsCache = None,
+                 tracker: ConfirmationTracker = None, wallets: WalletSessionCache = None,
+                 faucet: Faucet = None, accounts: AccountInfoCache = None):
+        # algod/KMD clients, suggested params, the confirmation tracker, wallet
+        # sessions, the faucet and account info are shared process-wide unless passed in
+        self.clients = clients or client_registry
+        self.params = params or shared_params_cache
+        self.tracker = tracker or shared_tracker
+        self.wallets = wallets or shared_wallet_sessions
+        self.faucet = faucet or shared_faucet
+        self.accounts = accounts or shared_account_cache
+
     def connect_kmd_client(self) -> Union[kmd.KMDClient, None]:
         """
         Connects to the Algorand Key Management Daemon (KMD) client.
 
+        The client comes from the shared registry, so its keep-alive connections
+        are reused across calls and worker threads.
+
         Returns:
             kmd.KMDClient: An instance of the KMDClient if the connection is successful.
             None: If there is an exception during the connection attempt.
         """
         try:
-            kmd_address = "http://localhost:4002"
-            kmd_token = "aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa"
-            kmd_client = kmd.KMDClient(kmd_token, kmd_address)
-
-            logging.info("Connected to KMD client successfully.")
-            return kmd_client
+            return self.clients.kmd()
         
         except Exception as e:
             logging.error(f"Connecting to KMD client failed: {e}")
@@ -41,12 +84,7 @@ class Algorand:
 
     def set_up_algod_client(self):
         try:
-            algod_address = "http://localhost:4001" 
-            algod_token = "aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa"  
-            algod_client = algod.AlgodClient(algod_token, algod_address)
-            
-            logging.info("Connected to algo client successfully.")
-            return algod_client
+            return self.clients.algod()
         
         except Exception as e:
             logging.error(f"Connecting to algod client failed: {e}")
@@ -61,10 +99,11 @@ class Algorand:
         With the Algorand Wallet, users can hold, transact, and request Algos or other assets built on the Algorand blockchain.
         Wallets are collections of addresses and their corresponding keys. 
         Every node can have one or more wallet(s), but only one default wallet.
+
+        Wallet handles are cached per wallet name, so repeated calls reuse the open handle.
         """
-        client = self.connect_kmd_client()
         try:
-            wallet = Wallet(wallet_name, wallet_password, client)
+            wallet = self.wallets.get_wallet(wallet_name, wallet_password)
             logging.info("Created wallet successfully")
             return wallet
         except Exception as e:
@@ -106,41 +145,120 @@ class Algorand:
         
         Parameter: Account address 
         Returns: account information such as address,amount, assets, created-apps, created-assets
+        (served from the account info cache when it is still current)
         """
         try:
-            algod_client = self.set_up_algod_client()
-            account_info = algod_client.account_info(account_address) 
+            account_info = self.accounts.get(account_address)
             logging.info("get account info successfully")
             return account_info
         except Exception as e:
             logging.error(f"Error getting account info: {e}")
             return None
 
+    def get_account_balances(self, account_addresses):
+        """
+        Parameter: list of account addresses, e.g. a cohort roster
+        Returns: dict of address -> balance, reading all uncached accounts concurrently
+        """
+        account_infos = self.accounts.prefetch(account_addresses)
+        return {address: info["amount"] for address, info in account_infos.items()}
+
+    def send_signed_transaction(self, algod_client, build_txn, sender_private_key, on_signed=None):
+        """
+        Builds a transaction from the cached suggested params, signs it and sends it.
+
+        build_txn takes a SuggestedParams and returns the unsigned transaction.
+        on_signed, if given, is called with every signed transaction right before
+        it is sent, e.g. to record its txid.
+        If the node rejects the transaction because its validity window has passed,
+        the params cache is refreshed and the transaction is rebuilt and sent once
+        more; any other rejection is raised as is.
+
+        Returns: transaction id
+        """
+        def sign_and_send(sp):
+            txn = build_txn(sp)
+            self.accounts.invalidate(*touched_addresses(txn))
+            signed_txn = txn.sign(sender_private_key)
+            if on_signed is not None:
+                on_signed(signed_txn)
+            return algod_client.send_transaction(signed_txn)
+
+        try:
+            return sign_and_send(self.params.get(algod_client))
+        except error.AlgodHTTPError as e:
+            if not _is_validity_window_error(e):
+                raise
+            logging.warning(f"Transaction expired, retrying with fresh params: {e}")
+            self.params.invalidate()
+            return sign_and_send(self.params.get(algod_client))
+
+    def send_signed_group(self, algod_client, build_txns, private_keys):
+        """
+        Builds an atomic group from the cached suggested params, signs and sends it.
+
+        build_txns takes a SuggestedParams and returns the unsigned transactions.
+        private_keys is either one key signing every transaction or a list with one
+        key per transaction. As with send_signed_transaction, a group rejected for
+        an expired validity window is rebuilt once with fresh params.
+
+        Returns: list of transaction ids in group order
+        """
+        def sign_and_send(sp):
+            txns = transaction.assign_group_id(build_txns(sp))
+            for txn in txns:
+                self.accounts.invalidate(*touched_addresses(txn))
+            keys = private_keys if isinstance(private_keys, list) else [private_keys] * len(txns)
+            signed_txns = [txn.sign(key) for txn, key in zip(txns, keys)]
+            algod_client.send_transactions(signed_txns)
+            return [signed_txn.get_txid() for signed_txn in signed_txns]
+
+        try:
+            return sign_and_send(self.params.get(algod_client))
+        except error.AlgodHTTPError as e:
+            if not _is_validity_window_error(e):
+                raise
+            logging.warning(f"Transaction group expired, retrying with fresh params: {e}")
+            self.params.invalidate()
+            return sign_and_send(self.params.get(algod_client))
+
+    def confirm_transaction(self, algod_client, txid, wait=True, on_confirmed=None, on_failed=None, last_valid=None):
+        """
+        Waits up to 4 rounds for a transaction to be confirmed, or, when wait is False,
+        hands it to the background confirmation tracker and returns immediately.
+        last_valid, the transaction's last valid round, tells the tracker when it
+        can give up on it.
+
+        Returns: pending transaction info when waiting, otherwise None
+        """
+        if not wait:
+            self.tracker.track(txid, on_confirmed=on_confirmed, on_failed=on_failed, last_valid=last_valid)
+            return None
+
+        results = transaction.wait_for_confirmation(algod_client, txid, 4)
+        logging.info(f"Result confirmed in round: {results['confirmed-round']}")
+        self.accounts.observe_round(results['confirmed-round'])
+        return results
+
     def send_alogs_transaction(self, receiver_address, sender_address=None, sender_private_key=None, amount=1000000):
         try:
             algod_client = self.set_up_algod_client()
         
             if sender_address == None:
-                default_wallet = self.create_user_wallet(wallet_name=DEFAULT_KMD_WALLET_NAME, wallet_password=DEFAULT_KMD_WALLET_PASSWORD)
-                sender_address = default_wallet.list_keys()[0]
-                sender_private_key = default_wallet.export_key(sender_address)
+                sender_address, sender_private_key = self.faucet.dispenser()
 
             
-            # Construct the transaction
-            params = algod_client.suggested_params()
-
-            txn = transaction.PaymentTxn(
-                sender=sender_address,
-                receiver=receiver_address,
-                amt=amount,
-                sp=params
+            # Construct, sign and send the transaction
+            tx_id = self.send_signed_transaction(
+                algod_client,
+                lambda sp: transaction.PaymentTxn(
+                    sender=sender_address,
+                    receiver=receiver_address,
+                    amt=amount,
+                    sp=sp
+                ),
+                sender_private_key
             )
-
-            # Sign the transaction with the sender's private key
-            signed_txn = txn.sign(sender_private_key)
-
-            # Send the transaction to the Algorand network
-            tx_id = algod_client.send_transaction(signed_txn)
             logging.info(f"Transaction completed successfully, transaction id: {tx_id}")
             return tx_id
         
@@ -165,8 +283,8 @@ class Algorand:
             account_address = wallet.list_keys()[0]
 
             if self.get_account_balance(account_address) == 0:
-                tx_id = self.send_alogs_transaction(account_address)
-                if tx_id == None: raise Exception("Error while transfering algos")
+                # Paid out with the next faucet group instead of inline
+                self.faucet.request_funding(account_address)
             
             logging.info(f"User created successfully")
             return account_address
@@ -175,34 +293,6 @@ class Algorand:
             logging.error(f"Error creating user: {e}")
             return None
 
-    def login_user(self, username, password):
-        """
-        """
-
-        try:
-            wallet = self.create_user_wallet(username, password)
-            if wallet == None: raise Exception("Error while creating walllet")
-
-            account_address = None
-
-            if len(wallet.list_keys()) == 0:
-                account_address = self.create_account_address(wallet)
-                if account_address == None: raise Exception("Error while creating account address")
-
-            account_address = wallet.list_keys()[0]
-
-            if self.get_account_balance(account_address) == 0:
-                tx_id = self.send_alogs_transaction(account_address)
-                if tx_id == None: raise Exception("Error while transfering algos")
-            
-            logging.info(f"User login successfully")
-            return wallet
-        
-        except Exception as e:
-            logging.error(f"Error login user: {e}")
-            return None
-        
-
     def list_wallets(self):
         """    
         Returns: list of wallet objects
@@ -257,106 +347,286 @@ class Algorand:
   
 
     
-    def create_asset(self, sender_address, sender_private_key, asset_url, asset_name):
+    def build_asset_txn(self, sender_address, sp, asset_url, asset_name):
+        return transaction.AssetConfigTxn(
+            sender=sender_address,
+            sp=sp,
+            default_frozen=False,
+            unit_name="rug",
+            asset_name=asset_name,
+            manager=sender_address,
+            reserve=sender_address,
+            freeze=sender_address,
+            clawback=sender_address,
+            url=asset_url,
+            total=1000,
+            decimals=0,
+        )
+
+    def provision_account(self, username, password, account) -> Future:
+        """
+        Makes sure an account can transact, funding it from the default wallet when
+        its balance is 0.
+
+        Provisioning runs in the background, at most once per account and process;
+        concurrent callers share the same future. A failed provisioning is retried
+        by the next caller.
+
+        Returns: a future resolving to True once the account is ready
+        """
+        with _provisioning_lock:
+            future = _provisioning.get(account)
+            if future is None or (future.done() and not future.result()):
+                future = _provisioning_executor.submit(self._provision, username, password, account)
+                _provisioning[account] = future
+        return future
+
+    def _provision(self, username, password, account):
+        try:
+            if self.get_account_balance(account) == 0:
+                tx_id = self.faucet.request_funding(account).result()
+                # The account's own transactions would be rejected until the funding lands
+                self.confirm_transaction(self.set_up_algod_client(), tx_id)
+
+            logging.info(f"Account of {username} provisioned successfully")
+            return True
+        except Exception as e:
+            logging.error(f"Error provisioning account of {username}: {e}")
+            return False
+
+    def get_cached_private_key(self, username, password, account):
+        """
+        Returns the signing key of an account from the wallet session cache, so
+        repeated chain operations of a user skip the KMD handle and export round trips.
+        The account is provisioned on first use.
+        """
+        try:
+            provisioning = self.provision_account(username, password, account)
+            private_key = self.wallets.export_key(username, password, account)
+            if not provisioning.result(): raise Exception("Account is not provisioned")
+            return private_key
+        except Exception as e:
+            logging.error(f"Error getting private key: {e}")
+            return None
+
+    def create_asset(self, sender_address, sender_private_key, asset_url, asset_name, wait=True, on_confirmed=None, on_failed=None, on_signed=None):
+        """
+        Mints the certificate NFT.
+
+        on_signed is called with the signed transaction before it is sent, see
+        send_signed_transaction.
+
+        Returns: the created asset index, or the txid when wait is False
+        (on_confirmed then receives the pending transaction info, including "asset-index")
+        """
         try:
             algod_client = self.set_up_algod_client()
-            sp = algod_client.suggested_params()
 
-            txn = transaction.AssetConfigTxn(
-                sender=sender_address,
-                sp=sp,
-                default_frozen=False,
-                unit_name="rug",
-                asset_name=asset_name,
-                manager=sender_address,
-                reserve=sender_address,
-                freeze=sender_address,
-                clawback=sender_address,
-                url=asset_url,
-                total=1000,
-                decimals=0,
-            )
+            build_txn = lambda sp: self.build_asset_txn(sender_address, sp, asset_url, asset_name)
+            signed_txns = []
+
+            def record_signed(signed_txn):
+                signed_txns.append(signed_txn)
+                if on_signed is not None:
+                    on_signed(signed_txn)
 
             # Sign with secret key of creator
-            stxn = txn.sign(sender_private_key)
-            txid = algod_client.send_transaction(stxn)
+            txid = self.send_signed_transaction(algod_client, build_txn, sender_private_key, record_signed)
             
             # Wait for the transaction to be confirmed
-            results = transaction.wait_for_confirmation(algod_client, txid, 4)
-            logging.info(f"Result confirmed in round: {results['confirmed-round']}")
-            return results["asset-index"]
+            results = self.confirm_transaction(algod_client, txid, wait, on_confirmed, on_failed,
+                                               last_valid=signed_txns[-1].transaction.last_valid_round)
+            return results["asset-index"] if wait else txid
         except Exception as e:
             logging.error(f"Error login user: {e}")
             return None
 
-    def opt_in_asset(self, nft_id, sender_address, username, password):
+    def create_assets_batch(self, sender_address, sender_private_key, assets: List[Tuple[str, str]], max_workers=4) -> List[Optional[int]]:
+        """
+        Mints many certificate NFTs as atomic groups of up to 16 asset creations.
+
+        Every group is signed with the same exported key and the groups are submitted
+        and confirmed concurrently.
+
+        Parameters: assets, a list of (asset_url, asset_name) pairs
+        Returns: the created asset index for each input, in input order
+                 (None for inputs whose group failed)
+        """
+        chunks = [assets[i:i + MAX_GROUP_SIZE] for i in range(0, len(assets), MAX_GROUP_SIZE)]
+
+        def mint_group(chunk):
+            try:
+                algod_client = self.set_up_algod_client()
+                txids = self.send_signed_group(
+                    algod_client,
+                    lambda sp: [self.build_asset_txn(sender_address, sp, url, name) for url, name in chunk],
+                    sender_private_key
+                )
+                logging.info(f"Sent asset group of {len(txids)} transactions, first txid: {txids[0]}")
+
+                # All transactions of a group are confirmed in the same round
+                results = self.confirm_transaction(algod_client, txids[0])
+                asset_indexes = [results["asset-index"]]
+                for txid in txids[1:]:
+                    asset_indexes.append(algod_client.pending_transaction_info(txid)["asset-index"])
+                return asset_indexes
+            except Exception as e:
+                logging.error(f"Error minting asset group: {e}")
+                return [None] * len(chunk)
+
+        if not chunks:
+            return []
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as executor:
+            results = executor.map(mint_group, chunks)
+
+        return [asset_index for group in results for asset_index in group]
+
+    def opt_in_asset(self, nft_id, sender_address, username, password, wait=True, on_confirmed=None, on_failed=None):
         try:
             algod_client = self.set_up_algod_client()
-            sp = algod_client.suggested_params()
-            wallet = self.login_user(username, password)
-            sender_private_key = self.get_private_key(wallet, sender_address)
+            sender_private_key = self.get_cached_private_key(username, password, sender_address)
             # Create opt-in transaction
             # asset transfer from me to me for asset id we want to opt-in to with amt==0
-            optin_txn = transaction.AssetOptInTxn(
-                sender=sender_address, sp=sp, index=nft_id
+            txid = self.send_signed_transaction(
+                algod_client,
+                lambda sp: transaction.AssetOptInTxn(
+                    sender=sender_address, sp=sp, index=nft_id
+                ),
+                sender_private_key
             )
-            signed_optin_txn = optin_txn.sign(sender_private_key)
-            txid = algod_client.send_transaction(signed_optin_txn)
             logging.info(f"Sent opt in transaction with txid: {txid}")
 
             # Wait for the transaction to be confirmed
-            results = transaction.wait_for_confirmation(algod_client, txid, 4)
-            logging.info(f"Result confirmed in round: {results['confirmed-round']}")
-            return results
+            results = self.confirm_transaction(algod_client, txid, wait, on_confirmed, on_failed)
+            return results if wait else txid
         except Exception as e:
             logging.error(f"Error optin asset: {e}")
             return None
 
-    def transfer_asset(self, sender_address, username, password, receiver_address, nft_id):
+    def transfer_asset(self, sender_address, username, password, receiver_address, nft_id, wait=True, on_confirmed=None, on_failed=None):
       try:
         algod_client = self.set_up_algod_client()
-        sp = algod_client.suggested_params()
         # Create transfer transaction
-        wallet = self.login_user(username, password)
-        sender_private_key = self.get_private_key(wallet, sender_address)
+        sender_private_key = self.get_cached_private_key(username, password, sender_address)
         
-        xfer_txn = transaction.AssetTransferTxn(
-            sender=sender_address,
-            sp=sp,
-            receiver=receiver_address,
-            amt=1,
-            index=nft_id,
+        txid = self.send_signed_transaction(
+            algod_client,
+            lambda sp: transaction.AssetTransferTxn(
+                sender=sender_address,
+                sp=sp,
+                receiver=receiver_address,
+                amt=1,
+                index=nft_id,
+            ),
+            sender_private_key
         )
-        signed_xfer_txn = xfer_txn.sign(sender_private_key)
-        txid = algod_client.send_transaction(signed_xfer_txn)
         logging.info(f"Sent transfer transaction with txid: {txid}")
 
-        results = transaction.wait_for_confirmation(algod_client, txid, 4)
-        logging.info(f"Result confirmed in round: {results['confirmed-round']}")
-        return results
+        results = self.confirm_transaction(algod_client, txid, wait, on_confirmed, on_failed)
+        return results if wait else txid
       except Exception as e:
             logging.error(f"Error transfering asset: {e}")
             return None
         
-    def revoke_asset(self, sender_address, sender_private_key, nft_id, receiver_address):
+    def prepare_delivery(self, nft_id, issuer_address, receiver_address, receiver_username, receiver_password):
+        """
+        First half of a single-round delivery: builds the trainee's opt-in and the
+        issuer's transfer as one atomic group and signs the opt-in with the trainee's key.
+
+        The issuer pays both fees through fee pooling, so the opt-in carries no fee.
+        The group stays valid until the last-valid round of the params it was built with.
+
+        Returns: the partially signed group, encoded as a string (None on failure)
+        """
+        try:
+            algod_client = self.set_up_algod_client()
+            receiver_private_key = self.get_cached_private_key(receiver_username, receiver_password, receiver_address)
+
+            sp = self.params.get(algod_client)
+            min_fee = sp.min_fee or constants.MIN_TXN_FEE
+            optin_sp = transaction.SuggestedParams(0, sp.first, sp.last, sp.gh, sp.gen, flat_fee=True)
+            xfer_sp = transaction.SuggestedParams(2 * min_fee, sp.first, sp.last, sp.gh, sp.gen, flat_fee=True)
+
+            optin_txn, xfer_txn = transaction.assign_group_id([
+                transaction.AssetOptInTxn(sender=receiver_address, sp=optin_sp, index=nft_id),
+                transaction.AssetTransferTxn(
+                    sender=issuer_address,
+                    sp=xfer_sp,
+                    receiver=receiver_address,
+                    amt=1,
+                    index=nft_id,
+                ),
+            ])
+
+            logging.info(f"Prepared delivery group for asset {nft_id}, valid until round {sp.last}")
+            return json.dumps([
+                encoding.msgpack_encode(optin_txn.sign(receiver_private_key)),
+                encoding.msgpack_encode(xfer_txn),
+            ])
+        except Exception as e:
+            logging.error(f"Error preparing delivery: {e}")
+            return None
+
+    def complete_delivery(self, delivery_group, issuer_address, username, password, wait=True, on_confirmed=None, on_failed=None):
+        """
+        Second half of a single-round delivery: signs the issuer's transfer of a group
+        built by prepare_delivery and submits opt-in and transfer together.
+
+        Returns: pending transaction info of the transfer, or its txid when wait is False,
+        None on key or KMD errors, which leave the group usable
+        Raises: DeliveryRejected when the node refuses the group
+        """
+        try:
+            algod_client = self.set_up_algod_client()
+            sender_private_key = self.get_cached_private_key(username, password, issuer_address)
+            if sender_private_key is None: raise Exception("Error getting issuer key")
+
+            encoded_optin, encoded_xfer = json.loads(delivery_group)
+            signed_optin_txn = encoding.msgpack_decode(encoded_optin)
+            xfer_txn = encoding.msgpack_decode(encoded_xfer)
+            if xfer_txn.sender != issuer_address:
+                raise Exception("Delivery group was prepared for another issuer")
+
+            signed_xfer_txn = xfer_txn.sign(sender_private_key)
+            for txn in (signed_optin_txn.transaction, xfer_txn):
+                self.accounts.invalidate(*touched_addresses(txn))
+            try:
+                algod_client.send_transactions([signed_optin_txn, signed_xfer_txn])
+            except error.AlgodHTTPError as e:
+                raise DeliveryRejected(str(e)) from e
+            txid = signed_xfer_txn.get_txid()
+            logging.info(f"Sent delivery group with transfer txid: {txid}")
+
+            results = self.confirm_transaction(algod_client, txid, wait, on_confirmed, on_failed)
+            return results if wait else txid
+        except DeliveryRejected as e:
+            logging.error(f"Delivery group rejected: {e}")
+            raise
+        except Exception as e:
+            logging.error(f"Error completing delivery: {e}")
+            return None
+
+    def revoke_asset(self, sender_address, sender_private_key, nft_id, receiver_address, wait=True, on_confirmed=None, on_failed=None):
         try:
             algod_client = self.set_up_algod_client()
-            sp = algod_client.suggested_params()
             # Create clawback transaction to freeze the asset in acct2 balance
-            clawback_txn = transaction.AssetTransferTxn(
-                sender=sender_address,
-                sp=sp,
-                receiver=sender_address,
-                amt=1,
-                index=nft_id,
-                revocation_target=receiver_address,
+            txid = self.send_signed_transaction(
+                algod_client,
+                lambda sp: transaction.AssetTransferTxn(
+                    sender=sender_address,
+                    sp=sp,
+                    receiver=sender_address,
+                    amt=1,
+                    index=nft_id,
+                    revocation_target=receiver_address,
+                ),
+                sender_private_key
             )
-            signed_clawback_txn = clawback_txn.sign(sender_private_key)
-            txid = algod_client.send_transaction(signed_clawback_txn)
             print(f"Sent clawback transaction with txid: {txid}")
 
-            results = transaction.wait_for_confirmation(algod_client, txid, 4)
-            print(f"Result confirmed in round: {results['confirmed-round']}")
+            results = self.confirm_transaction(algod_client, txid, wait, on_confirmed, on_failed)
+            return results if wait else txid
 
         except Exception as e:
             logging.error(f"Error transfering asset: {e}")
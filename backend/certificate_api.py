@@ -1,14 +1,20 @@
 from datetime import datetime
-from flask import jsonify, request, session
+from flask import current_app, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import Certificate, ApprovalStatus, UserRole
+from sqlalchemy.orm import load_only
+from models import Certificate, ApprovalStatus, UserRole, IssuanceJob
 from flask import Blueprint
 from models import db
 from models import User, Challenge
-from certificate_utils import customize_certificate
-from algorand_utils import Algorand
+from certificate_utils import render_certificate, submit_certificate
+from cohort_renderer import cohort_renderer
+from algorand_utils import Algorand, DeliveryRejected
+from issuance import issuance_pipeline
+from session_store import wallet_session_store
+from password_hasher import HasherBusy, password_hasher
+from pagination import QueryParameterError, paginate, parse_datetime, parse_fields, parse_int, project
 import json
-import pickle
+import logging
 
 algorand = Algorand()
 
@@ -22,6 +28,114 @@ def generate_response(is_success, value=None, error=None):
     }
     return jsonify(response)
 
+def wait_requested():
+    """
+    Chain writes wait for confirmation unless the client passes ?wait=false,
+    in which case the txid is returned and the confirmation tracker updates
+    the certificate later.
+    """
+    return request.args.get('wait', 'true').lower() != 'false'
+
+def atomic_delivery_requested():
+    """
+    With ?delivery=atomic the trainee's opt-in is not sent on its own: it is signed
+    into a group with the issuer's transfer, which the issuer submits on approval.
+    """
+    return request.args.get('delivery') == 'atomic'
+
+def certificate_updater(certificate_id, apply):
+    """
+    Builds a confirmation callback that applies a change to a certificate row
+    from the tracker thread.
+    """
+    app = current_app._get_current_object()
+
+    def callback(info):
+        with app.app_context():
+            certificate = Certificate.query.get(certificate_id)
+            if certificate:
+                apply(certificate, info)
+                db.session.commit()
+
+    return callback
+
+def set_minted_nft(certificate, info):
+    certificate.nft_id = info["asset-index"]
+
+def delete_unminted_certificate(certificate, info):
+    db.session.delete(certificate)
+
+def mint_recorder(certificate):
+    """
+    Builds an on_signed callback storing the txid and last valid round of the
+    certificate's asset creation before it is sent, so settle_unminted_certificates
+    can finish the certificate if its confirmation is never recorded.
+    """
+    def on_signed(signed_txn):
+        certificate.mint_txid = signed_txn.get_txid()
+        certificate.mint_last_valid = signed_txn.transaction.last_valid_round
+        db.session.commit()
+
+    return on_signed
+
+def settle_unminted_certificates():
+    """
+    Settles the certificates whose asset creation was submitted without waiting
+    and whose confirmation was never recorded, e.g. because the server stopped.
+    A certificate whose asset exists gets its asset id; one whose asset creation
+    can no longer confirm is deleted; one still inside its validity window is
+    left for a later run.
+
+    Returns: the number of certificates minted and deleted
+    """
+    algod_client = algorand.set_up_algod_client()
+    current_round = algod_client.status()["last-round"]
+    created_assets = {}
+    taken = {nft_id for nft_id, in db.session.query(Certificate.nft_id).filter(Certificate.nft_id.isnot(None))}
+    minted = deleted = 0
+
+    for certificate in Certificate.query.filter(Certificate.nft_id.is_(None)).all():
+        info = {}
+        if certificate.mint_txid:
+            try:
+                info = algod_client.pending_transaction_info(certificate.mint_txid)
+            except Exception as e:
+                # Dropped from the pool, or confirmed too long ago to be remembered
+                logging.debug(f"Pending info for {certificate.mint_txid} not available: {e}")
+
+        nft_id = info.get("asset-index") if info.get("confirmed-round", 0) > 0 else None
+        if nft_id is None and not info.get("pool-error") and certificate.mint_last_valid is not None \
+                and current_round <= certificate.mint_last_valid:
+            continue
+
+        if nft_id is None:
+            if certificate.staff_id not in created_assets:
+                issuer = User.query.get(certificate.staff_id)
+                account_info = algod_client.account_info(issuer.account_address) if issuer and issuer.account_address else {}
+                created_assets[certificate.staff_id] = account_info.get("created-assets", [])
+            nft_id = next((asset["index"] for asset in created_assets[certificate.staff_id]
+                           if asset["params"].get("url") == certificate.ipfs_hash and asset["index"] not in taken), None)
+
+        if nft_id is None:
+            db.session.delete(certificate)
+            deleted += 1
+        else:
+            certificate.nft_id = nft_id
+            taken.add(nft_id)
+            minted += 1
+        db.session.commit()
+
+    return minted, deleted
+
+def set_delivered(certificate, info):
+    certificate.delivery_group = None
+    certificate.is_approved = ApprovalStatus.APPROVED
+
+def set_status(status):
+    def apply(certificate, info):
+        certificate.is_approved = status
+    return apply
+
 @certificate_bp.route('/certificates', methods=['POST'])
 @jwt_required()
 def create_certificate():
@@ -38,6 +152,8 @@ def create_certificate():
         sender_user = User.query.filter_by(id=current_user_id).first()
         if not sender_user:
             return generate_response(False, None, "Sender User does not exist"), 400
+        if not sender_user.account_address:
+            return generate_response(False, None, "Sender wallet is not provisioned yet"), 409
         
         receiving_user = User.query.filter_by(id=user_id).first()
         if not receiving_user:
@@ -47,39 +163,67 @@ def create_certificate():
         if not challenge:
             return generate_response(False, None, "Challenge does not exist"), 400
         
-        ipfs_hash = customize_certificate(
+        certificate_bytes = render_certificate(
             username=receiving_user.username,
             title=title,
-            issued_date=datetime.utcnow().strftime("%B %d, %Y"),
-            week_number=challenge.week_number
+            issued_date=datetime.utcnow().strftime("%B %d, %Y")
         )
-        
-        stored_wallet_str = session.get('wallet', None)
 
-        if stored_wallet_str:
-            wallet = pickle.loads(stored_wallet_str)
-        else:
+        # The CID is known before pinning finishes, so minting does not wait for the upload
+        ipfs_hash, upload = submit_certificate(receiving_user.username, challenge.week_number, certificate_bytes)
+        
+        wallet = wallet_session_store.current()
+        if wallet is None:
             return generate_response(False, None, "Wallet information not found in the session.")
         
-        nft_id = algorand.create_asset(
-            sender_address=sender_user.account_address,
-            sender_private_key=algorand.get_private_key(wallet, sender_user.account_address),
-            asset_url=ipfs_hash,
-            asset_name=title
-        )
-
         new_certificate = Certificate(
             title=title,
             score=score,
             staff_id=current_user_id,
             user_id=user_id,
             challenge_id=challenge_id,
-            ipfs_hash=ipfs_hash,
-            nft_id=nft_id
+            ipfs_hash=ipfs_hash
         )
 
-        db.session.add(new_certificate)
-        db.session.commit()
+        txid = None
+        if wait_requested():
+            new_certificate.nft_id = algorand.create_asset(
+                sender_address=sender_user.account_address,
+                sender_private_key=algorand.get_cached_private_key(wallet.name, wallet.pswd, sender_user.account_address),
+                asset_url=ipfs_hash,
+                asset_name=title
+            )
+            if new_certificate.nft_id is None:
+                return generate_response(False, None, "Error creating certificate asset"), 500
+            if upload.result() is None:
+                logging.error(f"Certificate asset {new_certificate.nft_id} points at unpinned content {ipfs_hash}")
+                return generate_response(False, None, "Error uploading certificate"), 500
+            db.session.add(new_certificate)
+            db.session.commit()
+        else:
+            # Persist first so the tracker can attach the asset id once minted
+            db.session.add(new_certificate)
+            db.session.commit()
+
+            txid = algorand.create_asset(
+                sender_address=sender_user.account_address,
+                sender_private_key=algorand.get_cached_private_key(wallet.name, wallet.pswd, sender_user.account_address),
+                asset_url=ipfs_hash,
+                asset_name=title,
+                wait=False,
+                on_confirmed=certificate_updater(new_certificate.id, set_minted_nft),
+                on_failed=certificate_updater(new_certificate.id, delete_unminted_certificate),
+                on_signed=mint_recorder(new_certificate)
+            )
+            if txid is None:
+                db.session.delete(new_certificate)
+                db.session.commit()
+                return generate_response(False, None, "Error creating certificate asset"), 500
+            if upload.result() is None:
+                logging.error(f"Certificate asset of transaction {txid} points at unpinned content {ipfs_hash}")
+                db.session.delete(new_certificate)
+                db.session.commit()
+                return generate_response(False, None, "Error uploading certificate"), 500
 
         certificate_info = {
             'id': new_certificate.id,
@@ -94,11 +238,213 @@ def create_certificate():
             'ipfs_hash': new_certificate.ipfs_hash
         }
 
+        if txid:
+            certificate_info['txid'] = txid
+            return generate_response(True, certificate_info, "Certificate submitted for minting"), 202
+
         return generate_response(True, certificate_info, "Certificate created successfully"), 201
 
     except Exception as e:
         return generate_response(False, None, f"Error creating certificate: {e}"), 500
 
+@certificate_bp.route('/certificates/batch', methods=['POST'])
+@jwt_required()
+def create_certificates_batch():
+    try:
+        current_user_id = get_jwt_identity()
+        challenge_id = request.json.get('challenge_id')
+        items = request.json.get('certificates')
+
+        if challenge_id is None or not isinstance(items, list) or not items:
+            return generate_response(False, None, "Missing required fields"), 400
+        if not all(isinstance(item, dict) for item in items):
+            return generate_response(False, None, "Certificates must be objects"), 400
+
+        sender_user = User.query.filter_by(id=current_user_id).first()
+        if not sender_user:
+            return generate_response(False, None, "Sender User does not exist"), 400
+        if not sender_user.account_address:
+            return generate_response(False, None, "Sender wallet is not provisioned yet"), 409
+
+        challenge = Challenge.query.filter_by(id=challenge_id).first()
+        if not challenge:
+            return generate_response(False, None, "Challenge does not exist"), 400
+
+        wallet = wallet_session_store.current()
+        if wallet is None:
+            return generate_response(False, None, "Wallet information not found in the session.")
+
+        user_ids = {item.get('user_id') for item in items}
+        users = {user.id: user for user in User.query.filter(User.id.in_(user_ids)).all()}
+        issued_date = datetime.utcnow().strftime("%B %d, %Y")
+
+        results = [None] * len(items)
+        to_render = []
+        for index, item in enumerate(items):
+            title = item.get('title')
+            receiving_user = users.get(item.get('user_id'))
+
+            if not title or item.get('score') is None or not receiving_user:
+                results[index] = {'isSuccess': False, 'value': None, 'error': "Missing required fields or receiving user does not exist"}
+                continue
+
+            to_render.append((index, (receiving_user.username, title, issued_date, challenge.week_number)))
+
+        # Render the whole batch across the process pool, pinning certificates as they come out.
+        # Their CIDs are computed locally, so minting runs while the uploads are in flight.
+        rendered = cohort_renderer.iter_render(record for _, record in to_render)
+        to_mint = [
+            (index, *submit_certificate(username, week_number, certificate_bytes))
+            for (index, (username, _, _, week_number)), certificate_bytes in zip(to_render, rendered)
+        ]
+
+        nft_ids = algorand.create_assets_batch(
+            sender_address=sender_user.account_address,
+            sender_private_key=algorand.get_cached_private_key(wallet.name, wallet.pswd, sender_user.account_address),
+            assets=[(ipfs_hash, items[index].get('title')) for index, ipfs_hash, _ in to_mint]
+        )
+
+        new_certificates = []
+        for (index, ipfs_hash, upload), nft_id in zip(to_mint, nft_ids):
+            if nft_id is None:
+                results[index] = {'isSuccess': False, 'value': None, 'error': "Error creating certificate asset"}
+                continue
+            if upload.result() is None:
+                logging.error(f"Certificate asset {nft_id} points at unpinned content {ipfs_hash}")
+                results[index] = {'isSuccess': False, 'value': None, 'error': "Error uploading certificate"}
+                continue
+
+            item = items[index]
+            new_certificate = Certificate(
+                title=item.get('title'),
+                score=item.get('score'),
+                staff_id=current_user_id,
+                user_id=item.get('user_id'),
+                challenge_id=challenge_id,
+                ipfs_hash=ipfs_hash,
+                nft_id=nft_id
+            )
+            db.session.add(new_certificate)
+            new_certificates.append((index, new_certificate))
+
+        db.session.commit()
+
+        for index, new_certificate in new_certificates:
+            certificate_info = {
+                'id': new_certificate.id,
+                'title': new_certificate.title,
+                'score': new_certificate.score,
+                'issued_date': new_certificate.issued_date,
+                'staff_id': new_certificate.staff_id,
+                'user_id': new_certificate.user_id,
+                'nft_id': new_certificate.nft_id,
+                'challenge_id': new_certificate.challenge_id,
+                'is_approved': new_certificate.is_approved.value,
+                'ipfs_hash': new_certificate.ipfs_hash
+            }
+            results[index] = {'isSuccess': True, 'value': certificate_info, 'error': None}
+
+        if not new_certificates:
+            return generate_response(False, results, "No certificate was created"), 500
+
+        return generate_response(True, results, f"Created {len(new_certificates)} of {len(items)} certificates"), 201
+
+    except Exception as e:
+        return generate_response(False, None, f"Error creating certificates: {e}"), 500
+
+@certificate_bp.route('/certificates/jobs', methods=['POST'])
+@jwt_required()
+def create_issuance_job():
+    try:
+        current_user_id = get_jwt_identity()
+        title = request.json.get('title')
+        score = request.json.get('score')
+        challenge_id = request.json.get('challenge_id')
+        user_id = request.json.get('user_id')
+
+        if not title or score is None or challenge_id is None or not user_id:
+            return generate_response(False, None, "Missing required fields"), 400
+
+        sender_user = User.query.filter_by(id=current_user_id).first()
+        if not sender_user:
+            return generate_response(False, None, "Sender User does not exist"), 400
+        if not sender_user.account_address:
+            return generate_response(False, None, "Sender wallet is not provisioned yet"), 409
+
+        if not User.query.filter_by(id=user_id).first():
+            return generate_response(False, None, "Receiving User does not exist"), 400
+
+        if not Challenge.query.filter_by(id=challenge_id).first():
+            return generate_response(False, None, "Challenge does not exist"), 400
+
+        wallet = wallet_session_store.current()
+        if wallet is None:
+            return generate_response(False, None, "Wallet information not found in the session.")
+
+        sender_private_key = algorand.get_cached_private_key(wallet.name, wallet.pswd, sender_user.account_address)
+        if sender_private_key is None:
+            return generate_response(False, None, "Error getting sender key"), 500
+
+        job = IssuanceJob(
+            staff_id=current_user_id,
+            user_id=user_id,
+            challenge_id=challenge_id,
+            title=title,
+            score=score
+        )
+        db.session.add(job)
+        db.session.commit()
+
+        issuance_pipeline.submit(current_app._get_current_object(), job.id, sender_user.account_address, sender_private_key)
+
+        # Poll /certificates/jobs/<id> for progress
+        return generate_response(True, issuance_job_info(job), "Certificate issuance queued"), 202
+
+    except Exception as e:
+        return generate_response(False, None, f"Error queueing certificate issuance: {e}"), 500
+
+@certificate_bp.route('/certificates/jobs/<int:job_id>', methods=['GET'])
+@jwt_required()
+def get_issuance_job(job_id):
+    try:
+        job = IssuanceJob.query.get(job_id)
+
+        if not job or job.staff_id != get_jwt_identity():
+            return generate_response(False, None, "Issuance job not found"), 404
+
+        return generate_response(True, issuance_job_info(job), None), 200
+
+    except Exception as e:
+        return generate_response(False, None, f"Error getting issuance job: {e}"), 500
+
+CERTIFICATE_FIELDS = ('id', 'title', 'score', 'issued_date', 'staff_id', 'user_id', 'nft_id', 'challenge_id', 'is_approved', 'ipfs_hash')
+
+def serialize_certificate(certificate, fields=None):
+    """
+    Serializes a certificate, only reading the given fields (all when None).
+    """
+    return {
+        field: certificate.is_approved.value if field == 'is_approved' else getattr(certificate, field)
+        for field in fields or CERTIFICATE_FIELDS
+    }
+
+def issuance_job_info(job):
+    return {
+        'id': job.id,
+        'status': job.status.value,
+        'title': job.title,
+        'score': job.score,
+        'user_id': job.user_id,
+        'challenge_id': job.challenge_id,
+        'ipfs_hash': job.ipfs_hash,
+        'txid': job.txid,
+        'nft_id': job.nft_id,
+        'certificate_id': job.certificate_id,
+        'error': job.error,
+        'created_at': job.created_at,
+        'updated_at': job.updated_at
+    }
+
 @certificate_bp.route('/certificates/optin/<int:certificate_id>', methods=['PUT'])
 @jwt_required()
 def request_optin(certificate_id):
@@ -117,24 +463,54 @@ def request_optin(certificate_id):
         # Check if the current user is the certificate owner
         if current_user_id != certificate.user_id:
             return generate_response(False, None, "Unauthorized to request opt-in for the certificate"), 403
+        if certificate.nft_id is None:
+            return generate_response(False, None, "Certificate asset is not minted yet"), 409
 
         sender_user = User.query.filter_by(id=current_user_id).first()
         if not sender_user:
             return generate_response(False, None, "Sender User does not exist"), 400
+        if not sender_user.account_address:
+            return generate_response(False, None, "Sender wallet is not provisioned yet"), 409
         
-        results = algorand.opt_in_asset(
-            sender_address=sender_user.account_address,
-            password=password,
-            username=sender_user.username,
-            nft_id=certificate.nft_id
-        )
-
-        if results is None:
-            return generate_response(False, None, "Error optin for asset"), 500
-        
-        # Update certificate status to "Pending"
-        certificate.is_approved = ApprovalStatus.PENDING
-        db.session.commit()
+        wait = wait_requested()
+        if atomic_delivery_requested():
+            issuer = User.query.filter_by(id=certificate.staff_id).first()
+            if not issuer:
+                return generate_response(False, None, "Issuer does not exist"), 400
+
+            delivery_group = algorand.prepare_delivery(
+                nft_id=certificate.nft_id,
+                issuer_address=issuer.account_address,
+                receiver_address=sender_user.account_address,
+                receiver_username=sender_user.kmd_wallet_name,
+                receiver_password=password
+            )
+            if delivery_group is None:
+                return generate_response(False, None, "Error preparing delivery for asset"), 500
+
+            # Nothing is on chain yet, the issuer submits the whole group on approval
+            certificate.delivery_group = delivery_group
+            certificate.is_approved = ApprovalStatus.PENDING
+            db.session.commit()
+            wait = True
+            results = delivery_group
+        else:
+            results = algorand.opt_in_asset(
+                sender_address=sender_user.account_address,
+                password=password,
+                username=sender_user.kmd_wallet_name,
+                nft_id=certificate.nft_id,
+                wait=wait,
+                on_confirmed=certificate_updater(certificate.id, set_status(ApprovalStatus.PENDING))
+            )
+
+            if results is None:
+                return generate_response(False, None, "Error optin for asset"), 500
+            
+            if wait:
+                # Update certificate status to "Pending"
+                certificate.is_approved = ApprovalStatus.PENDING
+                db.session.commit()
         
         certificate_info = {
             'id': certificate.id,
@@ -149,6 +525,10 @@ def request_optin(certificate_id):
             'ipfs_hash': certificate.ipfs_hash
         }
 
+        if not wait:
+            certificate_info['txid'] = results
+            return generate_response(True, certificate_info, "Opt-in request submitted"), 202
+
         return generate_response(True, certificate_info, "Opt-in request sent successfully"), 200
 
     except Exception as e:
@@ -173,31 +553,66 @@ def approve_optin(certificate_id):
         # Check if the current user is the issuer
         if current_user_id != certificate.staff_id:
             return generate_response(False, None, "Unauthorized to approve opt-in for the certificate"), 403
+        if certificate.nft_id is None:
+            return generate_response(False, None, "Certificate asset is not minted yet"), 409
 
         sender_user = User.query.filter_by(id=current_user_id).first()
         if not sender_user:
             return generate_response(False, None, "Sender User does not exist"), 400
+        if not sender_user.account_address:
+            return generate_response(False, None, "Sender wallet is not provisioned yet"), 409
+        # A mistyped password is answered before any wallet or pending delivery is touched
+        if not password_hasher.verify(sender_user.password_hash, password):
+            return generate_response(False, None, "Invalid password"), 401
 
         receiving_user = User.query.filter_by(id=certificate.user_id).first()
         if not receiving_user:
             return generate_response(False, None, "Receiving User does not exist"), 400
+        if not receiving_user.account_address:
+            return generate_response(False, None, "Receiving wallet is not provisioned yet"), 409
 
      
         # Perform opt-in for the asset
-        results = algorand.transfer_asset(
-            sender_address=sender_user.account_address,
-            password=password,
-            username=sender_user.username,
-            nft_id=certificate.nft_id,
-            receiver_address=receiving_user.account_address
-        )
-
-        if results is None:
-            return generate_response(False, None, "Error transfering asset for asset"), 500
+        wait = wait_requested()
+        if certificate.delivery_group:
+            # Opt-in and transfer are confirmed together in a single group
+            try:
+                results = algorand.complete_delivery(
+                    delivery_group=certificate.delivery_group,
+                    issuer_address=sender_user.account_address,
+                    username=sender_user.kmd_wallet_name,
+                    password=password,
+                    wait=wait,
+                    on_confirmed=certificate_updater(certificate.id, set_delivered)
+                )
+            except DeliveryRejected:
+                # Most likely the group expired, the trainee has to request again
+                certificate.delivery_group = None
+                certificate.is_approved = ApprovalStatus.NO_REQUEST
+                db.session.commit()
+                return generate_response(False, None, "Delivery expired, please request opt-in again"), 409
+
+            if results is None:
+                # The trainee's signed group is kept for another attempt
+                return generate_response(False, None, "Error delivering asset"), 500
+        else:
+            results = algorand.transfer_asset(
+                sender_address=sender_user.account_address,
+                password=password,
+                username=sender_user.kmd_wallet_name,
+                nft_id=certificate.nft_id,
+                receiver_address=receiving_user.account_address,
+                wait=wait,
+                on_confirmed=certificate_updater(certificate.id, set_status(ApprovalStatus.APPROVED))
+            )
+
+            if results is None:
+                return generate_response(False, None, "Error transfering asset for asset"), 500
         
-        # Update certificate status to "Pending"
-        certificate.is_approved = ApprovalStatus.APPROVED
-        db.session.commit()
+        if wait:
+            # Update certificate status to "Approved"
+            set_delivered(certificate, results)
+            db.session.commit()
 
         certificate_info = {
             'id': certificate.id,
@@ -212,8 +627,15 @@ def approve_optin(certificate_id):
             'ipfs_hash': certificate.ipfs_hash
         }
 
+        if not wait:
+            certificate_info['txid'] = results
+            return generate_response(True, certificate_info, "Transfer asset request submitted"), 202
+
         return generate_response(True, certificate_info, "Transfer asset request approved successfully"), 200
 
+    except HasherBusy:
+        return generate_response(False, None, "Server busy, try again shortly"), 503, {'Retry-After': '1'}
+
     except Exception as e:
         return generate_response(False, None, f"Error approving asset request: {e}"), 500
 
@@ -222,6 +644,14 @@ def approve_optin(certificate_id):
 @certificate_bp.route('/certificates', methods=['GET'])
 @jwt_required()
 def get_certificates():
+    """
+    Lists the current user's certificates a page at a time. Optional query parameters:
+    - sort: id (default) or issued_date, and order: asc (default) or desc
+    - challenge_id, batch_number, week_number, is_approved (e.g. Pending),
+      issued_after and issued_before (ISO 8601)
+    - fields: comma separated certificate fields to return
+    - limit, and the cursor returned in the X-Next-Cursor header of the previous page
+    """
     try:
         current_user_id = get_jwt_identity()
         current_user = User.query.get(current_user_id)
@@ -229,31 +659,58 @@ def get_certificates():
         if not current_user:
             return generate_response(False, None, "User not found"), 404
         if current_user.role == UserRole.ISSUER:
-            # If the user is an Issuer, get all certificates with staff_id
-            certificates = Certificate.query.filter_by(staff_id=current_user_id).all()
+            # If the user is an Issuer, get the certificates with staff_id
+            query = Certificate.query.filter_by(staff_id=current_user_id)
         else:
-            # If the user is not an Issuer, get all certificates with user_id
-            certificates = Certificate.query.filter_by(user_id=current_user_id).all()
-
-
-        certificate_list = []
-
-        for certificate in certificates:
-            certificate_info = {
-                'id': certificate.id,
-                'title': certificate.title,
-                'score': certificate.score,
-                'issued_date': certificate.issued_date,
-                'staff_id': certificate.staff_id,
-                'user_id': certificate.user_id,
-                'nft_id': certificate.nft_id,
-                'challenge_id': certificate.challenge_id,
-                'is_approved': certificate.is_approved.value,
-                'ipfs_hash': certificate.ipfs_hash
-            }
-            certificate_list.append(certificate_info)
-
-        return generate_response(True, certificate_list, "Get certificates successfully"), 200
+            # If the user is not an Issuer, get the certificates with user_id
+            query = Certificate.query.filter_by(user_id=current_user_id)
+
+        fields = parse_fields(request.args, CERTIFICATE_FIELDS)
+
+        sort = request.args.get('sort', 'id')
+        if sort not in ('id', 'issued_date'):
+            raise QueryParameterError("sort must be id or issued_date")
+        sort_columns = [Certificate.issued_date, Certificate.id] if sort == 'issued_date' else [Certificate.id]
+
+        challenge_id = parse_int(request.args, 'challenge_id')
+        if challenge_id is not None:
+            query = query.filter(Certificate.challenge_id == challenge_id)
+        batch_number = parse_int(request.args, 'batch_number')
+        week_number = parse_int(request.args, 'week_number')
+        if batch_number is not None or week_number is not None:
+            query = query.join(Challenge, Certificate.challenge_id == Challenge.id)
+            if batch_number is not None:
+                query = query.filter(Challenge.batch_number == batch_number)
+            if week_number is not None:
+                query = query.filter(Challenge.week_number == week_number)
+        if request.args.get('is_approved'):
+            try:
+                query = query.filter(Certificate.is_approved == ApprovalStatus(request.args['is_approved']))
+            except ValueError:
+                raise QueryParameterError("is_approved must be one of " + ", ".join(status.value for status in ApprovalStatus))
+        issued_after = parse_datetime(request.args, 'issued_after')
+        if issued_after is not None:
+            query = query.filter(Certificate.issued_date >= issued_after)
+        issued_before = parse_datetime(request.args, 'issued_before')
+        if issued_before is not None:
+            query = query.filter(Certificate.issued_date < issued_before)
+
+        if fields is not None:
+            # Only load the requested columns, plus the sort key for the cursor
+            columns = {column.key: column for column in sort_columns}
+            columns.update((field, getattr(Certificate, field)) for field in fields)
+            query = query.options(load_only(*columns.values()))
+
+        certificates, next_cursor = paginate(query, sort_columns, request.args, descending=request.args.get('order') == 'desc')
+        certificate_list = [project(serialize_certificate(certificate, fields), fields) for certificate in certificates]
+
+        response = generate_response(True, certificate_list, "Get certificates successfully")
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response, 200
+
+    except QueryParameterError as e:
+        return generate_response(False, None, str(e)), 400
 
     except Exception as e:
         return generate_response(False, None, f"Error retrieving certificates: {e}"), 500
@@ -1,16 +1,28 @@
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
+from concurrent.futures import ThreadPoolExecutor
 import requests
 import os
+import threading
+from collections import OrderedDict
 from dotenv import load_dotenv
-import cv2
-from PIL import Image, ImageDraw, ImageFont
-import numpy as np
+from template_cache import template_cache
+from pin_uploader import pin_uploader
+
+# OpenCV, PIL and NumPy take a few hundred milliseconds to import; they are
+# imported by the functions that render, so importing this module stays cheap
+if TYPE_CHECKING:
+    import numpy as np
+    from PIL import Image
 
 # Load environment variables from .env file
 load_dotenv()
-JWT = os.getenv('PINATA_JWT')
+# Directory for local copies of issued certificates, unset to keep none
+ARCHIVE_DIR = os.getenv('CERTIFICATE_ARCHIVE_DIR')
+
+_archive_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="certificate-archive")
 
-def download_image(image_url: str) -> Optional[np.ndarray]:
+
+def download_image(image_url: str) -> Optional["np.ndarray"]:
     """
     Download an image from a given URL, convert it to a NumPy array using OpenCV, and return the image.
 
@@ -20,6 +32,9 @@ def download_image(image_url: str) -> Optional[np.ndarray]:
     Returns:
     - Optional[np.ndarray]: The NumPy array representing the downloaded image, or None if an error occurs.
     """
+    import cv2
+    import numpy as np
+
     try:
         # Download the image
         image_response = requests.get(image_url)
@@ -46,35 +61,25 @@ def download_image(image_url: str) -> Optional[np.ndarray]:
 
 
 
-def customize_certificate(
-        username: str, 
-        title: str, 
-        issued_date: str,
-        week_number: int,
-        image_url: str="https://res.cloudinary.com/dv9se1fwu/image/upload/v1705084396/ykinhidb5xum6lsl6l5z.png", 
-        academy_logo_path: str="../images/10x_logo.png") -> np.ndarray:
-    """
-    Customize a certificate by adding text and logos to a background image.
+DEFAULT_BACKGROUND_URL = "https://res.cloudinary.com/dv9se1fwu/image/upload/v1705084396/ykinhidb5xum6lsl6l5z.png"
+DEFAULT_LOGO_PATH = "../images/10x_logo.png"
+FONT_COLOR = (59, 31, 24)
 
-    Args:
-    - username (str): The full name of the individual receiving the certificate.
-    - title (str): The name of the completed course or challenge.
-    - issued_date (str): The date when the certificate is issued.
-    - academy_logo_path (str): The file path to the academy's logo image.
-    - image_url (string): the url of background image
 
-    Returns:
-    - np.ndarray: The customized certificate as a NumPy array.
-
-    Note:
-    - This function saves the customized certificate image to a file named '{username}_certificate.png'.
+class CertificateTemplate:
+    """
+    A certificate background with everything that is the same on every certificate
+    already drawn on it: the academy logo and the static text. Fonts are loaded once.
+    Rendering a certificate only draws the username, title and date onto a copy.
     """
 
-    try:
-        print("Customizing certificate started.")
+    def __init__(self, image_url: str = DEFAULT_BACKGROUND_URL, academy_logo_path: str = DEFAULT_LOGO_PATH,
+                 background_image: Optional["np.ndarray"] = None):
+        import cv2
+        from PIL import Image, ImageDraw, ImageFont
 
-        # downloa background image
-        background_image = download_image(image_url)
+        if background_image is None:
+            background_image = template_cache.get(image_url)
         assert background_image is not None, 'Error loading the background image'
 
         # Load the academy logo from a local file
@@ -89,60 +94,235 @@ def customize_certificate(
         logo_image = cv2.resize(logo_image, dim, interpolation=cv2.INTER_AREA)
 
         # Convert the background to a PIL Image
-        background_pil = Image.fromarray(cv2.cvtColor(background_image, cv2.COLOR_BGR2RGB))
-        draw = ImageDraw.Draw(background_pil)
-
-        # Define font size and color
-        font_large = ImageFont.load_default(size=24)  # Adjust as needed
-        font_medium = ImageFont.load_default(size=24)  # Adjust as needed
-        font_color = (59, 31, 24)
-
-        # Add text to the certificate
-        draw.text((264, 430), 'This certifies that', font=font_medium, fill=font_color)
-        draw.text((460, 430), username, font=font_large, fill=font_color)
-        draw.text((264, 485), 'Has successfully completed the', font=font_medium, fill=font_color)
-        draw.text((264, 540), title, font=font_large, fill=font_color)
-        draw.text((320, 595), 'Date of Issue:', font=font_medium, fill=font_color)
-        draw.text((470, 595), issued_date, font=font_medium, fill=font_color)
+        self.base = Image.fromarray(cv2.cvtColor(background_image, cv2.COLOR_BGR2RGB))
+
+        # Define font size
+        self.font_large = ImageFont.load_default(size=24)  # Adjust as needed
+        self.font_medium = ImageFont.load_default(size=24)  # Adjust as needed
+
+        # Add the static text to the certificate
+        draw = ImageDraw.Draw(self.base)
+        draw.text((264, 430), 'This certifies that', font=self.font_medium, fill=FONT_COLOR)
+        draw.text((264, 485), 'Has successfully completed the', font=self.font_medium, fill=FONT_COLOR)
+        draw.text((320, 595), 'Date of Issue:', font=self.font_medium, fill=FONT_COLOR)
 
         # Paste the academy logo onto the certificate
         logo_image_pil = Image.fromarray(logo_image)
         logo_image_pil = logo_image_pil.convert("RGBA")
-        background_pil.paste(logo_image_pil, (50, 50), logo_image_pil)
+        self.base.paste(logo_image_pil, (50, 50), logo_image_pil)
+
+    def render(self, username: str, title: str, issued_date: str) -> "Image.Image":
+        """
+        Draw the per-certificate fields onto a copy of the template.
 
+        Returns:
+        - Image.Image: The customized certificate as an RGB PIL image.
+        """
+        from PIL import ImageDraw
 
-        # Convert back to CV2 image to save or display
-        final_certificate = cv2.cvtColor(np.array(background_pil), cv2.COLOR_RGB2BGR)
+        certificate = self.base.copy()
+        draw = ImageDraw.Draw(certificate)
+        draw.text((460, 430), username, font=self.font_large, fill=FONT_COLOR)
+        draw.text((264, 540), title, font=self.font_large, fill=FONT_COLOR)
+        draw.text((470, 595), issued_date, font=self.font_medium, fill=FONT_COLOR)
+        return certificate
 
-        output_path = f'../images/certificates/{username}_week_{week_number}_certificate.png'
-        cv2.imwrite(output_path, final_certificate)
-        print(f"Customized certificate saved to {output_path}")
+    def __getstate__(self):
+        # Fonts are not picklable, ship only the composited base and reload them
+        return {"base": self.base}
 
-        return upload_certificate_to_pinata(username, week_number, output_path)
+    def __setstate__(self, state):
+        from PIL import ImageFont
+
+        self.base = state["base"]
+        self.font_large = ImageFont.load_default(size=24)
+        self.font_medium = ImageFont.load_default(size=24)
+
+
+# Compiled templates by (background URL, logo path), each with the decoded
+# background it was built from, least recently used first
+_compiled_templates: "OrderedDict[tuple, tuple]" = OrderedDict()
+_compiled_templates_lock = threading.Lock()
+MAX_COMPILED_TEMPLATES = int(os.getenv("COMPILED_TEMPLATES_MAX", "8"))
+
+
+def get_certificate_template(image_url: str = DEFAULT_BACKGROUND_URL, academy_logo_path: str = DEFAULT_LOGO_PATH) -> CertificateTemplate:
+    """
+    Return the compiled template for a background and logo, building it on first use.
+
+    The background always comes from the template cache, so its size bound and
+    revalidation still apply: once the cache hands out a different decoded image
+    (re-downloaded, changed or evicted and decoded again) the template is rebuilt.
+    """
+    key = (image_url, academy_logo_path)
+    background_image = template_cache.get(image_url)
+    with _compiled_templates_lock:
+        entry = _compiled_templates.get(key)
+        if entry is not None and entry[0] is background_image:
+            _compiled_templates.move_to_end(key)
+            return entry[1]
+
+        template = CertificateTemplate(image_url, academy_logo_path, background_image)
+        _compiled_templates[key] = (background_image, template)
+        _compiled_templates.move_to_end(key)
+        while len(_compiled_templates) > MAX_COMPILED_TEMPLATES:
+            _compiled_templates.popitem(last=False)
+        return template
+
+
+def customize_certificate(
+        username: str, 
+        title: str, 
+        issued_date: str,
+        week_number: int,
+        image_url: str=DEFAULT_BACKGROUND_URL, 
+        academy_logo_path: str=DEFAULT_LOGO_PATH) -> "np.ndarray":
+    """
+    Customize a certificate by adding text and logos to a background image.
+
+    Args:
+    - username (str): The full name of the individual receiving the certificate.
+    - title (str): The name of the completed course or challenge.
+    - issued_date (str): The date when the certificate is issued.
+    - academy_logo_path (str): The file path to the academy's logo image.
+    - image_url (string): the url of background image
+
+    Returns:
+    - np.ndarray: The customized certificate as a NumPy array.
+
+    Note:
+    - The certificate is encoded once in memory and uploaded from there. A copy named
+      '{username}_week_{week_number}_certificate.png' is written to CERTIFICATE_ARCHIVE_DIR
+      in the background when that variable is set.
+    """
+
+    try:
+        print("Customizing certificate started.")
+
+        certificate_bytes = render_certificate(username, title, issued_date, image_url, academy_logo_path)
+
+        return publish_certificate(username, week_number, certificate_bytes)
 
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
+        import numpy as np
         return np.zeros((1, 1, 3), dtype=np.uint8)  # Return a blank image or handle the error as needed
     
     
+def render_certificate(
+        username: str,
+        title: str,
+        issued_date: str,
+        image_url: str=DEFAULT_BACKGROUND_URL,
+        academy_logo_path: str=DEFAULT_LOGO_PATH) -> bytes:
+    """
+    Render a certificate and encode it as PNG, without uploading it.
+
+    Returns:
+    - bytes: The PNG file contents.
+    """
+    # Logo, static text and fonts come precomposited with the template
+    template = get_certificate_template(image_url, academy_logo_path)
+    return encode_certificate(template.render(username, title, issued_date))
+
+
+def encode_certificate(certificate: "Image.Image") -> bytes:
+    """
+    Encode a rendered certificate as PNG in memory.
+
+    Args:
+    - certificate (Image.Image): The rendered RGB certificate.
+
+    Returns:
+    - bytes: The PNG file contents.
+    """
+    import cv2
+    import numpy as np
+
+    # OpenCV's PNG encoder is several times faster than PIL's at its default level
+    ok, buffer = cv2.imencode('.png', cv2.cvtColor(np.asarray(certificate), cv2.COLOR_RGB2BGR))
+    if not ok:
+        raise ValueError("Could not encode certificate")
+    return buffer.tobytes()
+
+
+def archive_certificate(filename: str, certificate_bytes: bytes, archive_dir: Optional[str] = None):
+    """
+    Write a copy of an encoded certificate to the archive directory in the background.
+    Does nothing when no archive directory is configured.
+    """
+    archive_dir = archive_dir or ARCHIVE_DIR
+    if not archive_dir:
+        return None
+
+    def write():
+        try:
+            os.makedirs(archive_dir, exist_ok=True)
+            output_path = os.path.join(archive_dir, filename)
+            with open(output_path, 'wb') as f:
+                f.write(certificate_bytes)
+            print(f"Customized certificate saved to {output_path}")
+        except OSError as e:
+            print(f"Archiving certificate failed: {e}")
+
+    return _archive_executor.submit(write)
+
+
+def publish_certificate(username, week_number, certificate_bytes):
+    """
+    Archive an encoded certificate (when configured) and pin it to IPFS.
+
+    Returns:
+    - The IPFS hash of the certificate, or None if the upload failed.
+    """
+    _, upload = submit_certificate(username, week_number, certificate_bytes)
+    return upload.result()
+
+
+def submit_certificate(username, week_number, certificate_bytes):
+    """
+    Like publish_certificate, but queues the upload on the pin uploader's pool.
+    The CID is computed locally, so it can be used (e.g. to mint the NFT) while
+    the upload is in flight. Certificates pinned before are not uploaded again.
+
+    Returns:
+    - The CID of the certificate, and a future resolving to its IPFS hash (None if the upload failed).
+    """
+    archive_certificate(f'{username}_week_{week_number}_certificate.png', certificate_bytes)
+    cid, upload = pin_uploader.pin(
+        f"{username}_week_{week_number}_certificate.png",
+        certificate_bytes,
+        name=f"{username}_week_{week_number}_certificate"
+    )
+    if upload.done():
+        print(f"{username}'s week {week_number} challenge certificate is already pinned as {cid}.")
+    return cid, upload
+
+
 def upload_certificate_to_pinata(username, week_number, output_path):
     try:
-        url = "https://api.pinata.cloud/pinning/pinFileToIPFS"
-        # filename = f"../images/certificates/{username}_week_{week_number}_certificate.png"
-        headers = {
-            "pinataMetadata": f"{username}_week_{week_number}_certificate",
-            "Authorization": "Bearer " + JWT
-        }
-
         with open(output_path, 'rb') as f:
-            response = requests.post(url, files={"file": f}, headers=headers)
+            certificate_bytes = f.read()
+    except Exception as e:
+        print(f"upload certificate to pinata failed: {e}")
+        return None
+
+    return upload_certificate_bytes_to_pinata(username, week_number, certificate_bytes)
+
+
+def upload_certificate_bytes_to_pinata(username, week_number, certificate_bytes):
+    try:
+        ipfs_hash = pin_uploader.upload(
+            f"{username}_week_{week_number}_certificate.png",
+            certificate_bytes,
+            name=f"{username}_week_{week_number}_certificate"
+        )
 
-        if response.status_code == 200:
+        if ipfs_hash:
             print(f"Successfully uploaded {username}'s week {week_number} challenge certificate.")
-            return response.json()["IpfsHash"]
         else:
-            print(f"Failed to upload {username}'s certificate. Response: {response.text}")
-            return None
+            print(f"Failed to upload {username}'s certificate.")
+        return ipfs_hash
     except Exception as e:
         print(f"upload certificate to pinata failed: {e}")
         return None
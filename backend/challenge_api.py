@@ -1,11 +1,39 @@
 from flask import jsonify, request
 from flask_jwt_extended import jwt_required
-from models import Challenge
+from sqlalchemy import event, func, insert, update
+from sqlalchemy.orm import Session
+from models import Certificate, Challenge
 from flask import Blueprint
 from models import db
+from pagination import QueryParameterError, paginate, parse_fields, parse_int, project
+from response_cache import challenge_cache
 
 challenge_bp = Blueprint('challenge', __name__)
 
+@event.listens_for(Session, 'after_flush')
+def note_challenge_changes(session, flush_context):
+    # Challenge reads include certificate counts, so certificate inserts and deletes change them too
+    added_or_deleted = [*session.new, *session.deleted]
+    if any(isinstance(instance, (Challenge, Certificate)) for instance in added_or_deleted) \
+            or any(isinstance(instance, Challenge) for instance in session.dirty):
+        mark_challenges_changed(session)
+
+def mark_challenges_changed(session):
+    """
+    Drops the cached challenge reads once the session commits. Bulk statements
+    bypass the flush hook, so they call this themselves.
+    """
+    session.info['challenges_changed'] = True
+
+@event.listens_for(Session, 'after_commit')
+def invalidate_challenge_reads(session):
+    if session.info.pop('challenges_changed', False):
+        challenge_cache.invalidate()
+
+@event.listens_for(Session, 'after_rollback')
+def forget_challenge_changes(session):
+    session.info.pop('challenges_changed', None)
+
 def generate_response(is_success, value=None, error=None):
     response = {
         "isSuccess": is_success,
@@ -14,45 +42,107 @@ def generate_response(is_success, value=None, error=None):
     }
     return jsonify(response)
 
+def certificates_requested():
+    """
+    Every challenge response, reads and writes alike, carries the number of
+    certificates of each challenge; the certificate ids themselves are only
+    listed with ?include=certificates.
+    """
+    return 'certificates' in request.args.get('include', '').split(',')
+
+def aggregate_ids(column):
+    # Postgres collects the ids into an array, SQLite into a comma separated string
+    if db.engine.dialect.name == 'postgresql':
+        return func.array_remove(func.array_agg(column), None)
+    return func.group_concat(column)
+
+CHALLENGE_FIELDS = ('id', 'title', 'description', 'week_number', 'batch_number', 'certificate_count', 'certificates')
+
+def challenge_summary_query(*criteria, include_certificates=False):
+    """
+    Selects challenges together with their certificate count, and optionally their
+    certificate ids, in one aggregated query instead of loading every challenge's
+    certificates separately.
+    """
+    challenge_columns = [Challenge.id, Challenge.title, Challenge.description, Challenge.week_number, Challenge.batch_number]
+    columns = challenge_columns + [func.count(Certificate.id).label('certificate_count')]
+    if include_certificates:
+        columns.append(aggregate_ids(Certificate.id).label('certificate_ids'))
+
+    return (
+        db.session.query(*columns)
+        .outerjoin(Certificate, Certificate.challenge_id == Challenge.id)
+        .filter(*criteria)
+        .group_by(*challenge_columns)
+    )
+
+def challenge_summary_info(row, include_certificates=False):
+    challenge_info = {
+        'id': row.id,
+        'title': row.title,
+        'description': row.description,
+        'week_number': row.week_number,
+        'batch_number': row.batch_number,
+        'certificate_count': row.certificate_count
+    }
+    if include_certificates:
+        certificate_ids = row.certificate_ids or []
+        if isinstance(certificate_ids, str):
+            certificate_ids = [int(certificate_id) for certificate_id in certificate_ids.split(',')]
+        challenge_info['certificates'] = sorted(certificate_ids)
+    return challenge_info
+
+def challenge_summary_by_id(challenge_id, include_certificates=False):
+    row = challenge_summary_query(Challenge.id == challenge_id, include_certificates=include_certificates).first()
+    return challenge_summary_info(row, include_certificates) if row else None
+
 @challenge_bp.route('/challenges', methods=['GET'])
+@challenge_cache.cached
 def get_challenges():
+    """
+    Lists challenges a page at a time, in id order. Optional query parameters:
+    batch_number, week_number, fields (comma separated), limit, and the cursor
+    returned in the X-Next-Cursor header of the previous page.
+    """
     try:
-        challenges = Challenge.query.all()
-        challenge_list = []
-
-        for challenge in challenges:
-            challenge_info = {
-                'id': challenge.id,
-                'title': challenge.title,
-                'description': challenge.description,
-                'week_number': challenge.week_number,
-                'batch_number': challenge.batch_number,
-                'certificates': [certificate.id for certificate in challenge.certificates]
-            }
-            challenge_list.append(challenge_info)
-
-        return generate_response(True, challenge_list, None), 200
+        fields = parse_fields(request.args, CHALLENGE_FIELDS)
+        include_certificates = certificates_requested() or (fields is not None and 'certificates' in fields)
+
+        criteria = []
+        batch_number = parse_int(request.args, 'batch_number')
+        if batch_number is not None:
+            criteria.append(Challenge.batch_number == batch_number)
+        week_number = parse_int(request.args, 'week_number')
+        if week_number is not None:
+            criteria.append(Challenge.week_number == week_number)
+
+        rows, next_cursor = paginate(
+            challenge_summary_query(*criteria, include_certificates=include_certificates),
+            [Challenge.id],
+            request.args
+        )
+        challenge_list = [project(challenge_summary_info(row, include_certificates), fields) for row in rows]
+
+        response = generate_response(True, challenge_list, None)
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response, 200
+
+    except QueryParameterError as e:
+        return generate_response(False, None, str(e)), 400
 
     except Exception as e:
         return generate_response(False, None, f"Error retrieving challenges: {e}"), 500
 
 @challenge_bp.route('/challenges/<int:challenge_id>', methods=['GET'])
+@challenge_cache.cached
 def get_challenge_by_id(challenge_id):
     try:
-        challenge = Challenge.query.get(challenge_id)
+        challenge_info = challenge_summary_by_id(challenge_id, certificates_requested())
 
-        if not challenge:
+        if not challenge_info:
             return generate_response(False, None, "Challenge not found"), 404
 
-        challenge_info = {
-            'id': challenge.id,
-            'title': challenge.title,
-            'description': challenge.description,
-            'week_number': challenge.week_number,
-            "batch_number": challenge.batch_number,
-            'certificates': [certificate.id for certificate in challenge.certificates]
-        }
-
         return generate_response(True, challenge_info, None), 200
 
     except Exception as e:
@@ -79,21 +169,12 @@ def create_challenge():
         db.session.add(new_challenge)
         db.session.commit()
 
-        # Fetch the details of the newly created challenge
-        created_challenge = Challenge.query.get(new_challenge.id)
+        # Fetch the details of the newly created challenge, in the shape of the reads
+        challenge_info = challenge_summary_by_id(new_challenge.id, certificates_requested())
 
-        if not created_challenge:
+        if not challenge_info:
             return generate_response(False, None, "Error fetching created challenge"), 500
 
-        challenge_info = {
-            'id': created_challenge.id,
-            'title': created_challenge.title,
-            'description': created_challenge.description,
-            'week_number': created_challenge.week_number,
-            'batch_number': created_challenge.batch_number,
-            'certificates': [certificate.id for certificate in created_challenge.certificates]
-        }
-
         return generate_response(True, challenge_info, None), 201
 
     except Exception as e:
@@ -120,14 +201,7 @@ def update_challenge(challenge_id):
 
         db.session.commit()
 
-        challenge_info = {
-            'id': challenge.id,
-            'title': challenge.title,
-            'description': challenge.description,
-            'week_number': challenge.week_number,
-            "batch_number": challenge.batch_number,
-            'certificates': [certificate.id for certificate in challenge.certificates]
-        }
+        challenge_info = challenge_summary_by_id(challenge.id, certificates_requested())
 
         return generate_response(True, challenge_info, None), 200
 
@@ -145,19 +219,159 @@ def delete_challenge(challenge_id):
 
         # Optionally, you can add additional checks here (e.g., user permission)
 
+        # Described before it is gone, in the shape of the reads
+        challenge_info = challenge_summary_by_id(challenge.id, certificates_requested())
+
         db.session.delete(challenge)
         db.session.commit()
 
-        challenge_info = {
-            'id': challenge.id,
-            'title': challenge.title,
-            'description': challenge.description,
-            'week_number': challenge.week_number,
-            "batch_number": challenge.batch_number,
-            'certificates': [certificate.id for certificate in challenge.certificates]
-        }
-
         return generate_response(True, challenge_info, None), 200
 
     except Exception as e:
         return generate_response(False, None, f"Error deleting challenge: {e}"), 500
+
+CHALLENGE_COLUMNS = ('title', 'description', 'week_number', 'batch_number')
+
+def validate_challenge_item(item, partial=False):
+    """
+    Returns the challenge columns of a bulk item, or raises ValueError with the reason it is invalid.
+    With partial set (updates), only the given columns are validated and returned.
+    """
+    if not isinstance(item, dict):
+        raise ValueError("Item must be an object")
+
+    values = {column: item[column] for column in CHALLENGE_COLUMNS if item.get(column) is not None}
+    missing = [column for column in CHALLENGE_COLUMNS if column not in values]
+    if missing and not partial:
+        raise ValueError(f"Missing required fields: {', '.join(missing)}")
+
+    for column in ('title', 'description'):
+        if column in values and (not isinstance(values[column], str) or not values[column].strip()):
+            raise ValueError(f"{column} must be a non-empty string")
+    for column in ('week_number', 'batch_number'):
+        if column in values and (not isinstance(values[column], int) or isinstance(values[column], bool) or values[column] < 0):
+            raise ValueError(f"{column} must be a non-negative integer")
+    if len(values.get('title', '')) > 100 or len(values.get('description', '')) > 255:
+        raise ValueError("title or description is too long")
+    return values
+
+@challenge_bp.route('/challenges/bulk', methods=['POST'])
+@jwt_required()
+def create_challenges_bulk():
+    """
+    Creates a list of challenges in a single transaction. Each item gets its own
+    result; invalid items are reported and skipped without failing the others.
+
+    The rows go in with INSERT ... RETURNING, batched into multi-row statements
+    where the database lets SQLAlchemy match returned rows to parameters (e.g.
+    Postgres). SQLite does not, so there every row gets its own statement.
+    """
+    try:
+        items = request.json.get('challenges')
+        if not isinstance(items, list) or not items:
+            return generate_response(False, None, "Missing required fields"), 400
+
+        include_certificates = certificates_requested()
+        results = [None] * len(items)
+        to_insert = []
+        for index, item in enumerate(items):
+            try:
+                to_insert.append((index, validate_challenge_item(item)))
+            except ValueError as e:
+                results[index] = {'isSuccess': False, 'value': None, 'error': str(e)}
+
+        if to_insert:
+            statement = insert(Challenge).returning(
+                Challenge.id, *[getattr(Challenge, column) for column in CHALLENGE_COLUMNS],
+                # RETURNING itself does not promise row order, SQLAlchemy restores it,
+                # on SQLite at the cost of one INSERT per row
+                sort_by_parameter_order=True
+            )
+            rows = db.session.execute(statement, [values for _, values in to_insert]).all()
+            mark_challenges_changed(db.session)
+            db.session.commit()
+
+            for (index, _), row in zip(to_insert, rows):
+                challenge_info = {
+                    'id': row.id,
+                    'title': row.title,
+                    'description': row.description,
+                    'week_number': row.week_number,
+                    'batch_number': row.batch_number,
+                    # Same shape as the challenge listing and bulk update items
+                    'certificate_count': 0
+                }
+                if include_certificates:
+                    challenge_info['certificates'] = []
+                results[index] = {'isSuccess': True, 'value': challenge_info, 'error': None}
+
+        if not to_insert:
+            return generate_response(False, results, "No challenge was created"), 400
+
+        return generate_response(True, results, f"Created {len(to_insert)} of {len(items)} challenges"), 201
+
+    except Exception as e:
+        db.session.rollback()
+        return generate_response(False, None, f"Error creating challenges: {e}"), 500
+
+@challenge_bp.route('/challenges/bulk', methods=['PUT'])
+@jwt_required()
+def update_challenges_bulk():
+    """
+    Updates a list of challenges, each given by its id and the fields to change,
+    with one executemany UPDATE in a single transaction. The current rows are read
+    with one query up front, so unknown ids are reported per item and the
+    response is built without reading the rows again.
+    """
+    try:
+        items = request.json.get('challenges')
+        if not isinstance(items, list) or not items:
+            return generate_response(False, None, "Missing required fields"), 400
+
+        results = [None] * len(items)
+        changes = []
+        for index, item in enumerate(items):
+            try:
+                values = validate_challenge_item(item, partial=True)
+                if not isinstance(item.get('id'), int):
+                    raise ValueError("Missing challenge id")
+                changes.append((index, item['id'], values))
+            except ValueError as e:
+                results[index] = {'isSuccess': False, 'value': None, 'error': str(e)}
+
+        ids = {challenge_id for _, challenge_id, _ in changes}
+        include_certificates = certificates_requested()
+        current = {
+            row.id: challenge_summary_info(row, include_certificates)
+            for row in challenge_summary_query(Challenge.id.in_(ids), include_certificates=include_certificates)
+        } if ids else {}
+
+        to_update = []
+        rows = []
+        for index, challenge_id, values in changes:
+            challenge_info = current.get(challenge_id)
+            if challenge_info is None:
+                results[index] = {'isSuccess': False, 'value': None, 'error': "Challenge not found"}
+                continue
+            # Later items for the same challenge see the earlier changes
+            challenge_info.update(values)
+            to_update.append(index)
+            if values:
+                rows.append({'id': challenge_id, **values})
+
+        if to_update:
+            if rows:
+                db.session.execute(update(Challenge), rows)
+            mark_challenges_changed(db.session)
+            db.session.commit()
+            for index in to_update:
+                results[index] = {'isSuccess': True, 'value': dict(current[items[index]['id']]), 'error': None}
+
+        if not to_update:
+            return generate_response(False, results, "No challenge was updated"), 400
+
+        return generate_response(True, results, f"Updated {len(to_update)} of {len(items)} challenges"), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return generate_response(False, None, f"Error updating challenges: {e}"), 500
@@ -0,0 +1,199 @@
+import json
+import logging
+import os
+import threading
+from typing import Dict, Optional, Tuple
+from urllib import parse
+
+import requests
+from requests.adapters import HTTPAdapter
+from algosdk import constants, error, kmd
+from algosdk.v2client import algod
+
+
+DEFAULT_ALGOD_ADDRESS = "http://localhost:4001"
+DEFAULT_KMD_ADDRESS = "http://localhost:4002"
+DEFAULT_SANDBOX_TOKEN = "aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa"
+
+
+class PooledAlgodClient(algod.AlgodClient):
+    """
+    AlgodClient that sends its requests through a shared requests.Session,
+    so TCP connections to algod are kept alive and reused between calls
+    instead of being opened by urlopen for every request.
+    """
+
+    def __init__(self, algod_token: str, algod_address: str, session: requests.Session, headers: Optional[Dict[str, str]] = None):
+        super().__init__(algod_token, algod_address, headers)
+        self.session = session
+
+    def algod_request(self, method, requrl, params=None, data=None, headers=None, response_format="json"):
+        header = {"User-Agent": "py-algorand-sdk"}
+
+        if self.headers:
+            header.update(self.headers)
+
+        if headers:
+            header.update(headers)
+
+        if requrl not in constants.no_auth:
+            header.update({constants.algod_auth_header: self.algod_token})
+
+        if requrl not in constants.unversioned_paths:
+            requrl = algod.api_version_path_prefix + requrl
+        if params:
+            requrl = requrl + "?" + parse.urlencode(params)
+
+        resp = self.session.request(method, self.algod_address + requrl, headers=header, data=data)
+
+        if resp.status_code >= 400:
+            try:
+                message = resp.json()["message"]
+            except Exception:
+                message = resp.text
+            raise error.AlgodHTTPError(message, resp.status_code)
+
+        if response_format == "json":
+            if resp.status_code == 200 and not resp.content:
+                # Some algod responses return a 200 OK with an empty body
+                return {}
+            try:
+                return resp.json()
+            except Exception as e:
+                raise error.AlgodResponseError("Failed to parse JSON response from algod") from e
+        return resp.content
+
+
+class PooledKMDClient(kmd.KMDClient):
+    """
+    KMDClient that sends its requests through a shared requests.Session.
+    """
+
+    def __init__(self, kmd_token: str, kmd_address: str, session: requests.Session):
+        super().__init__(kmd_token, kmd_address)
+        self.session = session
+
+    def kmd_request(self, method, requrl, params=None, data=None):
+        if requrl in constants.no_auth:
+            header = {}
+        else:
+            header = {constants.kmd_auth_header: self.kmd_token}
+
+        if requrl not in constants.unversioned_paths:
+            requrl = kmd.api_version_path_prefix + requrl
+        if params:
+            requrl = requrl + "?" + parse.urlencode(params)
+        if data:
+            data = json.dumps(data, indent=2).encode("utf-8")
+
+        resp = self.session.request(method, self.kmd_address + requrl, headers=header, data=data)
+
+        if resp.status_code >= 400:
+            try:
+                message = resp.json()["message"]
+            except Exception:
+                message = resp.text
+            raise error.KMDHTTPError(message)
+        return json.loads(resp.content.decode("utf-8"))
+
+
+class ClientRegistry:
+    """
+    Process-wide registry of algod and KMD clients.
+
+    One client is built per (address, token) pair and handed out to every caller,
+    including concurrent Flask worker threads. All clients of the registry share a
+    keep-alive requests.Session whose connection pool is sized by `pool_size`.
+
+    Endpoints and tokens default to the ALGOD_ADDRESS, ALGOD_TOKEN, KMD_ADDRESS and
+    KMD_TOKEN environment variables, falling back to the sandbox values.
+    """
+
+    def __init__(self, pool_size: Optional[int] = None):
+        self.pool_size = pool_size or int(os.getenv("ALGORAND_POOL_SIZE", "10"))
+        self._lock = threading.Lock()
+        self._clients: Dict[Tuple[str, str, str], object] = {}
+        self._session: Optional[requests.Session] = None
+        self.clients_created = 0
+        self.clients_reused = 0
+
+    def _get_session(self) -> requests.Session:
+        # Caller holds self._lock
+        if self._session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size, pool_block=False)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self._session = session
+        return self._session
+
+    def _get_client(self, kind: str, address: str, token: str, factory):
+        key = (kind, address, token)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self.clients_reused += 1
+                return client
+
+            client = factory(token, address, self._get_session())
+            self._clients[key] = client
+            self.clients_created += 1
+
+        logging.info(f"Connected to {kind} client at {address} successfully.")
+        return client
+
+    def algod(self, address: Optional[str] = None, token: Optional[str] = None) -> algod.AlgodClient:
+        """
+        Returns the shared algod client for the given (or configured) endpoint.
+        """
+        address = address or os.getenv("ALGOD_ADDRESS", DEFAULT_ALGOD_ADDRESS)
+        token = token if token is not None else os.getenv("ALGOD_TOKEN", DEFAULT_SANDBOX_TOKEN)
+        return self._get_client("algod", address, token, PooledAlgodClient)
+
+    def kmd(self, address: Optional[str] = None, token: Optional[str] = None) -> kmd.KMDClient:
+        """
+        Returns the shared KMD client for the given (or configured) endpoint.
+        """
+        address = address or os.getenv("KMD_ADDRESS", DEFAULT_KMD_ADDRESS)
+        token = token if token is not None else os.getenv("KMD_TOKEN", DEFAULT_SANDBOX_TOKEN)
+        return self._get_client("kmd", address, token, PooledKMDClient)
+
+    def connection_stats(self) -> Dict[str, int]:
+        """
+        Returns how many clients and HTTP connections were opened and reused.
+
+        Connection counts are read from the urllib3 pools of the shared session:
+        every request that did not need a new connection counts as a reuse.
+        """
+        opened = 0
+        requests_sent = 0
+        with self._lock:
+            if self._session is not None:
+                for adapter in {id(a): a for a in self._session.adapters.values()}.values():
+                    pools = adapter.poolmanager.pools
+                    for key in list(pools.keys()):
+                        pool = pools.get(key)
+                        if pool is None:
+                            continue
+                        opened += pool.num_connections
+                        requests_sent += pool.num_requests
+
+            return {
+                "clients_created": self.clients_created,
+                "clients_reused": self.clients_reused,
+                "connections_opened": opened,
+                "connections_reused": max(requests_sent - opened, 0),
+            }
+
+    def close(self):
+        """
+        Drops all clients and closes the pooled connections.
+        """
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+            self._session = None
+            self._clients.clear()
+
+
+registry = ClientRegistry()
@@ -0,0 +1,108 @@
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from certificate_utils import (
+    DEFAULT_BACKGROUND_URL, DEFAULT_LOGO_PATH, CertificateTemplate, encode_certificate, get_certificate_template
+)
+
+# (username, title, issued_date, week_number)
+CertificateRecord = Tuple[str, str, str, int]
+
+# Template of the current worker process, installed once by _init_worker
+_worker_template: Optional[CertificateTemplate] = None
+
+
+def _init_worker(template: CertificateTemplate):
+    global _worker_template
+    _worker_template = template
+
+
+def _render_chunk(records: Sequence[CertificateRecord]) -> List[bytes]:
+    return [
+        encode_certificate(_worker_template.render(username, title, issued_date))
+        for username, title, issued_date, _ in records
+    ]
+
+
+class CohortRenderer:
+    """
+    Renders the certificates of a whole cohort across a pool of worker processes.
+
+    The compiled template is sent to each worker once, when the worker starts;
+    tasks only carry the per-certificate fields. Workers are restarted when the
+    compiled template changes, e.g. after the background was updated. Records are rendered in chunks
+    of `chunk_size` and at most `max_in_flight` chunks are pending at a time, so
+    memory stays bounded however large the cohort is. Results keep input order.
+    """
+
+    def __init__(self, image_url: str = DEFAULT_BACKGROUND_URL, academy_logo_path: str = DEFAULT_LOGO_PATH,
+                 max_workers: Optional[int] = None, chunk_size: Optional[int] = None, max_in_flight: Optional[int] = None):
+        self.image_url = image_url
+        self.academy_logo_path = academy_logo_path
+        self.max_workers = max_workers or int(os.getenv("RENDER_WORKERS", str(os.cpu_count() or 1)))
+        self.chunk_size = chunk_size or int(os.getenv("RENDER_CHUNK_SIZE", "8"))
+        self.max_in_flight = max_in_flight or self.max_workers * 2
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._template: Optional[CertificateTemplate] = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        template = get_certificate_template(self.image_url, self.academy_logo_path)
+        with self._lock:
+            if self._executor is not None and self._template is template:
+                return self._executor
+            if self._executor is not None:
+                # Chunks already submitted finish on the old workers
+                self._executor.shutdown(wait=False)
+            self._template = template
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                # The API process runs background threads, so do not fork it
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(template,)
+            )
+            return self._executor
+
+    def iter_render(self, records: Iterable[CertificateRecord]) -> Iterator[bytes]:
+        """
+        Yields the PNG encoding of each record's certificate, in input order.
+        """
+        executor = self._pool()
+        records = iter(records)
+        pending = deque()
+        while True:
+            chunk = list(islice(records, self.chunk_size))
+            if not chunk:
+                break
+            try:
+                pending.append(executor.submit(_render_chunk, chunk))
+            except RuntimeError:
+                # The pool was replaced for a newer template meanwhile
+                executor = self._pool()
+                pending.append(executor.submit(_render_chunk, chunk))
+            if len(pending) >= self.max_in_flight:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+    def render(self, records: Iterable[CertificateRecord]) -> List[bytes]:
+        """
+        Returns the PNG encoding of each record's certificate, in input order.
+        """
+        return list(self.iter_render(records))
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+                self._template = None
+
+
+cohort_renderer = CohortRenderer()
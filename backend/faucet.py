@@ -0,0 +1,146 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+from algosdk import error, transaction
+
+from account_cache import AccountInfoCache, account_cache as shared_account_cache
+from client_registry import ClientRegistry, registry as client_registry
+from params_cache import SuggestedParamsCache, params_cache as shared_params_cache
+from wallet_sessions import WalletSessionCache, wallet_sessions as shared_wallet_sessions
+
+
+class Faucet:
+    """
+    Queue of account-funding requests paid out from the dispenser account.
+
+    Requests are flushed by a background thread as atomic groups of up to
+    `max_group` payments. A flush happens as soon as a group is full, or
+    `flush_interval` seconds after the first queued request. The dispenser
+    (first account of the default KMD wallet) and its key are loaded once.
+    """
+
+    def __init__(self, clients: ClientRegistry = None, params: SuggestedParamsCache = None,
+                 wallets: WalletSessionCache = None, wallet_name: str = "unencrypted-default-wallet",
+                 wallet_password: str = "", max_group: int = 16, flush_interval: Optional[float] = None,
+                 amount: int = 1000000, accounts: AccountInfoCache = None):
+        self.clients = clients or client_registry
+        self.accounts = accounts or shared_account_cache
+        self.params = params or shared_params_cache
+        self.wallets = wallets or shared_wallet_sessions
+        self.wallet_name = wallet_name
+        self.wallet_password = wallet_password
+        self.max_group = max_group
+        self.flush_interval = flush_interval if flush_interval is not None else float(os.getenv("FAUCET_FLUSH_INTERVAL", "0.5"))
+        self.amount = amount
+        self._cond = threading.Condition()
+        self._queue: List[Tuple[str, int, Future]] = []
+        self._thread: Optional[threading.Thread] = None
+        self._dispenser: Optional[Tuple[str, bytes]] = None
+        self._dispenser_lock = threading.Lock()
+        self.flushes = 0
+        self.funded = 0
+        self.failed = 0
+        self.last_flush_latency = 0.0
+        self.total_flush_latency = 0.0
+
+    def dispenser(self) -> Tuple[str, bytes]:
+        """
+        Returns the dispenser address and private key, exporting them from KMD once.
+        """
+        with self._dispenser_lock:
+            if self._dispenser is None:
+                wallet = self.wallets.get_wallet(self.wallet_name, self.wallet_password)
+                address = wallet.list_keys()[0]
+                self._dispenser = (address, wallet.export_key(address))
+            return self._dispenser
+
+    def request_funding(self, receiver_address: str, amount: Optional[int] = None) -> Future:
+        """
+        Queues a payment to the given address.
+
+        Returns: a future resolving to the txid of the payment once its group is sent
+        """
+        future = Future()
+        with self._cond:
+            self._queue.append((receiver_address, amount or self.amount, future))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="faucet", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return future
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                # Give concurrent registrations a moment to join the group
+                deadline = time.monotonic() + self.flush_interval
+                while len(self._queue) < self.max_group and time.monotonic() < deadline:
+                    self._cond.wait(deadline - time.monotonic())
+                batch = self._queue[:self.max_group]
+                del self._queue[:self.max_group]
+            self._flush(batch)
+
+    def _flush(self, batch: List[Tuple[str, int, Future]]):
+        started_at = time.perf_counter()
+        try:
+            sender_address, sender_private_key = self.dispenser()
+            algod_client = self.clients.algod()
+
+            # One payment per receiver, even if it was queued twice
+            amounts: Dict[str, int] = {}
+            for receiver_address, amount, _ in batch:
+                amounts[receiver_address] = max(amount, amounts.get(receiver_address, 0))
+
+            def sign_and_send(sp):
+                txns = [
+                    transaction.PaymentTxn(sender=sender_address, receiver=receiver_address, amt=amount, sp=sp)
+                    for receiver_address, amount in amounts.items()
+                ]
+                if len(txns) > 1:
+                    txns = transaction.assign_group_id(txns)
+                signed_txns = [txn.sign(sender_private_key) for txn in txns]
+                self.accounts.invalidate(sender_address, *amounts)
+                algod_client.send_transactions(signed_txns)
+                return {txn.receiver: signed_txn.get_txid() for txn, signed_txn in zip(txns, signed_txns)}
+
+            try:
+                txids = sign_and_send(self.params.get(algod_client))
+            except error.AlgodHTTPError as e:
+                logging.warning(f"Funding group rejected, retrying with fresh params: {e}")
+                self.params.invalidate()
+                txids = sign_and_send(self.params.get(algod_client))
+
+            for receiver_address, _, future in batch:
+                future.set_result(txids[receiver_address])
+            self.funded += len(txids)
+            logging.info(f"Funded {len(txids)} accounts in one group")
+        except Exception as e:
+            logging.error(f"Funding group failed: {e}")
+            self.failed += len(batch)
+            for _, _, future in batch:
+                future.set_exception(e)
+        finally:
+            self.last_flush_latency = time.perf_counter() - started_at
+            self.total_flush_latency += self.last_flush_latency
+            self.flushes += 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._cond:
+            queue_depth = len(self._queue)
+        return {
+            "queue_depth": queue_depth,
+            "flushes": self.flushes,
+            "funded": self.funded,
+            "failed": self.failed,
+            "last_flush_ms": self.last_flush_latency * 1000,
+            "avg_flush_ms": (self.total_flush_latency / self.flushes * 1000) if self.flushes else 0.0,
+        }
+
+
+faucet = Faucet()
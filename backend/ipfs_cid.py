@@ -0,0 +1,116 @@
+import base64
+import hashlib
+from typing import List, Tuple
+
+# Defaults of `ipfs add`, which the pinning service uses: fixed-size 256 KiB chunks
+# arranged in a balanced DAG of at most 174 links per node
+CHUNK_SIZE = 262144
+MAX_LINKS = 174
+
+_SHA2_256 = b"\x12\x20"
+_DAG_PB = 0x70
+_RAW = 0x55
+_UNIXFS_FILE = 2
+_BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _field(number: int, payload: bytes) -> bytes:
+    # Length-delimited protobuf field
+    return _varint(number << 3 | 2) + _varint(len(payload)) + payload
+
+
+def _uint_field(number: int, value: int) -> bytes:
+    return _varint(number << 3) + _varint(value)
+
+
+def _unixfs_file(data: bytes, filesize: int, blocksizes: List[int] = ()) -> bytes:
+    message = _uint_field(1, _UNIXFS_FILE)
+    if data:
+        message += _field(2, data)
+    message += _uint_field(3, filesize)
+    for blocksize in blocksizes:
+        message += _uint_field(4, blocksize)
+    return message
+
+
+def _dag_pb_node(links: List[Tuple[bytes, int]], data: bytes) -> bytes:
+    # Links are serialized before Data, each with an empty name, like go-merkledag does
+    node = b"".join(
+        _field(2, _field(1, cid) + _field(2, b"") + _uint_field(3, tsize)) for cid, tsize in links
+    )
+    return node + _field(1, data)
+
+
+def _cid_bytes(block: bytes, version: int, codec: int) -> bytes:
+    multihash = _SHA2_256 + hashlib.sha256(block).digest()
+    if version == 0:
+        return multihash
+    return _varint(1) + _varint(codec) + multihash
+
+
+def _base58(data: bytes) -> str:
+    number = int.from_bytes(data, "big")
+    encoded = ""
+    while number:
+        number, remainder = divmod(number, 58)
+        encoded = _BASE58_ALPHABET[remainder] + encoded
+    leading_zeros = len(data) - len(data.lstrip(b"\0"))
+    return "1" * leading_zeros + encoded
+
+
+def cid_to_string(cid: bytes) -> str:
+    """
+    Formats a binary CID: base58btc for CIDv0 ("Qm..."), multibase base32 for CIDv1 ("b...").
+    """
+    if cid.startswith(_SHA2_256):
+        return _base58(cid)
+    return "b" + base64.b32encode(cid).decode("ascii").lower().rstrip("=")
+
+
+def compute_cid(content: bytes, version: int = 0, chunk_size: int = CHUNK_SIZE, max_links: int = MAX_LINKS) -> str:
+    """
+    Computes the CID `ipfs add` assigns to a file, without uploading it.
+
+    CIDv0 stores chunks as UnixFS leaf nodes; CIDv1 stores them as raw blocks
+    (`--cid-version=1` implies raw leaves). Internal nodes list their children's
+    file sizes, and links carry the cumulative size of the child's subtree.
+
+    Returns: the CID in its canonical string form
+    """
+    chunks = [content[i:i + chunk_size] for i in range(0, len(content), chunk_size)] or [b""]
+
+    # Each entry is (cid bytes, cumulative block size, file bytes covered)
+    nodes = []
+    for chunk in chunks:
+        if version == 0:
+            block = _dag_pb_node([], _unixfs_file(chunk, len(chunk)))
+            nodes.append((_cid_bytes(block, 0, _DAG_PB), len(block), len(chunk)))
+        else:
+            nodes.append((_cid_bytes(chunk, 1, _RAW), len(chunk), len(chunk)))
+
+    while len(nodes) > 1:
+        parents = []
+        for i in range(0, len(nodes), max_links):
+            children = nodes[i:i + max_links]
+            filesize = sum(size for _, _, size in children)
+            block = _dag_pb_node(
+                [(cid, tsize) for cid, tsize, _ in children],
+                _unixfs_file(b"", filesize, [size for _, _, size in children])
+            )
+            tsize = len(block) + sum(tsize for _, tsize, _ in children)
+            parents.append((_cid_bytes(block, version, _DAG_PB), tsize, filesize))
+        nodes = parents
+
+    return cid_to_string(nodes[0][0])
@@ -0,0 +1,166 @@
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from algorand_utils import Algorand
+from certificate_utils import render_certificate, submit_certificate
+from models import db, Certificate, Challenge, IssuanceJob, JobStatus, User
+
+# Jobs in these states are still being worked on
+ACTIVE_STATUSES = (JobStatus.QUEUED, JobStatus.RENDERING, JobStatus.MINTING, JobStatus.CONFIRMING)
+
+
+class IssuancePipeline:
+    """
+    Background certificate issuance, one job per certificate.
+
+    A job row is inserted by the API and then moves through the stages
+    render -> pin -> mint -> persist, each on its own worker pool so a slow
+    stage does not hold back the others:
+    - render: draws and encodes the certificate (`render_workers`)
+    - pin: uploads it through the pin uploader's own pool; the CID is known
+      locally, so minting starts without waiting for the upload
+    - mint: submits the asset creation (`mint_workers`); the confirmation
+      tracker reports back when the round confirms it
+    - persist: checks the upload and inserts the certificate (`persist_workers`)
+    Progress and failures are stored on the job row for polling.
+
+    The issuer's signing key is only held in memory, so jobs interrupted by a
+    restart cannot be resumed; `recover` marks them failed.
+    """
+
+    def __init__(self, algorand: Algorand = None, render_workers: int = None, mint_workers: int = None,
+                 persist_workers: int = None):
+        self.algorand = algorand or Algorand()
+        self.render_executor = ThreadPoolExecutor(
+            max_workers=render_workers or int(os.getenv("ISSUANCE_RENDER_WORKERS", str(os.cpu_count() or 1))),
+            thread_name_prefix="issuance-render"
+        )
+        self.mint_executor = ThreadPoolExecutor(
+            max_workers=mint_workers or int(os.getenv("ISSUANCE_MINT_WORKERS", "4")),
+            thread_name_prefix="issuance-mint"
+        )
+        self.persist_executor = ThreadPoolExecutor(
+            max_workers=persist_workers or int(os.getenv("ISSUANCE_PERSIST_WORKERS", "2")),
+            thread_name_prefix="issuance-persist"
+        )
+
+    def submit(self, app, job_id, sender_address, sender_private_key):
+        """
+        Schedules a queued job, signing its asset creation with the given key.
+        """
+        return self.render_executor.submit(self._render, app, job_id, sender_address, sender_private_key)
+
+    def recover(self, app):
+        """
+        Marks jobs left unfinished by a previous run as failed.
+
+        Returns: the number of jobs marked
+        """
+        with app.app_context():
+            interrupted = IssuanceJob.query.filter(IssuanceJob.status.in_(ACTIVE_STATUSES)).all()
+            for job in interrupted:
+                job.status = JobStatus.FAILED
+                job.error = "Interrupted by a server restart"
+            db.session.commit()
+            if interrupted:
+                logging.warning(f"Marked {len(interrupted)} interrupted issuance jobs as failed")
+            return len(interrupted)
+
+    def _fail(self, job, message):
+        logging.error(f"Issuance job {job.id} failed: {message}")
+        try:
+            job.status = JobStatus.FAILED
+            job.error = message
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logging.error(f"Marking issuance job {job.id} as failed did not persist: {e}")
+
+    def _render(self, app, job_id, sender_address, sender_private_key):
+        with app.app_context():
+            job = IssuanceJob.query.get(job_id)
+            if job is None:
+                return
+            try:
+                job.status = JobStatus.RENDERING
+                db.session.commit()
+
+                username = User.query.get(job.user_id).username
+                week_number = Challenge.query.get(job.challenge_id).week_number
+                certificate_bytes = render_certificate(username, job.title, job.created_at.strftime("%B %d, %Y"))
+
+                job.ipfs_hash, upload = submit_certificate(username, week_number, certificate_bytes)
+                job.status = JobStatus.MINTING
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                self._fail(job, f"Rendering certificate failed: {e}")
+                return
+
+        self.mint_executor.submit(self._mint, app, job_id, sender_address, sender_private_key, upload)
+
+    def _mint(self, app, job_id, sender_address, sender_private_key, upload):
+        with app.app_context():
+            job = IssuanceJob.query.get(job_id)
+            txid = self.algorand.create_asset(
+                sender_address=sender_address,
+                sender_private_key=sender_private_key,
+                asset_url=job.ipfs_hash,
+                asset_name=job.title,
+                wait=False,
+                on_confirmed=lambda info: self.persist_executor.submit(self._persist, app, job_id, info, upload),
+                on_failed=lambda record: self.persist_executor.submit(self._mint_failed, app, job_id, record)
+            )
+            if txid is None:
+                self._fail(job, "Error creating certificate asset")
+                return
+
+            try:
+                IssuanceJob.query.filter_by(id=job_id).update({"txid": txid})
+                # The confirmation may already have been persisted by now
+                IssuanceJob.query.filter_by(id=job_id, status=JobStatus.MINTING).update({"status": JobStatus.CONFIRMING})
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                self._fail(job, f"Recording asset creation {txid} failed: {e}")
+
+    def _mint_failed(self, app, job_id, record):
+        with app.app_context():
+            job = IssuanceJob.query.get(job_id)
+            self._fail(job, f"Asset creation was not confirmed: {record.get('error') or record.get('status')}")
+
+    def _persist(self, app, job_id, info, upload):
+        with app.app_context():
+            job = IssuanceJob.query.get(job_id)
+            try:
+                # Recorded before anything else, so a job failing below still shows its asset
+                job.nft_id = info["asset-index"]
+                db.session.commit()
+
+                if upload.result() is None:
+                    self._fail(job, f"Error uploading certificate, asset {job.nft_id} points at unpinned content")
+                    return
+
+                certificate = Certificate(
+                    title=job.title,
+                    score=job.score,
+                    staff_id=job.staff_id,
+                    user_id=job.user_id,
+                    challenge_id=job.challenge_id,
+                    ipfs_hash=job.ipfs_hash,
+                    nft_id=info["asset-index"]
+                )
+                db.session.add(certificate)
+                db.session.flush()
+
+                job.certificate_id = certificate.id
+                job.status = JobStatus.COMPLETED
+                db.session.commit()
+                logging.info(f"Issuance job {job_id} completed as certificate {certificate.id}")
+            except Exception as e:
+                db.session.rollback()
+                self._fail(job, f"Saving certificate of asset {info['asset-index']} failed: {e}")
+
+
+issuance_pipeline = IssuancePipeline()
@@ -0,0 +1,155 @@
+import logging
+from datetime import datetime
+
+from sqlalchemy import BigInteger, Column, DateTime, Integer, MetaData, String, Table, inspect, select
+from sqlalchemy.schema import CreateTable
+
+from models import db, Certificate, Challenge, IssuanceJob, User
+
+# Arbitrary key of the Postgres advisory lock held while migrating, so app
+# processes starting together do not run the same migration twice
+MIGRATION_LOCK_KEY = 7232041
+
+_metadata = MetaData()
+schema_version = Table(
+    'schema_version', _metadata,
+    Column('version', Integer, primary_key=True),
+    Column('name', String(255), nullable=False),
+    Column('applied_at', DateTime, default=datetime.utcnow),
+)
+
+
+def _columns(connection, table_name):
+    return {column['name']: column for column in inspect(connection).get_columns(table_name)}
+
+
+def _rebuild_sqlite_table(connection, table):
+    # SQLite cannot change a column's type or nullability in place: copy the rows
+    # into a table created from the model, whose column affinities convert them
+    create_sql = str(CreateTable(table).compile(connection)).replace(
+        f'CREATE TABLE {table.name} ', f'CREATE TABLE {table.name}_new ', 1
+    )
+    connection.exec_driver_sql(create_sql)
+    columns = ', '.join(f'"{name}"' for name in _columns(connection, table.name) if name in table.columns)
+    connection.exec_driver_sql(f'INSERT INTO {table.name}_new ({columns}) SELECT {columns} FROM {table.name}')
+    connection.exec_driver_sql(f'DROP TABLE {table.name}')
+    connection.exec_driver_sql(f'ALTER TABLE {table.name}_new RENAME TO {table.name}')
+    for index in table.indexes:
+        index.create(connection, checkfirst=True)
+
+
+def create_tables(connection):
+    """
+    Creates the tables missing from the database, with their current definition.
+    """
+    db.metadata.create_all(connection)
+
+
+def _add_columns(connection, columns):
+    # Adds the model columns, given as (model, column name), missing from their tables
+    for model, name in columns:
+        table = model.__table__
+        if name in _columns(connection, table.name):
+            continue
+        column = table.columns[name]
+        if hasattr(column.type, 'create'):
+            # Postgres enum types exist apart from the table
+            column.type.create(connection, checkfirst=True)
+        column_type = column.type.compile(connection.dialect)
+        connection.exec_driver_sql(f'ALTER TABLE "{table.name}" ADD COLUMN {name} {column_type}')
+
+
+def add_wallet_and_delivery_columns(connection):
+    """
+    Adds the columns introduced with background wallet provisioning and atomic
+    delivery to tables created before them, and makes account addresses and
+    asset ids nullable, since both are now set after the row is inserted.
+    """
+    _add_columns(connection, ((User, 'wallet_name'), (User, 'wallet_status'), (Certificate, 'delivery_group')))
+
+    if connection.dialect.name == 'postgresql':
+        connection.exec_driver_sql('ALTER TABLE "user" ALTER COLUMN account_address DROP NOT NULL')
+        connection.exec_driver_sql('ALTER TABLE certificate ALTER COLUMN nft_id DROP NOT NULL')
+    elif not _columns(connection, 'user')['account_address']['nullable']:
+        _rebuild_sqlite_table(connection, User.__table__)
+    # Users registered before background provisioning already have their wallet
+    connection.exec_driver_sql("UPDATE \"user\" SET wallet_status = 'READY' WHERE wallet_status IS NULL")
+
+
+def add_query_indexes_and_integer_asset_ids(connection):
+    """
+    Stores certificate asset ids as integers, like the ASA ids they are, and adds
+    the indexes behind the certificate and challenge listings.
+    """
+    nft_id = _columns(connection, 'certificate')['nft_id']
+    if not isinstance(nft_id['type'], (Integer, BigInteger)):
+        if connection.dialect.name == 'postgresql':
+            connection.exec_driver_sql(
+                'ALTER TABLE certificate ALTER COLUMN nft_id TYPE BIGINT USING nft_id::bigint'
+            )
+        else:
+            _rebuild_sqlite_table(connection, Certificate.__table__)
+
+    for table in (Certificate.__table__, Challenge.__table__):
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
+def add_certificate_mint_columns(connection):
+    """
+    Adds the txid and last valid round of asset creations submitted without
+    waiting, which `flask recover-jobs` uses to settle certificates left unminted.
+    """
+    _add_columns(connection, ((Certificate, 'mint_txid'), (Certificate, 'mint_last_valid')))
+
+
+def add_issuance_job_asset_ids(connection):
+    """
+    Adds the asset id of issuance jobs, recorded as soon as their asset creation
+    is confirmed so a job failing afterwards still shows which asset it minted.
+    """
+    _add_columns(connection, ((IssuanceJob, 'nft_id'),))
+
+
+# Applied in order, each at most once; append new migrations at the end
+MIGRATIONS = [
+    (1, 'create tables', create_tables),
+    (2, 'wallet and delivery columns', add_wallet_and_delivery_columns),
+    (3, 'query indexes and integer asset ids', add_query_indexes_and_integer_asset_ids),
+    (4, 'certificate mint columns', add_certificate_mint_columns),
+    (5, 'issuance job asset ids', add_issuance_job_asset_ids),
+]
+
+
+def current_version(connection) -> int:
+    if not inspect(connection).has_table('schema_version'):
+        return 0
+    versions = connection.execute(select(schema_version.c.version)).scalars().all()
+    return max(versions, default=0)
+
+
+def migrate(engine=None) -> list:
+    """
+    Brings the database schema up to date.
+
+    A database created by db.create_all() before migrations existed is
+    recognised by its tables and upgraded in place.
+
+    Returns: the names of the migrations applied
+    """
+    engine = engine or db.engine
+    applied = []
+    with engine.begin() as connection:
+        if connection.dialect.name == 'postgresql':
+            connection.exec_driver_sql(f'SELECT pg_advisory_xact_lock({MIGRATION_LOCK_KEY})')
+        _metadata.create_all(connection)
+
+        version = current_version(connection)
+        for number, name, migration in MIGRATIONS:
+            if number <= version:
+                continue
+            logging.info(f"Applying schema migration {number}: {name}")
+            migration(connection)
+            connection.execute(schema_version.insert().values(version=number, name=name))
+            applied.append(name)
+    return applied
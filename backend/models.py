@@ -14,32 +14,83 @@ class ApprovalStatus(Enum):
     DENIED = 'Denied'
     NO_REQUEST = 'NoRequest'
 
+class WalletStatus(Enum):
+    PENDING = 'Pending'
+    READY = 'Ready'
+    FAILED = 'Failed'
+
+class JobStatus(Enum):
+    QUEUED = 'Queued'
+    RENDERING = 'Rendering'
+    MINTING = 'Minting'
+    CONFIRMING = 'Confirming'
+    COMPLETED = 'Completed'
+    FAILED = 'Failed'
+
 
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(50), unique=True, nullable=False)
     password_hash = db.Column(db.String(255), nullable=False)
     role = db.Column(db.Enum(UserRole), nullable=False)
-    account_address = db.Column(db.String(255), nullable=False)
+    account_address = db.Column(db.String(255), nullable=True)  # Set once the wallet is provisioned
+    wallet_name = db.Column(db.String(100), nullable=True)  # KMD wallet name, the username unless it collided
+    wallet_status = db.Column(db.Enum(WalletStatus), default=WalletStatus.READY)
     certificates = db.relationship('Certificate', backref='user', lazy=True, foreign_keys='Certificate.user_id')
 
+    @property
+    def kmd_wallet_name(self):
+        return self.wallet_name or self.username
+
 
 class Certificate(db.Model):
+    __table_args__ = (
+        # Issuer listings and pending approvals, newest first
+        db.Index('ix_certificate_staff_id_is_approved_issued_date', 'staff_id', 'is_approved', 'issued_date'),
+        # Trainee listings
+        db.Index('ix_certificate_user_id_issued_date', 'user_id', 'issued_date'),
+        # Challenge certificate counts and id lists
+        db.Index('ix_certificate_challenge_id', 'challenge_id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
     score = db.Column(db.Integer, nullable=False)
     issued_date = db.Column(db.DateTime, default=datetime.utcnow)
     staff_id = db.Column(db.Integer, db.ForeignKey('user.id'))  # Staff member who approves/denies the request
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    nft_id = db.Column(db.String(255), unique=True, nullable=False)  # Assuming you have an NFT identifier
+    nft_id = db.Column(db.BigInteger, unique=True, nullable=True)  # Set once the asset creation is confirmed
     challenge_id = db.Column(db.Integer, db.ForeignKey('challenge.id'), nullable=False)
     is_approved = db.Column(db.Enum(ApprovalStatus), default=ApprovalStatus.NO_REQUEST)
     ipfs_hash = db.Column(db.String(255), nullable=False)
+    delivery_group = db.Column(db.Text, nullable=True)  # Trainee-signed opt-in + transfer group awaiting the issuer
+    mint_txid = db.Column(db.String(255), nullable=True)  # Asset creation submitted without waiting for it
+    mint_last_valid = db.Column(db.BigInteger, nullable=True)  # Last round that asset creation can confirm in
 
 class Challenge(db.Model):
+    __table_args__ = (
+        db.Index('ix_challenge_batch_number_week_number', 'batch_number', 'week_number'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
     description = db.Column(db.String(255), nullable=False)
     week_number = db.Column(db.Integer, nullable=False)
     batch_number = db.Column(db.Integer, nullable=False)
-    certificates = db.relationship('Certificate', backref='challenge', lazy=True)
\ No newline at end of file
+    certificates = db.relationship('Certificate', backref='challenge', lazy=True)
+
+class IssuanceJob(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    staff_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)  # Issuer who queued the job
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    challenge_id = db.Column(db.Integer, db.ForeignKey('challenge.id'), nullable=False)
+    title = db.Column(db.String(100), nullable=False)
+    score = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.Enum(JobStatus), default=JobStatus.QUEUED, nullable=False)
+    ipfs_hash = db.Column(db.String(255), nullable=True)  # Set once the certificate is rendered
+    txid = db.Column(db.String(255), nullable=True)  # Set once the asset creation is submitted
+    nft_id = db.Column(db.BigInteger, nullable=True)  # Set once the asset creation is confirmed
+    certificate_id = db.Column(db.Integer, db.ForeignKey('certificate.id'), nullable=True)  # Set once completed
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
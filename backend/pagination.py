@@ -0,0 +1,114 @@
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+class QueryParameterError(ValueError):
+    """
+    Invalid paging, filter or projection parameter, answered with 400.
+    """
+
+
+def parse_limit(args, default: int = DEFAULT_PAGE_SIZE) -> int:
+    try:
+        limit = int(args.get('limit', default))
+    except ValueError:
+        raise QueryParameterError("limit must be an integer")
+    if limit < 1:
+        raise QueryParameterError("limit must be positive")
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def parse_int(args, name: str) -> Optional[int]:
+    value = args.get(name)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise QueryParameterError(f"{name} must be an integer")
+
+
+def parse_datetime(args, name: str) -> Optional[datetime]:
+    value = args.get(name)
+    if value is None:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise QueryParameterError(f"{name} must be an ISO 8601 date")
+
+
+def parse_fields(args, allowed) -> Optional[List[str]]:
+    """
+    Returns the fields requested with ?fields=a,b, or None to return every field.
+    """
+    value = args.get('fields')
+    if not value:
+        return None
+    fields = [field for field in value.split(',') if field]
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise QueryParameterError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+def project(info: dict, fields: Optional[List[str]]) -> dict:
+    if fields is None:
+        return info
+    return {field: info[field] for field in fields}
+
+
+def encode_cursor(values: dict) -> str:
+    payload = {key: value.isoformat() if isinstance(value, datetime) else value for key, value in values.items()}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, columns) -> list:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        values = []
+        for column in columns:
+            value = payload[column.key]
+            if column.type.python_type is datetime:
+                value = datetime.fromisoformat(value)
+            values.append(value)
+        return values
+    except (ValueError, KeyError, TypeError):
+        raise QueryParameterError("Invalid cursor")
+
+
+def paginate(query, columns, args, descending: bool = False) -> Tuple[list, Optional[str]]:
+    """
+    Returns one page of a query with keyset pagination.
+
+    The rows are ordered by `columns` (which must end with a unique column), and
+    the page after a cursor only selects rows past the cursor's sort key, so a
+    page costs the same however deep into the results it is. The cursor of the
+    next page, or None on the last page, encodes the sort key of the last row.
+    """
+    limit = parse_limit(args)
+    cursor = args.get('cursor')
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        # Row-value comparison written out, (a, b) > (x, y), so every database can use the index
+        conditions = []
+        for i, (column, value) in enumerate(zip(columns, values)):
+            past = column < value if descending else column > value
+            conditions.append(and_(*[c == v for c, v in zip(columns[:i], values[:i])], past))
+        query = query.filter(or_(*conditions))
+
+    query = query.order_by(*[column.desc() if descending else column.asc() for column in columns])
+    rows = query.limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor({column.key: getattr(rows[-1], column.key) for column in columns})
+    return rows, next_cursor
@@ -0,0 +1,92 @@
+import copy
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from algosdk import transaction
+
+
+class SuggestedParamsCache:
+    """
+    Shared cache for algod suggested transaction params.
+
+    Params are fetched once and reused until either `ttl` seconds have passed or
+    the chain is estimated to have advanced `max_rounds` rounds since the fetch.
+    The estimate uses `round_time` seconds per round. Cached params are also never
+    handed out once the estimated round gets within `safety_rounds` of their
+    last-valid round, so every transaction built from them is inside its window.
+    """
+
+    def __init__(self, ttl: Optional[float] = None, max_rounds: Optional[int] = None,
+                 round_time: Optional[float] = None, safety_rounds: int = 10):
+        self.ttl = ttl if ttl is not None else float(os.getenv("PARAMS_CACHE_TTL", "10"))
+        self.max_rounds = max_rounds if max_rounds is not None else int(os.getenv("PARAMS_CACHE_MAX_ROUNDS", "3"))
+        self.round_time = round_time if round_time is not None else float(os.getenv("ALGORAND_ROUND_TIME", "3.3"))
+        self.safety_rounds = safety_rounds
+        self._lock = threading.Lock()
+        self._params: Optional[transaction.SuggestedParams] = None
+        self._fetched_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.forced_refreshes = 0
+
+    def _estimated_round(self, now: float) -> int:
+        # first-valid of freshly suggested params is the node's last round
+        rounds_passed = int((now - self._fetched_at) / self.round_time)
+        return self._params.first + rounds_passed
+
+    def _is_fresh(self, now: float) -> bool:
+        if self._params is None:
+            return False
+        if now - self._fetched_at >= self.ttl:
+            return False
+        estimated_round = self._estimated_round(now)
+        if estimated_round - self._params.first >= self.max_rounds:
+            return False
+        return estimated_round + self.safety_rounds < self._params.last
+
+    def get(self, algod_client) -> transaction.SuggestedParams:
+        """
+        Returns suggested params, fetching them from algod only when the cached
+        ones are stale.
+
+        Args:
+        - algod_client: the algod client used on a cache miss.
+
+        Returns:
+        - transaction.SuggestedParams: a copy the caller is free to modify.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if self._is_fresh(now):
+                self.hits += 1
+                return copy.copy(self._params)
+
+            self.misses += 1
+            self._params = algod_client.suggested_params()
+            self._fetched_at = time.monotonic()
+            logging.debug(f"Refreshed suggested params at round {self._params.first}")
+            return copy.copy(self._params)
+
+    def invalidate(self):
+        """
+        Forces the next `get` to fetch new params, e.g. after the node rejected a
+        transaction built from the cached ones.
+        """
+        with self._lock:
+            if self._params is not None:
+                self.forced_refreshes += 1
+            self._params = None
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "forced_refreshes": self.forced_refreshes,
+            }
+
+
+params_cache = SuggestedParamsCache()
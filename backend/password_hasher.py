@@ -0,0 +1,156 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Optional
+
+from flask_bcrypt import Bcrypt
+
+
+class HasherBusy(Exception):
+    """
+    Raised when more hashing work is queued than the hasher accepts; answer with 503.
+    """
+
+
+class PasswordHasher:
+    """
+    Bcrypt hashing and verification on a bounded pool of worker threads.
+
+    Hashes are made with `rounds` (the bcrypt cost). Work runs on `max_workers`
+    threads, since bcrypt releases the GIL while it computes, and at most
+    `max_queue` more calls may wait for a thread. Beyond that, calls fail
+    fast with HasherBusy instead of piling up behind a login storm.
+    """
+
+    def __init__(self, rounds: Optional[int] = None, max_workers: Optional[int] = None,
+                 max_queue: Optional[int] = None):
+        self.rounds = rounds or int(os.getenv("PASSWORD_HASH_ROUNDS", "12"))
+        self.max_workers = max_workers or int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+        self.max_queue = max_queue if max_queue is not None else int(os.getenv("PASSWORD_HASH_QUEUE", "64"))
+        self.bcrypt = Bcrypt()
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="password-hash")
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_queue)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.hashes = 0
+        self.verifications = 0
+        self.rejected = 0
+        self.rehashes = 0
+        self.total_hash_latency = 0.0
+        self.total_verify_latency = 0.0
+        self.total_wait = 0.0
+
+    def _submit(self, work, *args) -> Future:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HasherBusy("Too many password hashing requests queued")
+
+        queued_at = time.perf_counter()
+        with self._lock:
+            self._in_flight += 1
+
+        def run():
+            started_at = time.perf_counter()
+            try:
+                return work(*args), started_at - queued_at, time.perf_counter() - started_at
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+                self._slots.release()
+
+        return self.executor.submit(run)
+
+    def _hash(self, password: str) -> str:
+        return self.bcrypt.generate_password_hash(password, self.rounds).decode('utf-8')
+
+    def submit_hash(self, password: str) -> Future:
+        """
+        Queues hashing a password at the configured cost.
+
+        Returns: a future resolving to the hash
+        """
+        future = Future()
+
+        def record(done):
+            try:
+                password_hash, wait, latency = done.result()
+            except Exception as e:
+                future.set_exception(e)
+                return
+            with self._lock:
+                self.hashes += 1
+                self.total_wait += wait
+                self.total_hash_latency += latency
+            future.set_result(password_hash)
+
+        self._submit(self._hash, password).add_done_callback(record)
+        return future
+
+    def hash(self, password: str) -> str:
+        return self.submit_hash(password).result()
+
+    def verify(self, password_hash: str, password: str) -> bool:
+        """
+        Checks a password against a stored hash, whatever cost it was made with.
+        """
+        matches, wait, latency = self._submit(self.bcrypt.check_password_hash, password_hash, password).result()
+        with self._lock:
+            self.verifications += 1
+            self.total_wait += wait
+            self.total_verify_latency += latency
+        return matches
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        """
+        Whether a stored hash was made with a different cost than the configured one.
+        """
+        try:
+            # $2b$<cost>$<salt and hash>
+            return int(password_hash.split('$')[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+    def rehash(self, password: str, save) -> Optional[Future]:
+        """
+        Hashes a just-verified password again at the configured cost in the
+        background, passing the new hash to `save`. Skipped when the hasher is busy;
+        the next login will try again.
+        """
+        try:
+            future = self.submit_hash(password)
+        except HasherBusy:
+            return None
+
+        def store(done):
+            try:
+                save(done.result())
+                with self._lock:
+                    self.rehashes += 1
+            except Exception as e:
+                logging.error(f"Rehashing password failed: {e}")
+
+        future.add_done_callback(store)
+        return future
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            operations = self.hashes + self.verifications
+            return {
+                "rounds": self.rounds,
+                "workers": self.max_workers,
+                "in_flight": self._in_flight,
+                "queue_depth": max(0, self._in_flight - self.max_workers),
+                "hashes": self.hashes,
+                "verifications": self.verifications,
+                "rehashes": self.rehashes,
+                "rejected": self.rejected,
+                "avg_hash_ms": (self.total_hash_latency / self.hashes * 1000) if self.hashes else 0.0,
+                "avg_verify_ms": (self.total_verify_latency / self.verifications * 1000) if self.verifications else 0.0,
+                "avg_wait_ms": (self.total_wait / operations * 1000) if operations else 0.0,
+            }
+
+
+password_hasher = PasswordHasher()
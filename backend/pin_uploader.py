@@ -0,0 +1,243 @@
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from ipfs_cid import compute_cid
+
+
+DEFAULT_PIN_ENDPOINT = "https://api.pinata.cloud/pinning/pinFileToIPFS"
+
+# Responses worth retrying: rate limiting and server side failures
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class PinIndex:
+    """
+    Local record of the content already pinned, mapping the CID computed locally
+    to the hash the pinning service answered with, which is only recorded when
+    they agree. Entries are appended to a file so the index survives restarts.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv(
+            "PIN_INDEX_PATH", os.path.join(os.path.expanduser("~"), ".cache", "certificate_pins", "index.jsonl")
+        )
+        self._lock = threading.Lock()
+        self._entries: Dict[str, str] = {}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        self._entries[entry["cid"]] = entry["ipfs_hash"]
+                    except (ValueError, KeyError):
+                        # A torn last line from a crash, skip it
+                        continue
+        except OSError:
+            pass
+
+    def get(self, cid: str) -> Optional[str]:
+        with self._lock:
+            return self._entries.get(cid)
+
+    def add(self, cid: str, ipfs_hash: str):
+        with self._lock:
+            if self._entries.get(cid) == ipfs_hash:
+                return
+            self._entries[cid] = ipfs_hash
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(self.path, "a") as f:
+                    f.write(json.dumps({"cid": cid, "ipfs_hash": ipfs_hash}) + "\n")
+            except OSError as e:
+                logging.warning(f"Could not persist pin index entry: {e}")
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class PinUploader:
+    """
+    Uploads files to a Pinata-compatible pinning endpoint.
+
+    Uploads share one requests.Session, so connections to the endpoint are kept
+    alive, and run on a pool of `max_workers` threads. A 429 or 5xx response, or a
+    connection error, is retried up to `max_attempts` times with exponential
+    backoff (honouring Retry-After). The endpoint defaults to PINATA_ENDPOINT so a
+    local stand-in server can be used for tests and benchmarks.
+
+    `pin` computes the CID of the content up front and skips content already in
+    the pin index, so callers can use the CID before the upload finishes.
+    """
+
+    def __init__(self, endpoint: Optional[str] = None, jwt: Optional[str] = None, max_workers: Optional[int] = None,
+                 max_attempts: int = 4, backoff: float = 0.5, timeout: float = 30.0,
+                 cid_version: Optional[int] = None, index: Optional[PinIndex] = None):
+        self.endpoint = endpoint or os.getenv("PINATA_ENDPOINT", DEFAULT_PIN_ENDPOINT)
+        self.jwt = jwt
+        self.cid_version = cid_version if cid_version is not None else int(os.getenv("PIN_CID_VERSION", "0"))
+        self.index = index or PinIndex()
+        self.max_workers = max_workers or int(os.getenv("PIN_UPLOAD_WORKERS", "8"))
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="pin-upload")
+        self._lock = threading.Lock()
+        self.uploads = 0
+        self.failed = 0
+        self.retries = 0
+        self.bytes_uploaded = 0
+        self.deduplicated = 0
+        self.mismatched = 0
+        self.last_latency = 0.0
+        self.total_latency = 0.0
+        self._first_upload_at: Optional[float] = None
+
+    def _headers(self, name: str) -> Dict[str, str]:
+        # Read the token at request time so it may be loaded from .env after import
+        jwt = self.jwt or os.getenv("PINATA_JWT", "")
+        return {"pinataMetadata": name, "Authorization": "Bearer " + jwt}
+
+    def _retry_delay(self, attempt: int, response: Optional[requests.Response]) -> float:
+        delay = self.backoff * 2 ** (attempt - 1)
+        if response is not None and response.headers.get("Retry-After", "").isdigit():
+            delay = max(delay, float(response.headers["Retry-After"]))
+        return delay
+
+    def upload(self, filename: str, content: bytes, content_type: str = "image/png",
+               name: Optional[str] = None) -> Optional[str]:
+        """
+        Pins one file, retrying transient failures.
+
+        Returns: the IPFS hash of the file, or None if it could not be pinned
+        """
+        started_at = time.perf_counter()
+        with self._lock:
+            if self._first_upload_at is None:
+                self._first_upload_at = started_at
+
+        ipfs_hash = None
+        for attempt in range(1, self.max_attempts + 1):
+            response = None
+            try:
+                response = self.session.post(
+                    self.endpoint,
+                    files={"file": (filename, content, content_type)},
+                    data={"pinataOptions": json.dumps({"cidVersion": self.cid_version})},
+                    headers=self._headers(name or filename),
+                    timeout=self.timeout
+                )
+                if response.status_code == 200:
+                    ipfs_hash = response.json()["IpfsHash"]
+                    break
+                if response.status_code not in RETRY_STATUSES:
+                    logging.error(f"Pinning {filename} failed with {response.status_code}: {response.text}")
+                    break
+                logging.warning(f"Pinning {filename} answered {response.status_code} (attempt {attempt})")
+            except requests.exceptions.RequestException as e:
+                logging.warning(f"Pinning {filename} failed (attempt {attempt}): {e}")
+            except (ValueError, KeyError) as e:
+                logging.error(f"Unexpected pinning response for {filename}: {e}")
+                break
+
+            if attempt < self.max_attempts:
+                with self._lock:
+                    self.retries += 1
+                time.sleep(self._retry_delay(attempt, response))
+
+        latency = time.perf_counter() - started_at
+        with self._lock:
+            self.last_latency = latency
+            if ipfs_hash is None:
+                self.failed += 1
+            else:
+                self.uploads += 1
+                self.bytes_uploaded += len(content)
+                self.total_latency += latency
+        return ipfs_hash
+
+    def submit(self, filename: str, content: bytes, content_type: str = "image/png",
+               name: Optional[str] = None) -> Future:
+        """
+        Queues an upload on the worker pool.
+
+        Returns: a future resolving to the IPFS hash, or None if the file could not be pinned
+        """
+        return self.executor.submit(self.upload, filename, content, content_type, name)
+
+    def pin(self, filename: str, content: bytes, content_type: str = "image/png",
+            name: Optional[str] = None) -> Tuple[str, Future]:
+        """
+        Computes the CID of the content and queues its upload, unless it was pinned before.
+
+        Returns: the CID, and a future resolving to the pinned IPFS hash (None if pinning
+        failed or the service assigned a different CID)
+        """
+        cid = compute_cid(content, self.cid_version)
+        pinned_hash = self.index.get(cid)
+        if pinned_hash is not None:
+            with self._lock:
+                self.deduplicated += 1
+            future = Future()
+            future.set_result(pinned_hash)
+            return cid, future
+
+        def upload_and_record():
+            ipfs_hash = self.upload(filename, content, content_type, name)
+            if ipfs_hash is not None and ipfs_hash != cid:
+                # Assets are minted with the local CID, which may not resolve to
+                # what was pinned: report the pin as failed
+                logging.error(f"Pinned {filename} as {ipfs_hash}, but computed {cid} locally")
+                with self._lock:
+                    self.mismatched += 1
+                return None
+            if ipfs_hash is not None:
+                self.index.add(cid, ipfs_hash)
+            return ipfs_hash
+
+        return cid, self.executor.submit(upload_and_record)
+
+    def upload_many(self, files: Iterable[Tuple[str, bytes]]) -> List[Optional[str]]:
+        """
+        Pins (filename, content) pairs concurrently and returns their IPFS hashes in input order.
+        """
+        futures = [self.pin(filename, content)[1] for filename, content in files]
+        return [future.result() for future in futures]
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            elapsed = time.perf_counter() - self._first_upload_at if self._first_upload_at else 0.0
+            return {
+                "uploads": self.uploads,
+                "failed": self.failed,
+                "retries": self.retries,
+                "bytes": self.bytes_uploaded,
+                "deduplicated": self.deduplicated,
+                "mismatched": self.mismatched,
+                "indexed": len(self.index),
+                "last_latency_ms": self.last_latency * 1000,
+                "avg_latency_ms": (self.total_latency / self.uploads * 1000) if self.uploads else 0.0,
+                "uploads_per_s": (self.uploads / elapsed) if elapsed else 0.0,
+            }
+
+    def close(self):
+        self.executor.shutdown()
+        self.session.close()
+
+
+pin_uploader = PinUploader()
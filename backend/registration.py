@@ -0,0 +1,120 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from algorand_utils import Algorand
+from models import db, User, WalletStatus
+
+
+class RegistrationPipeline:
+    """
+    Background wallet provisioning for newly registered users.
+
+    register_user only inserts the user with a pending wallet; this pipeline then
+    creates the KMD wallet and account and queues the initial funding on a worker
+    pool. Failed attempts are retried with exponential backoff, up to `max_backoff`
+    seconds apart, and a KMD wallet that already uses the username gets the user
+    id appended to the wallet name. The outcome is stored on the user row
+    (wallet_status, wallet_name, account_address).
+
+    The password only lives in the queued job, so a user whose provisioning failed
+    or was lost in a restart is provisioned again on their next login, see `resume`.
+    """
+
+    def __init__(self, algorand: Algorand = None, max_workers: int = None, max_attempts: int = None,
+                 backoff: float = None, max_backoff: float = None):
+        self.algorand = algorand or Algorand()
+        self.max_attempts = max_attempts or int(os.getenv("REGISTRATION_MAX_ATTEMPTS", "8"))
+        self.backoff = backoff if backoff is not None else float(os.getenv("REGISTRATION_BACKOFF", "1"))
+        self.max_backoff = max_backoff if max_backoff is not None else float(os.getenv("REGISTRATION_MAX_BACKOFF", "30"))
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers or int(os.getenv("REGISTRATION_WORKERS", "4")),
+            thread_name_prefix="registration"
+        )
+        # Provisioning queued or running in this process, by user id
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def submit(self, app, user_id, password):
+        """
+        Schedules wallet provisioning for a user inserted with a pending wallet.
+        A user already being provisioned by this process shares the queued job.
+        """
+        with self._lock:
+            future = self._in_flight.get(user_id)
+            if future is not None:
+                return future
+            future = self.executor.submit(self._run, app, user_id, password)
+            self._in_flight[user_id] = future
+        # Outside the lock, the callback runs right away when the job is already done
+        future.add_done_callback(lambda _: self._forget(user_id))
+        return future
+
+    def _forget(self, user_id):
+        with self._lock:
+            self._in_flight.pop(user_id, None)
+
+    def resume(self, app, user, password):
+        """
+        Provisions again the wallet of a user whose provisioning failed or never
+        finished, with the password they just logged in with.
+
+        Returns: the provisioning future, None when the wallet is ready
+        """
+        if user.wallet_status == WalletStatus.READY:
+            return None
+        if user.wallet_status == WalletStatus.FAILED:
+            user.wallet_status = WalletStatus.PENDING
+            db.session.commit()
+        logging.info(f"Resuming wallet provisioning of {user.username}")
+        return self.submit(app, user.id, password)
+
+    def _wallet_name(self, user):
+        existing_names = {wallet["name"] for wallet in self.algorand.list_wallets()}
+        if user.username not in existing_names:
+            return user.username
+
+        wallet_name = f"{user.username}_{user.id}"
+        logging.warning(f"KMD wallet {user.username} already exists, using {wallet_name}")
+        return wallet_name
+
+    def _run(self, app, user_id, password):
+        with app.app_context():
+            user = User.query.get(user_id)
+            if user is None:
+                return None
+            if user.wallet_status == WalletStatus.READY:
+                return user.account_address
+
+            account_address = None
+            for attempt in range(1, self.max_attempts + 1):
+                try:
+                    if user.wallet_name is None:
+                        user.wallet_name = self._wallet_name(user)
+                        db.session.commit()
+
+                    account_address = self.algorand.create_user(user.wallet_name, password)
+                    if account_address:
+                        break
+                except Exception as e:
+                    db.session.rollback()
+                    logging.error(f"Provisioning wallet of {user.username} failed: {e}")
+
+                if attempt < self.max_attempts:
+                    logging.info(f"Retrying wallet provisioning of {user.username} (attempt {attempt + 1})")
+                    time.sleep(min(self.backoff * 2 ** (attempt - 1), self.max_backoff))
+
+            if account_address:
+                user.account_address = account_address
+                user.wallet_status = WalletStatus.READY
+            else:
+                user.wallet_status = WalletStatus.FAILED
+            db.session.commit()
+
+            logging.info(f"Registration of {user.username} finished with wallet status {user.wallet_status.value}")
+            return account_address
+
+
+registration_pipeline = RegistrationPipeline()
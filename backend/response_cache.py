@@ -0,0 +1,169 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Dict, Optional
+from urllib.parse import urlencode
+
+from flask import make_response, request
+
+
+class LRUCacheBackend:
+    """
+    In-process cache backend, holding at most `max_entries` entries and evicting
+    the least recently used. Counters are kept apart so they are never evicted.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._counters: Dict[str, int] = {}
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: float):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def counter(self, key: str) -> int:
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+
+class RedisCacheBackend:
+    """
+    Cache backend on a Redis-compatible server (Redis, Valkey, a local stand-in),
+    shared by every worker process. Needs the optional `redis` package.
+    """
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("RedisCacheBackend needs the redis package: pip install redis")
+        self.client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(key)
+
+    def set(self, key: str, value: bytes, ttl: float):
+        self.client.set(key, value, ex=max(1, int(ttl)))
+
+    def delete(self, key: str):
+        self.client.delete(key)
+
+    def counter(self, key: str) -> int:
+        return int(self.client.get(key) or 0)
+
+    def incr(self, key: str) -> int:
+        return self.client.incr(key)
+
+
+def backend_from_url(url: Optional[str], max_entries: Optional[int] = None):
+    """
+    Returns the Redis backend for a redis:// (or rediss://) URL, the in-process LRU otherwise.
+    """
+    if url and url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisCacheBackend(url)
+    return LRUCacheBackend(max_entries or int(os.getenv("RESPONSE_CACHE_SIZE", "1024")))
+
+
+class ResponseCache:
+    """
+    Cache of successful GET responses, keyed by path and query string.
+
+    Responses carry a strong ETag (a hash of the body), and a request whose
+    If-None-Match matches it is answered with 304 and no body. `invalidate`
+    bumps a generation number that is part of every key, so one call drops
+    every cached response, in every worker sharing the backend.
+    """
+
+    # Response headers replayed from the cache besides the body
+    CACHED_HEADERS = ('Content-Type', 'X-Next-Cursor')
+
+    def __init__(self, namespace: str, backend=None, ttl: float = 300.0):
+        self.namespace = namespace
+        self.backend = backend or backend_from_url(os.getenv("RESPONSE_CACHE_URL"))
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self) -> str:
+        generation = self.backend.counter(f"{self.namespace}:generation")
+        # Re-encoded, so a value holding "&" or "=" cannot pass for another query
+        query = urlencode(sorted(request.args.items(multi=True)))
+        return f"{self.namespace}:{generation}:{request.path}?{query}"
+
+    def invalidate(self):
+        self.backend.incr(f"{self.namespace}:generation")
+
+    def _respond(self, body: bytes, etag: str, headers: dict):
+        if etag in request.if_none_match:
+            response = make_response('', 304)
+        else:
+            response = make_response(body, 200)
+        response.headers.update(headers)
+        response.set_etag(etag)
+        return response
+
+    def cached(self, view):
+        """
+        Decorates a GET view so its successful responses are served from the cache.
+        """
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = self._key()
+            entry = self.backend.get(key)
+            if entry is not None:
+                self.hits += 1
+                entry = json.loads(entry)
+                return self._respond(entry['body'].encode('utf-8'), entry['etag'], entry['headers'])
+
+            self.misses += 1
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+            body = response.get_data()
+            etag = hashlib.sha256(body).hexdigest()
+            headers = {name: response.headers[name] for name in self.CACHED_HEADERS if name in response.headers}
+            self.backend.set(key, json.dumps({
+                'body': body.decode('utf-8'),
+                'etag': etag,
+                'headers': headers,
+            }).encode('utf-8'), self.ttl)
+            return self._respond(body, etag, headers)
+
+        return wrapper
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+
+challenge_cache = ResponseCache("challenges")
@@ -0,0 +1,151 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import threading
+from typing import Dict, NamedTuple, Optional
+
+from flask import session
+
+from response_cache import backend_from_url
+from wallet_sessions import SessionWallet, WalletSessionCache, wallet_sessions as shared_wallet_sessions
+
+# Key of the opaque session id in the Flask cookie session
+SESSION_KEY = 'wallet_session'
+
+
+def _keystream(session_id: str, nonce: bytes, length: int) -> bytes:
+    # HMAC-SHA256 in counter mode, keyed with the session id
+    blocks = (
+        hmac.new(session_id.encode('utf-8'), nonce + counter.to_bytes(4, 'big'), hashlib.sha256).digest()
+        for counter in range((length + 31) // 32)
+    )
+    return b''.join(blocks)[:length]
+
+
+def _seal(session_id: str, plaintext: str) -> str:
+    nonce = secrets.token_bytes(16)
+    data = plaintext.encode('utf-8')
+    ciphertext = bytes(a ^ b for a, b in zip(data, _keystream(session_id, nonce, len(data))))
+    tag = hmac.new(session_id.encode('utf-8'), b'tag' + nonce + ciphertext, hashlib.sha256).digest()
+    return base64.b64encode(nonce + ciphertext + tag).decode('ascii')
+
+
+def _unseal(session_id: str, sealed: str) -> str:
+    raw = base64.b64decode(sealed)
+    nonce, ciphertext, tag = raw[:16], raw[16:-32], raw[-32:]
+    expected = hmac.new(session_id.encode('utf-8'), b'tag' + nonce + ciphertext, hashlib.sha256).digest()
+    if not hmac.compare_digest(tag, expected):
+        raise ValueError("Wallet session entry was not sealed with this session id")
+    return bytes(a ^ b for a, b in zip(ciphertext, _keystream(session_id, nonce, len(ciphertext)))).decode('utf-8')
+
+
+class WalletRef(NamedTuple):
+    """
+    What a login session holds of a wallet: enough to find (or reopen) its
+    handle in the KMD handle cache, never the handle or a key itself.
+    """
+    name: str
+    pswd: str
+
+
+class WalletSessionStore:
+    """
+    Server-side store of login sessions, keyed by an opaque random id.
+
+    The cookie only carries the id; the wallet reference stays on the server,
+    in the in-process LRU or, with SESSION_STORE_URL set to a redis:// URL, on a
+    Redis-compatible server shared by every worker. Entries expire `ttl` seconds
+    after their last use, and the wallet handles themselves are opened and renewed
+    by the shared WalletSessionCache.
+
+    The in-process LRU is only visible to its own process: deployments with more
+    than one worker need SESSION_STORE_URL.
+
+    The store never sees a session id or a wallet password in the clear: entries
+    are keyed by a hash of the id and the password is encrypted with a key derived
+    from the id, which only the client's cookie holds. A dump of the store alone
+    therefore reveals wallet names but no passwords; anyone holding both a cookie
+    and the store can still recover that session's password until it expires.
+    """
+
+    def __init__(self, backend=None, ttl: Optional[float] = None, wallets: WalletSessionCache = None):
+        self.backend = backend or backend_from_url(
+            os.getenv("SESSION_STORE_URL"), int(os.getenv("SESSION_STORE_SIZE", "10000"))
+        )
+        # Seconds of inactivity after which a session, and its encrypted password, is dropped
+        self.ttl = ttl or float(os.getenv("SESSION_STORE_TTL", str(3600)))
+        self.wallets = wallets or shared_wallet_sessions
+        self._lock = threading.Lock()
+        self.created = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(session_id: str) -> str:
+        return f"wallet-session:{hashlib.sha256(session_id.encode('utf-8')).hexdigest()}"
+
+    def create(self, wallet_name: str, password: str) -> str:
+        """
+        Stores a wallet reference under a new session id.
+
+        Returns: the session id
+        """
+        session_id = secrets.token_urlsafe(32)
+        entry = json.dumps({'name': wallet_name, 'pswd': _seal(session_id, password)}).encode('utf-8')
+        self.backend.set(self._key(session_id), entry, self.ttl)
+        with self._lock:
+            self.created += 1
+        return session_id
+
+    def get(self, session_id: Optional[str]) -> Optional[WalletRef]:
+        """
+        Returns the wallet reference of a session and extends its lifetime, None
+        when the session is unknown or expired.
+        """
+        entry = self.backend.get(self._key(session_id)) if session_id else None
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        self.backend.set(self._key(session_id), entry, self.ttl)
+        fields = json.loads(entry)
+        return WalletRef(name=fields['name'], pswd=_unseal(session_id, fields['pswd']))
+
+    def delete(self, session_id: Optional[str]):
+        if session_id:
+            self.backend.delete(self._key(session_id))
+
+    def wallet(self, ref: WalletRef) -> SessionWallet:
+        """
+        Returns the live wallet of a reference from the KMD handle cache.
+        """
+        return self.wallets.get_wallet(ref.name, ref.pswd)
+
+    def login(self, wallet_name: str, password: str) -> str:
+        """
+        Starts a session for the current request, replacing any earlier one.
+        """
+        self.delete(session.pop(SESSION_KEY, None))
+        session_id = self.create(wallet_name, password)
+        session[SESSION_KEY] = session_id
+        return session_id
+
+    def logout(self):
+        self.delete(session.pop(SESSION_KEY, None))
+
+    def current(self) -> Optional[WalletRef]:
+        """
+        Returns the wallet reference of the current request's session.
+        """
+        return self.get(session.get(SESSION_KEY))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"created": self.created, "hits": self.hits, "misses": self.misses}
+
+
+wallet_session_store = WalletSessionStore()
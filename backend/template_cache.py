@@ -0,0 +1,153 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, Optional
+
+import requests
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+class TemplateCache:
+    """
+    Cache of decoded certificate background images, keyed by URL.
+
+    Decoded arrays are kept in memory up to `max_bytes`, evicting the least recently
+    used. The downloaded bytes are also stored in `cache_dir` with their ETag and
+    Last-Modified headers, so after a restart the image is revalidated with a
+    conditional GET instead of downloaded again. Entries older than `max_age`
+    seconds are revalidated the same way.
+
+    Returned arrays are read-only and shared between callers; copy before drawing on one.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None, cache_dir: Optional[str] = None,
+                 max_age: float = 3600.0, timeout: float = 10.0):
+        self.max_bytes = max_bytes or int(os.getenv("TEMPLATE_CACHE_BYTES", str(256 * 1024 * 1024)))
+        self.cache_dir = cache_dir or os.getenv(
+            "TEMPLATE_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "certificate_templates")
+        )
+        self.max_age = max_age
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._url_locks: Dict[str, threading.Lock] = {}
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.downloads = 0
+
+    def _paths(self, url: str):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.img"), os.path.join(self.cache_dir, f"{key}.json")
+
+    def _read_disk(self, url: str):
+        image_path, meta_path = self._paths(url)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            with open(image_path, "rb") as f:
+                return f.read(), meta
+        except (OSError, ValueError):
+            return None, {}
+
+    def _write_disk(self, url: str, content: bytes, meta: dict):
+        image_path, meta_path = self._paths(url)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Write to temporary files first so a crash never leaves a torn entry
+            for path, data, mode in ((image_path, content, "wb"), (meta_path, json.dumps(meta), "w")):
+                with open(path + ".tmp", mode) as f:
+                    f.write(data)
+                os.replace(path + ".tmp", path)
+        except OSError as e:
+            print(f"Could not write template cache entry: {e}")
+
+    def _fetch(self, url: str) -> bytes:
+        content, meta = self._read_disk(url)
+        headers = {}
+        if content is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        try:
+            response = requests.get(url, headers=headers, timeout=self.timeout)
+            if response.status_code == 304 and content is not None:
+                self.revalidations += 1
+                return content
+            response.raise_for_status()
+        except requests.exceptions.RequestException:
+            if content is not None:
+                # Serve the stale copy rather than failing the certificate
+                return content
+            raise
+
+        self.downloads += 1
+        self._write_disk(url, response.content, {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        })
+        return response.content
+
+    def get(self, url: str) -> "np.ndarray":
+        """
+        Returns the decoded image at the given URL.
+        """
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None and time.monotonic() - entry[1] < self.max_age:
+                self._entries.move_to_end(url)
+                self.hits += 1
+                return entry[0]
+            url_lock = self._url_locks.setdefault(url, threading.Lock())
+
+        # One download/decode per URL, concurrent callers wait for it
+        with url_lock:
+            with self._lock:
+                entry = self._entries.get(url)
+                if entry is not None and time.monotonic() - entry[1] < self.max_age:
+                    self.hits += 1
+                    return entry[0]
+                self.misses += 1
+
+            # Imported on first decode, so importing the cache does not load OpenCV
+            import cv2
+            import numpy as np
+
+            image = cv2.imdecode(np.frombuffer(self._fetch(url), np.uint8), cv2.IMREAD_UNCHANGED)
+            if image is None:
+                raise ValueError(f"Could not decode image from {url}")
+            image.flags.writeable = False
+
+            with self._lock:
+                previous = self._entries.pop(url, None)
+                if previous is not None:
+                    self._size -= previous[0].nbytes
+                self._entries[url] = (image, time.monotonic())
+                self._size += image.nbytes
+                while self._size > self.max_bytes and len(self._entries) > 1:
+                    _, (evicted, _) = self._entries.popitem(last=False)
+                    self._size -= evicted.nbytes
+            return image
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidations": self.revalidations,
+                "downloads": self.downloads,
+            }
+
+
+template_cache = TemplateCache()
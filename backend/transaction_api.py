@@ -0,0 +1,48 @@
+from flask import jsonify
+from flask import Blueprint
+from flask_jwt_extended import jwt_required
+from client_registry import registry as client_registry
+from tx_tracker import tracker, CONFIRMED, FAILED, PENDING
+
+transaction_bp = Blueprint('transaction', __name__)
+
+def generate_response(is_success, value=None, error=None):
+    response = {
+        "isSuccess": is_success,
+        "value": value,
+        "error": error
+    }
+    return jsonify(response)
+
+@transaction_bp.route('/transactions/<string:txid>', methods=['GET'])
+@jwt_required()
+def get_transaction_status(txid):
+    try:
+        transaction_info = tracker.status(txid)
+
+        if transaction_info is None:
+            # Not submitted by this process, ask the node directly
+            try:
+                pending_info = client_registry.algod().pending_transaction_info(txid)
+            except Exception:
+                return generate_response(False, None, "Transaction not found"), 404
+
+            if pending_info.get('confirmed-round', 0) > 0:
+                status = CONFIRMED
+            elif pending_info.get('pool-error'):
+                status = FAILED
+            else:
+                status = PENDING
+
+            transaction_info = {
+                'txid': txid,
+                'status': status,
+                'confirmed_round': pending_info.get('confirmed-round') or None,
+                'asset_index': pending_info.get('asset-index'),
+                'error': pending_info.get('pool-error') or None
+            }
+
+        return generate_response(True, transaction_info, None), 200
+
+    except Exception as e:
+        return generate_response(False, None, f"Error retrieving transaction: {e}"), 500
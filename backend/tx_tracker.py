@@ -0,0 +1,165 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+from account_cache import AccountInfoCache, account_cache as shared_account_cache
+from client_registry import ClientRegistry, registry as client_registry
+
+
+PENDING = "pending"
+CONFIRMED = "confirmed"
+FAILED = "failed"
+
+
+class ConfirmationTracker:
+    """
+    Follows submitted transactions in the background until they are confirmed.
+
+    A single daemon thread waits for each new block (or sleeps `poll_interval`
+    seconds when `follow_blocks` is off) and then checks every outstanding txid
+    with `pending_transaction_info`. Confirmation and failure callbacks run on
+    that thread. The status of the last `max_finished` settled transactions is
+    kept in memory for lookups.
+    """
+
+    def __init__(self, clients: ClientRegistry = None, poll_interval: float = 1.0,
+                 follow_blocks: bool = True, max_wait_rounds: int = 1000, max_finished: int = 10000,
+                 accounts: AccountInfoCache = None):
+        self.clients = clients or client_registry
+        self.accounts = accounts or shared_account_cache
+        self.poll_interval = poll_interval
+        self.follow_blocks = follow_blocks
+        self.max_wait_rounds = max_wait_rounds
+        self.max_finished = max_finished
+        self._cond = threading.Condition()
+        self._pending: Dict[str, dict] = {}
+        self._callbacks: Dict[str, tuple] = {}
+        self._finished: "OrderedDict[str, dict]" = OrderedDict()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+
+    def track(self, txid: str, on_confirmed: Optional[Callable[[dict], None]] = None,
+              on_failed: Optional[Callable[[dict], None]] = None, last_valid: Optional[int] = None):
+        """
+        Starts tracking a submitted transaction.
+
+        Args:
+        - txid (str): the id of the submitted transaction.
+        - on_confirmed: called with the pending transaction info once confirmed.
+        - on_failed: called with the status record if the transaction is rejected or expires.
+        - last_valid (int): last round the transaction can be confirmed in, if known.
+        """
+        with self._cond:
+            self._pending[txid] = {
+                "txid": txid,
+                "status": PENDING,
+                "submitted_at": time.time(),
+                "last_valid": last_valid,
+                "confirmed_round": None,
+                "asset_index": None,
+                "error": None,
+            }
+            self._callbacks[txid] = (on_confirmed, on_failed)
+            self._ensure_started()
+            self._cond.notify()
+
+    def status(self, txid: str) -> Optional[dict]:
+        """
+        Returns the status record of a tracked transaction, or None if it is unknown.
+        """
+        with self._cond:
+            record = self._pending.get(txid) or self._finished.get(txid)
+            return dict(record) if record else None
+
+    def pending_count(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    def _ensure_started(self):
+        # Caller holds self._cond
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped = False
+            self._thread = threading.Thread(target=self._run, name="confirmation-tracker", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        last_round = None
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                txids = list(self._pending)
+
+            algod_client = self.clients.algod()
+            try:
+                if last_round is None or not self.follow_blocks:
+                    if last_round is not None:
+                        time.sleep(self.poll_interval)
+                    last_round = algod_client.status()["last-round"]
+                else:
+                    last_round = algod_client.status_after_block(last_round)["last-round"]
+            except Exception as e:
+                logging.error(f"Error following algod status: {e}")
+                time.sleep(self.poll_interval)
+                continue
+
+            # Rounds we follow also age out cached account info
+            self.accounts.observe_round(last_round)
+            for txid in txids:
+                self._check(algod_client, txid, last_round)
+
+    def _check(self, algod_client, txid: str, current_round: int):
+        with self._cond:
+            record = self._pending.get(txid)
+            if record is None:
+                return
+            if record["last_valid"] is None:
+                record["last_valid"] = current_round + self.max_wait_rounds
+            last_valid = record["last_valid"]
+
+        try:
+            info = algod_client.pending_transaction_info(txid)
+        except Exception as e:
+            info = None
+            logging.debug(f"Pending info for {txid} not available yet: {e}")
+
+        if info and info.get("confirmed-round", 0) > 0:
+            self._settle(txid, CONFIRMED, info, confirmed_round=info["confirmed-round"], asset_index=info.get("asset-index"))
+        elif info and info.get("pool-error"):
+            self._settle(txid, FAILED, None, error=info["pool-error"])
+        elif current_round > last_valid:
+            self._settle(txid, FAILED, None, error=f"Transaction not confirmed by round {last_valid}")
+
+    def _settle(self, txid: str, status: str, payload: Optional[dict], **fields):
+        with self._cond:
+            record = self._pending.pop(txid)
+            record.update(fields, status=status)
+            self._finished[txid] = record
+            while len(self._finished) > self.max_finished:
+                self._finished.popitem(last=False)
+            on_confirmed, on_failed = self._callbacks.pop(txid, (None, None))
+            payload = payload if payload is not None else dict(record)
+
+        if status == CONFIRMED:
+            logging.info(f"Transaction {txid} confirmed in round: {record['confirmed_round']}")
+        else:
+            logging.error(f"Transaction {txid} failed: {record['error']}")
+
+        callback = on_confirmed if status == CONFIRMED else on_failed
+        if callback is not None:
+            try:
+                callback(payload)
+            except Exception as e:
+                logging.error(f"Confirmation callback for {txid} failed: {e}")
+
+
+tracker = ConfirmationTracker()
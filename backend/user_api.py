@@ -1,17 +1,16 @@
-from flask import jsonify, request, session
+from flask import current_app, jsonify, request
 from flask_jwt_extended import create_access_token
-from algorand_utils import Algorand
+from itsdangerous import BadSignature, URLSafeTimedSerializer
 import logging
-import json
-from models import User, UserRole
-from flask_bcrypt import Bcrypt
+import time
+from models import User, UserRole, WalletStatus
 from models import db
-import pickle
+from password_hasher import HasherBusy, password_hasher
+from registration import registration_pipeline
+from session_store import wallet_session_store
 
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 
-algorand = Algorand()
-
 def generate_response(is_success, value=None, error=None):
     response = {
         "isSuccess": is_success,
@@ -20,12 +19,27 @@ def generate_response(is_success, value=None, error=None):
     }
     return jsonify(response)
 
+# Seconds a registration token can be polled with /register/status/<token>
+REGISTRATION_TOKEN_MAX_AGE = 24 * 3600
+
+
+def registration_tokens() -> URLSafeTimedSerializer:
+    """
+    Signs and checks the opaque tokens handed out by register_user, so registration
+    statuses can only be polled by whoever registered, not enumerated by user id.
+    """
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt='registration-status')
+
+
 def register_user():
     try:
         username = request.json.get('username')
         password = request.json.get('password')
         role_str = request.json.get('role')  # 'Issuer' or 'Trainee'
 
+        if not username or not password:
+            return generate_response(False, None, "Missing required fields"), 400
+
         # Check for existing user
         existing_user = User.query.filter_by(username=username).first()
         if existing_user:
@@ -36,48 +50,87 @@ def register_user():
 
         role = UserRole.ISSUER if role_str == "Issuer" else UserRole.TRAINEE
 
-        account_address = algorand.create_user(username, password)
-
         # Hash password
-        hashed_password = Bcrypt().generate_password_hash(password).decode('utf-8')
+        hashed_password = password_hasher.hash(password)
 
-        # Create user object
+        # Create user object, its wallet is provisioned in the background
         user = User(
             username=username,
             password_hash=hashed_password,
             role=role,
-            account_address=account_address
+            wallet_status=WalletStatus.PENDING
         )
 
         # Add user to the database
         db.session.add(user)
         db.session.commit()
 
-        # Return success message (optionally with wallet information)
-        return generate_response(True, None, None), 201
+        registration_pipeline.submit(current_app._get_current_object(), user.id, password)
+
+        # Return the registration token to poll with /register/status/<token>
+        response_data = {
+            "registration_token": registration_tokens().dumps(user.id),
+            "wallet_status": user.wallet_status.value
+        }
+        return generate_response(True, response_data, None), 202
+
+    except HasherBusy:
+        return generate_response(False, None, "Server busy, try again shortly"), 503, {'Retry-After': '1'}
 
     except Exception as e:
         logging.error(f"Registration failed: {e}")
         return generate_response(False, None, f"Registration failed: {e}"), 500
 
+def get_registration_status(token):
+    try:
+        try:
+            user_id = registration_tokens().loads(token, max_age=REGISTRATION_TOKEN_MAX_AGE)
+        except BadSignature:
+            return generate_response(False, None, "Registration not found"), 404
+
+        user = User.query.get(user_id)
+
+        if not user:
+            return generate_response(False, None, "Registration not found"), 404
+
+        response_data = {
+            "wallet_status": user.wallet_status.value,
+            "account_address": user.account_address
+        }
+        return generate_response(True, response_data, None), 200
+
+    except Exception as e:
+        logging.error(f"Getting registration status failed: {e}")
+        return generate_response(False, None, f"Getting registration status failed: {e}"), 500
+
 def login_user():
     try:
+        started_at = time.perf_counter()
         username = request.json.get('username')
         password = request.json.get('password')
 
-        wallet = algorand.login_user(username, password)
-
         # Find user by username
         user = User.query.filter_by(username=username).first()
+        db_done_at = time.perf_counter()
 
-        if user and Bcrypt().check_password_hash(user.password_hash, password):
-            access_token = create_access_token(identity=user.id)  # Generate access token
+        password_ok = bool(user) and password_hasher.verify(user.password_hash, password)
+        hash_done_at = time.perf_counter()
+
+        if password_ok and password_hasher.needs_rehash(user.password_hash):
+            # Move the stored hash to the configured cost without delaying the login
+            password_hasher.rehash(password, password_saver(user.id))
 
-            # Convert Wallet object to a serialized string
-            wallet_str = pickle.dumps(wallet)
+        if password_ok:
+            # A wallet whose provisioning failed or was cut short by a restart is
+            # provisioned again, now that the password is at hand and verified
+            registration_pipeline.resume(current_app._get_current_object(), user, password)
 
-            # Store the serialized wallet in the session
-            session['wallet'] = wallet_str
+            access_token = create_access_token(identity=user.id)  # Generate access token
+
+            # The cookie only carries an opaque session id; the wallet only connects
+            # to KMD, and the account is only checked and funded, once a chain
+            # operation needs it
+            wallet_session_store.login(user.kmd_wallet_name, password)
 
             # Return additional information with the access token
             response_data = {
@@ -85,20 +138,49 @@ def login_user():
                 "access_token": access_token,
                 "username": user.username,
                 "account_address": user.account_address,
+                "wallet_status": user.wallet_status.value,
                 "role": user.role.value
             }
-            return generate_response(True, response_data, None), 200
+            status, response = 200, generate_response(True, response_data, None)
         else:
-            return generate_response(False, None, "Invalid username or password"), 401
+            status, response = 401, generate_response(False, None, "Invalid username or password")
+
+        finished_at = time.perf_counter()
+        logging.info(
+            f"Login latency: db={(db_done_at - started_at) * 1000:.1f}ms "
+            f"bcrypt={(hash_done_at - db_done_at) * 1000:.1f}ms "
+            f"token={(finished_at - hash_done_at) * 1000:.1f}ms "
+            f"total={(finished_at - started_at) * 1000:.1f}ms "
+            f"hash_queue={password_hasher.stats()['queue_depth']}"
+        )
+        return response, status
+
+    except HasherBusy:
+        return generate_response(False, None, "Server busy, try again shortly"), 503, {'Retry-After': '1'}
 
     except Exception as e:
         logging.error(f"Login failed: {e}")
         return generate_response(False, None, f"Login failed: {e}"), 500
 
+def password_saver(user_id):
+    """
+    Builds a callback storing a rehashed password from the hasher's thread.
+    """
+    app = current_app._get_current_object()
+
+    def save(password_hash):
+        with app.app_context():
+            user = User.query.get(user_id)
+            if user:
+                user.password_hash = password_hash
+                db.session.commit()
+
+    return save
+
 def logout_user():
     try:
         # Clear user-specific information from the session
-        session.pop('wallet', None)
+        wallet_session_store.logout()
         return generate_response(True, None, None), 200
 
     except Exception as e:
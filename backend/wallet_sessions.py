@@ -0,0 +1,244 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from algosdk.wallet import Wallet
+
+from client_registry import ClientRegistry, registry as client_registry
+
+
+class SessionWallet(Wallet):
+    """
+    Wallet that keeps track of its KMD handle expiry.
+
+    algosdk's Wallet renews its handle before every operation, which costs one KMD
+    round trip per call. This wallet only renews once the handle is within
+    `renew_margin` seconds of expiring.
+    """
+
+    def __init__(self, wallet_name, wallet_pswd, kmd_client, handle_lifetime=60.0, renew_margin=5.0):
+        self.handle_lifetime = handle_lifetime
+        self.renew_margin = renew_margin
+        super().__init__(wallet_name, wallet_pswd, kmd_client)
+        self.handle_expires_at = time.monotonic() + handle_lifetime
+
+    def automate_handle(self):
+        if self.handle is None:
+            self.init_handle()
+        elif time.monotonic() >= self.handle_expires_at - self.renew_margin:
+            try:
+                self.renew_handle()
+            except Exception:
+                self.init_handle()
+        return True
+
+    def init_handle(self):
+        super().init_handle()
+        self.handle_expires_at = time.monotonic() + self.handle_lifetime
+        return True
+
+    def renew_handle(self):
+        resp = super().renew_handle()
+        self.handle_expires_at = time.monotonic() + resp.get("expires_seconds", self.handle_lifetime)
+        return resp
+
+
+class WalletSession:
+    def __init__(self, password_digest: str):
+        self.password_digest = password_digest
+        self.lock = threading.Lock()
+        self.wallet: Optional[SessionWallet] = None
+        self.keys: Dict[str, Tuple[bytes, float]] = {}
+        self.last_used = time.monotonic()
+
+
+class WalletSessionCache:
+    """
+    Cache of live KMD wallet handles keyed by wallet (user) name.
+
+    Sessions are evicted least-recently-used once more than `max_sessions` are open,
+    and dropped after `idle_ttl` seconds without use. Exported signing keys are kept
+    in memory for at most `key_ttl` seconds. Every read checks the expiry of the
+    session it returns; idle sessions and stale keys of the others are swept every
+    `sweep_interval` seconds and whenever the cache is full. The KMD handle of
+    every session dropped is released.
+    """
+
+    def __init__(self, clients: ClientRegistry = None, max_sessions: Optional[int] = None,
+                 idle_ttl: Optional[float] = None, key_ttl: Optional[float] = None,
+                 handle_lifetime: Optional[float] = None, sweep_interval: Optional[float] = None):
+        self.clients = clients or client_registry
+        self.max_sessions = max_sessions or int(os.getenv("WALLET_SESSION_MAX", "256"))
+        self.idle_ttl = idle_ttl if idle_ttl is not None else float(os.getenv("WALLET_SESSION_IDLE_TTL", "600"))
+        self.key_ttl = key_ttl if key_ttl is not None else float(os.getenv("WALLET_KEY_TTL", "60"))
+        # KMD's session_lifetime_secs, 60 seconds unless configured otherwise on the node
+        self.handle_lifetime = handle_lifetime or float(os.getenv("KMD_HANDLE_LIFETIME", "60"))
+        self.sweep_interval = sweep_interval if sweep_interval is not None \
+            else float(os.getenv("WALLET_SESSION_SWEEP_INTERVAL", "30"))
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[str, WalletSession]" = OrderedDict()
+        self._last_sweep = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _digest(password: str) -> str:
+        return hashlib.sha256(password.encode("utf-8")).hexdigest()
+
+    def _session(self, wallet_name: str, password: str) -> WalletSession:
+        digest = self._digest(password)
+        evicted = []
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_sweep >= self.sweep_interval:
+                evicted.extend(self._sweep(now))
+
+            session = self._sessions.get(wallet_name)
+            if session is not None and self._expired(session, now):
+                evicted.append(self._sessions.pop(wallet_name))
+                session = None
+            if session is not None and session.password_digest == digest:
+                self.hits += 1
+                self._sessions.move_to_end(wallet_name)
+            else:
+                self.misses += 1
+                # A password that does not match the cached session gets a session of
+                # its own, installed only once KMD accepted the password
+                session = WalletSession(digest)
+                if wallet_name not in self._sessions:
+                    if len(self._sessions) >= self.max_sessions:
+                        # Make room from idle sessions before evicting live ones
+                        evicted.extend(self._sweep(now))
+                    self._sessions[wallet_name] = session
+                    evicted.extend(self._trim())
+            session.last_used = now
+            self.evictions += len(evicted)
+
+        for stale in evicted:
+            self._release(stale)
+
+        with session.lock:
+            if session.wallet is None:
+                try:
+                    session.wallet = SessionWallet(wallet_name, password, self.clients.kmd(), self.handle_lifetime)
+                except Exception:
+                    with self._lock:
+                        if self._sessions.get(wallet_name) is session:
+                            del self._sessions[wallet_name]
+                    raise
+
+        replaced = None
+        with self._lock:
+            if self._sessions.get(wallet_name) is not session:
+                replaced = self._sessions.pop(wallet_name, None)
+                self._sessions[wallet_name] = session
+                evicted = self._trim()
+                self.evictions += len(evicted) + (1 if replaced else 0)
+            else:
+                evicted = []
+        for stale in evicted + ([replaced] if replaced else []):
+            self._release(stale)
+        return session
+
+    def _expired(self, session: WalletSession, now: float) -> bool:
+        return now - session.last_used > self.idle_ttl
+
+    def _sweep(self, now: float):
+        # Caller holds self._lock
+        self._last_sweep = now
+        evicted = []
+        for name, cached in list(self._sessions.items()):
+            if self._expired(cached, now):
+                evicted.append(self._sessions.pop(name))
+            elif cached.keys and cached.lock.acquire(blocking=False):
+                # Drop signing keys that outlived their TTL
+                cached.keys = {address: key for address, key in cached.keys.items() if key[1] > now}
+                cached.lock.release()
+        return evicted
+
+    def sweep(self) -> int:
+        """
+        Releases the idle sessions and drops the expired signing keys right away.
+
+        Returns: the number of sessions released
+        """
+        with self._lock:
+            evicted = self._sweep(time.monotonic())
+            self.evictions += len(evicted)
+        for stale in evicted:
+            self._release(stale)
+        return len(evicted)
+
+    def _trim(self):
+        # Caller holds self._lock
+        evicted = []
+        while len(self._sessions) > self.max_sessions:
+            evicted.append(self._sessions.popitem(last=False)[1])
+        return evicted
+
+    def _release(self, session: WalletSession):
+        with session.lock:
+            session.keys.clear()
+            wallet, session.wallet = session.wallet, None
+        if wallet is not None and wallet.handle is not None:
+            try:
+                wallet.release_handle()
+            except Exception as e:
+                logging.debug(f"Releasing wallet handle failed: {e}")
+
+    def get_wallet(self, wallet_name: str, password: str) -> SessionWallet:
+        """
+        Returns the wallet of the given name, opening (or creating) it on first use.
+        """
+        return self._session(wallet_name, password).wallet
+
+    def export_key(self, wallet_name: str, password: str, address: str) -> bytes:
+        """
+        Returns the private key of an address in the wallet, exporting it from KMD
+        only if it is not cached or its cached copy is older than `key_ttl`.
+        """
+        session = self._session(wallet_name, password)
+        with session.lock:
+            now = time.monotonic()
+            cached = session.keys.get(address)
+            if cached is not None and cached[1] > now:
+                return cached[0]
+
+            if session.wallet is not None:
+                private_key = session.wallet.export_key(address)
+                if self.key_ttl > 0:
+                    session.keys[address] = (private_key, now + self.key_ttl)
+                return private_key
+
+        # The session was evicted by another thread in the meantime
+        return self.export_key(wallet_name, password, address)
+
+    def evict(self, wallet_name: str):
+        with self._lock:
+            session = self._sessions.pop(wallet_name, None)
+        if session is not None:
+            self._release(session)
+
+    def clear(self):
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            self._release(session)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+wallet_sessions = WalletSessionCache()
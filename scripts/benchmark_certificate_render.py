@@ -0,0 +1,102 @@
+"""
+Micro-benchmark of certificate rendering: the compiled CertificateTemplate path
+against the previous per-call path (download + decode background, load and resize
+the logo, load fonts, draw every string).
+
+The background is served from a local HTTP server so network latency does not
+dominate the numbers.
+
+Usage: python benchmark_certificate_render.py [--runs 50] [--background ../images/generated_variation_1.png]
+"""
+import argparse
+import functools
+import os
+import sys
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(script_dir, '..', 'backend'))
+
+from certificate_utils import CertificateTemplate, download_image  # noqa: E402
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def render_uncompiled(username, title, issued_date, image_url, academy_logo_path):
+    """
+    The rendering steps customize_certificate ran on every call before templates were compiled.
+    """
+    background_image = download_image(image_url)
+
+    logo_image = cv2.imread(academy_logo_path, cv2.IMREAD_UNCHANGED)
+    logo_width = int(logo_image.shape[1] * 10 / 100)
+    logo_height = int(logo_image.shape[0] * 10 / 100)
+    logo_image = cv2.resize(logo_image, (logo_width, logo_height), interpolation=cv2.INTER_AREA)
+
+    background_pil = Image.fromarray(cv2.cvtColor(background_image, cv2.COLOR_BGR2RGB))
+    draw = ImageDraw.Draw(background_pil)
+    font_large = ImageFont.load_default(size=24)
+    font_medium = ImageFont.load_default(size=24)
+    font_color = (59, 31, 24)
+
+    draw.text((264, 430), 'This certifies that', font=font_medium, fill=font_color)
+    draw.text((460, 430), username, font=font_large, fill=font_color)
+    draw.text((264, 485), 'Has successfully completed the', font=font_medium, fill=font_color)
+    draw.text((264, 540), title, font=font_large, fill=font_color)
+    draw.text((320, 595), 'Date of Issue:', font=font_medium, fill=font_color)
+    draw.text((470, 595), issued_date, font=font_medium, fill=font_color)
+
+    logo_image_pil = Image.fromarray(logo_image).convert("RGBA")
+    background_pil.paste(logo_image_pil, (50, 50), logo_image_pil)
+    return background_pil
+
+
+def time_runs(render, runs):
+    timings = []
+    for i in range(runs):
+        started_at = time.perf_counter()
+        render(f"Trainee {i}", "Week 1 challenge", "January 13, 2024")
+        timings.append(time.perf_counter() - started_at)
+    return np.array(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=50)
+    parser.add_argument('--background', default=os.path.join(script_dir, '..', 'images', 'generated_variation_1.png'))
+    parser.add_argument('--logo', default=os.path.join(script_dir, '..', 'images', '10x_logo.png'))
+    args = parser.parse_args()
+
+    background_dir, background_name = os.path.split(os.path.abspath(args.background))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(QuietHandler, directory=background_dir))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    image_url = f"http://127.0.0.1:{server.server_port}/{background_name}"
+
+    uncompiled = time_runs(
+        lambda username, title, date: render_uncompiled(username, title, date, image_url, args.logo), args.runs
+    )
+
+    started_at = time.perf_counter()
+    template = CertificateTemplate(image_url, args.logo)
+    build_ms = (time.perf_counter() - started_at) * 1000
+    compiled = time_runs(template.render, args.runs)
+
+    server.shutdown()
+
+    print(f"runs: {args.runs}")
+    print(f"uncompiled: mean {uncompiled.mean():.2f} ms, p95 {np.percentile(uncompiled, 95):.2f} ms")
+    print(f"compiled:   mean {compiled.mean():.2f} ms, p95 {np.percentile(compiled, 95):.2f} ms (one-off build {build_ms:.2f} ms)")
+    print(f"speedup:    {uncompiled.mean() / compiled.mean():.1f}x")
+
+
+if __name__ == '__main__':
+    main()
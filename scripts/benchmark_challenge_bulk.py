@@ -0,0 +1,86 @@
+"""
+Benchmark of setting up a batch's challenges: one POST /challenges per challenge
+(the single-item path) against one POST /challenges/bulk.
+
+Runs the challenge blueprint in-process on a SQLite file database, or on the
+database given with --database (e.g. a scratch Postgres), so the numbers include
+the real commit and round-trip cost of each path.
+
+Usage: python benchmark_challenge_bulk.py [--challenges 50] [--runs 5] [--database sqlite:////tmp/bench.db]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token
+from sqlalchemy import event
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(script_dir, '..', 'backend'))
+
+from challenge_api import challenge_bp  # noqa: E402
+from migrations import migrate  # noqa: E402
+from models import db  # noqa: E402
+
+
+def challenge_items(count, batch_number):
+    return [
+        {'title': f"Week {week} challenge", 'description': "Weekly challenge", 'week_number': week, 'batch_number': batch_number}
+        for week in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--challenges', type=int, default=50)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--database', default=f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'benchmark.db')}")
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = args.database
+    app.config['JWT_SECRET_KEY'] = 'benchmark-secret-key-of-sufficient-length'
+    JWTManager(app)
+    db.init_app(app)
+    app.register_blueprint(challenge_bp, url_prefix='/api/v1')
+
+    statements = []
+    with app.app_context():
+        migrate()
+        headers = {'Authorization': 'Bearer ' + create_access_token(identity='1')}
+        event.listen(db.engine, 'before_cursor_execute', lambda *event_args: statements.append(1))
+    client = app.test_client()
+
+    single, bulk = [], []
+    single_statements = bulk_statements = 0
+    for run in range(args.runs):
+        items = challenge_items(args.challenges, batch_number=2 * run)
+        statements.clear()
+        started_at = time.perf_counter()
+        for item in items:
+            assert client.post('/api/v1/challenges', json=item, headers=headers).status_code == 201
+        single.append(time.perf_counter() - started_at)
+        single_statements = len(statements)
+
+        items = challenge_items(args.challenges, batch_number=2 * run + 1)
+        statements.clear()
+        started_at = time.perf_counter()
+        response = client.post('/api/v1/challenges/bulk', json={'challenges': items}, headers=headers)
+        bulk.append(time.perf_counter() - started_at)
+        bulk_statements = len(statements)
+        assert response.status_code == 201
+        assert [result['value']['title'] for result in response.json['value']] == [item['title'] for item in items]
+
+    single, bulk = np.array(single) * 1000, np.array(bulk) * 1000
+    print(f"challenges per batch: {args.challenges}, runs: {args.runs}")
+    print(f"single-item: mean {single.mean():.1f} ms, {single_statements} SQL statements per batch")
+    print(f"bulk:        mean {bulk.mean():.1f} ms, {bulk_statements} SQL statements per batch")
+    print(f"speedup:     {single.mean() / bulk.mean():.1f}x")
+
+
+if __name__ == '__main__':
+    main()
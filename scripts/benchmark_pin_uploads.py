@@ -0,0 +1,117 @@
+"""
+Benchmark of certificate pinning: one-off sequential requests.post calls (the
+previous upload path) against the pooled, concurrent PinUploader.
+
+Uploads go to a local stand-in for the Pinata endpoint that answers after a fixed
+delay with the CID of the uploaded file, and rate limits a share of the requests
+with 429, so retries are exercised.
+
+Usage: python benchmark_pin_uploads.py [--uploads 64] [--latency 0.05] [--throttle 0.1]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(script_dir, '..', 'backend'))
+
+from ipfs_cid import compute_cid  # noqa: E402
+from pin_uploader import PinIndex, PinUploader  # noqa: E402
+
+
+def uploaded_file(content_type, body):
+    message = BytesParser(policy=HTTP).parsebytes(b"Content-Type: " + content_type.encode() + b"\r\n\r\n" + body)
+    for part in message.iter_parts():
+        if part.get_filename():
+            return part.get_content()
+    return b""
+
+
+def make_handler(latency, throttle):
+    class StandInPinHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers['Content-Length']))
+            time.sleep(latency)
+            if random.random() < throttle:
+                self.send_response(429)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            content = uploaded_file(self.headers['Content-Type'], body)
+            payload = json.dumps({"IpfsHash": compute_cid(content)}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    return StandInPinHandler
+
+
+def upload_sequential(endpoint, files):
+    hashes = []
+    for filename, content in files:
+        response = requests.post(endpoint, files={"file": (filename, content, "image/png")})
+        hashes.append(response.json()["IpfsHash"] if response.status_code == 200 else None)
+    return hashes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--uploads', type=int, default=64)
+    parser.add_argument('--size', type=int, default=1700000, help='bytes per certificate')
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds the stand-in server takes per pin')
+    parser.add_argument('--throttle', type=float, default=0.1, help='share of requests answered with 429')
+    parser.add_argument('--workers', type=int, default=8)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.latency, args.throttle))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    endpoint = f"http://127.0.0.1:{server.server_port}/pinning/pinFileToIPFS"
+
+    files = [(f"trainee_{i}_week_1_certificate.png", os.urandom(args.size)) for i in range(args.uploads)]
+
+    started_at = time.perf_counter()
+    sequential = upload_sequential(endpoint, files)
+    sequential_s = time.perf_counter() - started_at
+
+    index = PinIndex(os.path.join(tempfile.mkdtemp(), "index.jsonl"))
+    uploader = PinUploader(endpoint=endpoint, jwt="benchmark", max_workers=args.workers, backoff=0.01, index=index)
+    started_at = time.perf_counter()
+    pooled = uploader.upload_many(files)
+    pooled_s = time.perf_counter() - started_at
+
+    # Re-issuing the same certificates finds them in the pin index
+    started_at = time.perf_counter()
+    reissued = [future.result() for _, future in (uploader.pin(filename, content) for filename, content in files)]
+    reissued_s = time.perf_counter() - started_at
+    stats = uploader.stats()
+    uploader.close()
+    server.shutdown()
+
+    print(f"uploads: {args.uploads} x {args.size} bytes, server latency {args.latency * 1000:.0f} ms, throttle {args.throttle:.0%}")
+    print(f"sequential: {sequential_s:.2f} s, {sum(h is not None for h in sequential)} pinned")
+    print(f"pooled:     {pooled_s:.2f} s, {sum(h is not None for h in pooled)} pinned, "
+          f"{stats['retries']} retries, avg latency {stats['avg_latency_ms']:.1f} ms")
+    print(f"speedup:    {sequential_s / pooled_s:.1f}x")
+    print(f"reissue:    {reissued_s:.2f} s, {stats['deduplicated']} skipped as already pinned, "
+          f"hashes match: {reissued == pooled}")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,7 +2,7 @@ import { Certificate, CreateCertificate } from '../interfaces/types'
 import { requests } from './request'
 
 const Certificates = {
-  list: () => requests.get<Certificate[]>('/certificates'),
+  list: () => requests.getAllPages<Certificate>('/certificates'),
 
   create: (certificate: CreateCertificate) => requests.post<Certificate>('/certificates', certificate),
 
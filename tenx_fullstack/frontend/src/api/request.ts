@@ -18,8 +18,21 @@ export const setUpAxiosIntercept = (user: { access_token: string }) => {
 }
 const responseBody = <T>(response: AxiosResponse<ApiResponse<T>>) => response.data.value
 
+// Paginated listings return one page at a time, with the next page's cursor in X-Next-Cursor
+const getAllPages = async <T>(url: string, limit = 500): Promise<T[]> => {
+  const items: T[] = []
+  let cursor: string | undefined
+  do {
+    const response = await axios.get<ApiResponse<T[]>>(url, { params: { limit, cursor } })
+    items.push(...(response.data.value ?? []))
+    cursor = response.headers['x-next-cursor'] as string | undefined
+  } while (cursor)
+  return items
+}
+
 export const requests = {
   get: <T>(url: string) => axios.get<ApiResponse<T>>(url).then(responseBody),
+  getAllPages,
   // eslint-disable-next-line @typescript-eslint/ban-types
   post: <T>(url: string, body: {}) => axios.post<ApiResponse<T>>(url, body).then(responseBody),
 
@@ -0,0 +1,8 @@
+import os
+import sys
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The backend modules import each other as top-level modules
+sys.path.insert(0, os.path.join(root_dir, 'backend'))
+sys.path.insert(0, root_dir)
@@ -0,0 +1,67 @@
+from algosdk import account, transaction
+
+from account_cache import AccountInfoCache, touched_addresses
+
+
+class FakeAlgod:
+    """
+    Serves account info read at the current `round`, counting reads.
+    """
+
+    def __init__(self):
+        self.round = 100
+        self.reads = 0
+
+    def account_info(self, address):
+        self.reads += 1
+        return {"address": address, "amount": self.reads, "round": self.round}
+
+
+class FakeClients:
+    def __init__(self):
+        self.algod_client = FakeAlgod()
+
+    def algod(self):
+        return self.algod_client
+
+
+def test_reads_are_served_until_a_newer_round_is_observed():
+    clients = FakeClients()
+    cache = AccountInfoCache(clients)
+
+    assert cache.get("ALICE")["amount"] == 1
+    assert cache.get("ALICE")["amount"] == 1
+    cache.observe_round(100)
+    assert cache.get("ALICE")["amount"] == 1
+
+    clients.algod_client.round = 101
+    cache.observe_round(101)
+
+    assert cache.get("ALICE") == {"address": "ALICE", "amount": 2, "round": 101}
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 2
+
+
+def test_submission_invalidates_only_the_touched_addresses():
+    (_, sender), (_, receiver), (_, bystander) = [account.generate_account() for _ in range(3)]
+    clients = FakeClients()
+    cache = AccountInfoCache(clients)
+    cache.prefetch([sender, receiver, bystander])
+    sp = transaction.SuggestedParams(fee=1000, first=100, last=1100, gh="SGO1GKSzyE7IEPItTxCByw9x8FmnrCDexi9/cOUJOiI=")
+
+    cache.invalidate(*touched_addresses(transaction.PaymentTxn(sender, sp, receiver, 1000)))
+
+    for address in (sender, receiver, bystander):
+        cache.get(address)
+    assert clients.algod_client.reads == 5
+
+
+def test_reading_a_newer_round_ages_out_older_entries():
+    clients = FakeClients()
+    cache = AccountInfoCache(clients)
+    cache.get("ALICE")
+
+    clients.algod_client.round = 105
+    cache.get("BOB")
+
+    assert cache.get("ALICE")["round"] == 105
+    assert cache.stats()["latest_round"] == 105
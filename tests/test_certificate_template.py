@@ -0,0 +1,48 @@
+import os
+
+import numpy as np
+import pytest
+
+import certificate_utils
+from certificate_utils import get_certificate_template
+
+LOGO_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "images", "10x_logo.png")
+
+
+class FakeTemplateCache:
+    def __init__(self):
+        self.images = {}
+
+    def get(self, url):
+        return self.images.setdefault(url, np.zeros((700, 900, 3), dtype=np.uint8))
+
+
+@pytest.fixture
+def template_cache(monkeypatch):
+    cache = FakeTemplateCache()
+    monkeypatch.setattr(certificate_utils, "template_cache", cache)
+    monkeypatch.setattr(certificate_utils, "_compiled_templates", type(certificate_utils._compiled_templates)())
+    return cache
+
+
+def test_template_is_rebuilt_when_the_background_changes(template_cache):
+    template = get_certificate_template("https://example.com/a.png", LOGO_PATH)
+    assert get_certificate_template("https://example.com/a.png", LOGO_PATH) is template
+
+    # Revalidated, evicted or changed: the cache hands out another decoded image
+    template_cache.images["https://example.com/a.png"] = np.full((700, 900, 3), 255, dtype=np.uint8)
+
+    rebuilt = get_certificate_template("https://example.com/a.png", LOGO_PATH)
+    assert rebuilt is not template
+    assert rebuilt.base.getpixel((800, 650)) == (255, 255, 255)
+
+
+def test_compiled_templates_are_bounded(template_cache, monkeypatch):
+    monkeypatch.setattr(certificate_utils, "MAX_COMPILED_TEMPLATES", 2)
+
+    for name in ("a", "b", "c"):
+        get_certificate_template(f"https://example.com/{name}.png", LOGO_PATH)
+
+    assert [url for url, _ in certificate_utils._compiled_templates] == [
+        "https://example.com/b.png", "https://example.com/c.png"
+    ]
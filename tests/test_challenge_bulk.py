@@ -0,0 +1,100 @@
+import pytest
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token
+from sqlalchemy import event
+
+from challenge_api import challenge_bp
+from migrations import migrate
+from models import db, Challenge
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config['JWT_SECRET_KEY'] = 'test-secret-key-of-sufficient-length'
+    JWTManager(app)
+    db.init_app(app)
+    app.register_blueprint(challenge_bp, url_prefix='/api/v1')
+    with app.app_context():
+        migrate()
+        client = app.test_client()
+        client.environ_base['HTTP_AUTHORIZATION'] = 'Bearer ' + create_access_token(identity='1')
+        yield client
+
+
+def test_bulk_create_reports_invalid_items_and_keeps_order(client):
+    items = [
+        {'title': "Week 1", 'description': "Challenge", 'week_number': 1, 'batch_number': 3},
+        {'title': "Week 2", 'week_number': 2, 'batch_number': 3},
+        {'title': "Week 3", 'description': "Challenge", 'week_number': 3, 'batch_number': 3},
+    ]
+
+    response = client.post('/api/v1/challenges/bulk', json={'challenges': items})
+
+    assert response.status_code == 201
+    results = response.json['value']
+    assert [result['isSuccess'] for result in results] == [True, False, True]
+    assert "description" in results[1]['error']
+    assert [results[0]['value']['title'], results[2]['value']['title']] == ["Week 1", "Week 3"]
+    assert db.session.get(Challenge, results[2]['value']['id']).week_number == 3
+
+
+def test_bulk_create_inserts_row_by_row_on_sqlite(client):
+    inserts = []
+
+    def count_inserts(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT INTO challenge"):
+            inserts.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", count_inserts)
+    try:
+        client.post('/api/v1/challenges/bulk', json={'challenges': [
+            {'title': f"Week {week}", 'description': "Challenge", 'week_number': week, 'batch_number': 3}
+            for week in range(1, 6)
+        ]})
+    finally:
+        event.remove(db.engine, "before_cursor_execute", count_inserts)
+
+    # SQLite has no way to match multi-row RETURNING to parameters, Postgres batches them
+    assert len(inserts) == 5
+    assert all(statement.count("?") == 4 for statement in inserts)
+
+
+def test_bulk_update_applies_changes_and_reports_unknown_ids(client):
+    created = client.post('/api/v1/challenges/bulk', json={'challenges': [
+        {'title': "Week 1", 'description': "Challenge", 'week_number': 1, 'batch_number': 3},
+    ]}).json['value'][0]['value']
+
+    response = client.put('/api/v1/challenges/bulk', json={'challenges': [
+        {'id': 1, 'title': "Week 1, revised"},
+        {'id': 42, 'title': "Missing"},
+    ]})
+
+    assert response.status_code == 200
+    first, missing = response.json['value']
+    assert first['value']['title'] == "Week 1, revised"
+    assert first['value']['description'] == "Challenge"
+    assert missing['error'] == "Challenge not found"
+    # Created and updated items come back in the same shape
+    assert first['value'].keys() == created.keys()
+    assert first['value']['certificate_count'] == 0
+    assert db.session.get(Challenge, 1).title == "Week 1, revised"
+
+
+@pytest.mark.parametrize("query, keys", [
+    ("", {'id', 'title', 'description', 'week_number', 'batch_number', 'certificate_count'}),
+    ("?include=certificates", {'id', 'title', 'description', 'week_number', 'batch_number', 'certificate_count', 'certificates'}),
+])
+def test_writes_return_the_shape_of_the_reads(client, query, keys):
+    challenge = {'title': "Week 1", 'description': "Challenge", 'week_number': 1, 'batch_number': 3}
+
+    created = client.post(f'/api/v1/challenges{query}', json=challenge).json['value']
+    bulk_created = client.post(f'/api/v1/challenges/bulk{query}', json={'challenges': [challenge]}).json['value'][0]['value']
+    updated = client.put(f"/api/v1/challenges/{created['id']}{query}", json={'title': "Week 1, revised"}).json['value']
+    bulk_updated = client.put(f'/api/v1/challenges/bulk{query}', json={'challenges': [{'id': created['id']}]}).json['value'][0]['value']
+    read = client.get(f"/api/v1/challenges/{created['id']}{query}").json['value']
+    deleted = client.delete(f"/api/v1/challenges/{created['id']}{query}").json['value']
+
+    assert {frozenset(info) for info in (created, bulk_created, updated, bulk_updated, read, deleted)} == {frozenset(keys)}
+    assert updated == bulk_updated == read == deleted
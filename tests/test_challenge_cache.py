@@ -0,0 +1,69 @@
+import pytest
+from flask import Flask
+
+from challenge_api import challenge_bp
+from migrations import migrate
+from models import db, Certificate, Challenge, User, UserRole
+from response_cache import LRUCacheBackend, challenge_cache
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(challenge_cache, "backend", LRUCacheBackend())
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    app.register_blueprint(challenge_bp, url_prefix='/api/v1')
+    with app.app_context():
+        migrate()
+        db.session.add(Challenge(title="Week 1", description="Challenge", week_number=1, batch_number=1))
+        db.session.commit()
+        yield app.test_client()
+
+
+def test_repeated_read_is_served_from_cache_with_etag(client):
+    first = client.get('/api/v1/challenges')
+    hits = challenge_cache.hits
+    second = client.get('/api/v1/challenges')
+
+    assert second.get_data() == first.get_data()
+    assert second.headers['ETag'] == first.headers['ETag']
+    assert challenge_cache.hits == hits + 1
+
+
+def test_matching_if_none_match_answers_304(client):
+    etag = client.get('/api/v1/challenges/1').headers['ETag']
+
+    response = client.get('/api/v1/challenges/1', headers={'If-None-Match': etag})
+
+    assert response.status_code == 304
+    assert response.get_data() == b''
+
+
+def test_query_parameters_are_part_of_the_key(client):
+    assert 'certificates' not in client.get('/api/v1/challenges/1').json['value']
+    assert client.get('/api/v1/challenges/1?include=certificates').json['value']['certificates'] == []
+
+
+def test_encoded_separators_do_not_collide_with_other_queries(client):
+    client.get('/api/v1/challenges?include=certificates%26limit=1')
+
+    response = client.get('/api/v1/challenges?include=certificates&limit=1')
+
+    assert response.json['value'][0]['certificates'] == []
+
+
+def test_challenge_and_certificate_writes_invalidate(client):
+    etag = client.get('/api/v1/challenges').headers['ETag']
+
+    challenge = db.session.get(Challenge, 1)
+    challenge.title = "Week 1, revised"
+    db.session.commit()
+    response = client.get('/api/v1/challenges', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.json['value'][0]['title'] == "Week 1, revised"
+
+    db.session.add(User(username="trainee", password_hash="hash", role=UserRole.TRAINEE))
+    db.session.add(Certificate(title="Week 1", score=90, user_id=1, challenge_id=1, ipfs_hash="Qm"))
+    db.session.commit()
+    assert client.get('/api/v1/challenges').json['value'][0]['certificate_count'] == 1
@@ -0,0 +1,86 @@
+import pytest
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token
+
+import certificate_api
+from algorand_utils import DeliveryRejected
+from certificate_api import certificate_bp
+from migrations import migrate
+from models import db, ApprovalStatus, Certificate, Challenge, User, UserRole
+from password_hasher import password_hasher
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # Identities are user ids, tokens carry them as strings
+    monkeypatch.setattr(certificate_api, "get_jwt_identity", lambda: 1)
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config['JWT_SECRET_KEY'] = 'test-secret-key-of-sufficient-length'
+    JWTManager(app)
+    db.init_app(app)
+    app.register_blueprint(certificate_bp, url_prefix='/api/v1')
+    with app.app_context():
+        migrate()
+        password_hash = password_hasher.bcrypt.generate_password_hash("issuer-password", 4).decode('utf-8')
+        db.session.add_all([
+            User(id=1, username="issuer", password_hash=password_hash, role=UserRole.ISSUER, account_address="ISSUER"),
+            User(id=2, username="trainee", password_hash="hash", role=UserRole.TRAINEE, account_address="TRAINEE"),
+            Challenge(id=1, title="Week 1", description="Challenge", week_number=1, batch_number=1),
+            Certificate(id=1, title="Week 1", score=90, staff_id=1, user_id=2, challenge_id=1, nft_id=1234,
+                        ipfs_hash="Qm", is_approved=ApprovalStatus.PENDING, delivery_group='["optin", "xfer"]'),
+        ])
+        db.session.commit()
+        client = app.test_client()
+        client.environ_base['HTTP_AUTHORIZATION'] = 'Bearer ' + create_access_token(identity='1')
+        yield client
+
+
+def approve(client, password="issuer-password"):
+    return client.put('/api/v1/certificates/optin/approve/1', json={'password': password})
+
+
+def test_mistyped_password_keeps_the_delivery_group(client, monkeypatch):
+    monkeypatch.setattr(certificate_api.algorand, "complete_delivery", pytest.fail)
+
+    response = approve(client, password="typo")
+
+    assert response.status_code == 401
+    certificate = db.session.get(Certificate, 1)
+    assert certificate.delivery_group is not None
+    assert certificate.is_approved == ApprovalStatus.PENDING
+
+
+def test_key_errors_keep_the_delivery_group(client, monkeypatch):
+    monkeypatch.setattr(certificate_api.algorand, "complete_delivery", lambda **kwargs: None)
+
+    response = approve(client)
+
+    assert response.status_code == 500
+    assert db.session.get(Certificate, 1).delivery_group is not None
+
+
+def test_rejected_group_asks_for_a_new_opt_in(client, monkeypatch):
+    def reject(**kwargs):
+        raise DeliveryRejected("txn dead: round 1200 outside of 100--1100")
+    monkeypatch.setattr(certificate_api.algorand, "complete_delivery", reject)
+
+    response = approve(client)
+
+    assert response.status_code == 409
+    certificate = db.session.get(Certificate, 1)
+    assert certificate.delivery_group is None
+    assert certificate.is_approved == ApprovalStatus.NO_REQUEST
+
+
+def test_certificates_without_an_asset_cannot_be_delivered(client, monkeypatch):
+    monkeypatch.setattr(certificate_api.algorand, "complete_delivery", pytest.fail)
+    db.session.get(Certificate, 1).nft_id = None
+    db.session.commit()
+
+    assert approve(client).status_code == 409
+    # The trainee asks for the opt-in of a certificate they own
+    monkeypatch.setattr(certificate_api, "get_jwt_identity", lambda: 2)
+    response = client.put('/api/v1/certificates/optin/1', json={'password': "trainee-password"})
+    assert response.status_code == 409
+    assert response.json['error'] == "Certificate asset is not minted yet"
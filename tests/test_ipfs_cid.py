@@ -0,0 +1,32 @@
+import pytest
+
+from ipfs_cid import compute_cid
+from pin_uploader import PinIndex, PinUploader
+
+# Three 256 KiB chunks, the last one partial
+MULTI_CHUNK = bytes(i * 7 % 251 for i in range(600000))
+
+
+@pytest.mark.parametrize("content, version, cid", [
+    (b"", 0, "QmbFMke1KXqnYyBBWxB74N4c5SBnJMVAiMNRcGu6x1AwQH"),
+    (b"", 1, "bafkreihdwdcefgh4dqkjv67uzcmw7ojee6xedzdetojuzjevtenxquvyku"),
+    (b"hello world\n", 0, "QmT78zSuBmuS4z925WZfrqQ1qHaJ56DQaTfyMUF7F8ff5o"),
+    (b"hello world\n", 1, "bafkreifjjcie6lypi6ny7amxnfftagclbuxndqonfipmb64f2km2devei4"),
+    (MULTI_CHUNK, 0, "QmWrVhTJ3Z9o4pXpwzbtu4MTMWFG5rE9ymuKhMuXihfLDL"),
+    (MULTI_CHUNK, 1, "bafybeigpundmoqpqmkrmiistfw5p5ch7ehizxuinqekkev7ghvpgwehkvi"),
+])
+def test_compute_cid_matches_ipfs_add(content, version, cid):
+    assert compute_cid(content, version) == cid
+
+
+def test_pin_with_a_different_cid_counts_as_failed(tmp_path, monkeypatch):
+    uploader = PinUploader(jwt="test", max_workers=1, index=PinIndex(str(tmp_path / "index.jsonl")))
+    monkeypatch.setattr(uploader, "upload", lambda *args: "QmSomethingElse")
+
+    cid, future = uploader.pin("certificate.png", b"hello world\n")
+
+    assert cid == "QmT78zSuBmuS4z925WZfrqQ1qHaJ56DQaTfyMUF7F8ff5o"
+    assert future.result() is None
+    assert uploader.index.get(cid) is None
+    assert uploader.stats()["mismatched"] == 1
+    uploader.close()
@@ -0,0 +1,94 @@
+from concurrent.futures import Future
+
+import pytest
+from flask import Flask
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+
+from issuance import IssuancePipeline
+from migrations import migrate
+from models import db, Certificate, Challenge, IssuanceJob, JobStatus, User, UserRole
+
+
+class SubmittingAlgorand:
+    """
+    Accepts every asset creation without confirming it.
+    """
+
+    def create_asset(self, **kwargs):
+        return "TXID"
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        migrate()
+        db.session.add_all([
+            User(id=1, username="issuer", password_hash="hash", role=UserRole.ISSUER, account_address="ISSUER"),
+            User(id=2, username="trainee", password_hash="hash", role=UserRole.TRAINEE),
+            Challenge(id=1, title="Week 1", description="Challenge", week_number=1, batch_number=1),
+            IssuanceJob(id=1, staff_id=1, user_id=2, challenge_id=1, title="Week 1", score=90,
+                        status=JobStatus.MINTING, ipfs_hash="Qm"),
+        ])
+        db.session.commit()
+        yield app
+
+
+@pytest.fixture
+def fail_statements(app):
+    """
+    Makes statements starting with the given SQL fail like a lost database connection.
+    """
+    prefixes = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith(tuple(prefixes)):
+            raise OperationalError(statement, parameters, Exception("connection lost"))
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield prefixes.extend
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def uploaded():
+    upload = Future()
+    upload.set_result("Qm")
+    return upload
+
+
+def test_failed_certificate_insert_fails_the_job_with_its_asset(app, fail_statements):
+    fail_statements(["INSERT INTO certificate"])
+
+    IssuancePipeline(SubmittingAlgorand())._persist(app, 1, {"asset-index": 77}, uploaded())
+
+    db.session.remove()
+    job = db.session.get(IssuanceJob, 1)
+    assert job.status == JobStatus.FAILED
+    assert job.nft_id == 77
+    assert job.error.startswith("Saving certificate of asset 77 failed")
+    assert Certificate.query.count() == 0
+
+
+def test_failed_txid_update_fails_the_job(app, fail_statements):
+    fail_statements(["UPDATE issuance_job SET txid"])
+
+    IssuancePipeline(SubmittingAlgorand())._mint(app, 1, "ISSUER", "key", uploaded())
+
+    db.session.remove()
+    job = db.session.get(IssuanceJob, 1)
+    assert job.status == JobStatus.FAILED
+    assert job.error.startswith("Recording asset creation TXID failed")
+
+
+def test_confirmed_job_completes(app):
+    IssuancePipeline(SubmittingAlgorand())._persist(app, 1, {"asset-index": 77}, uploaded())
+
+    db.session.remove()
+    job = db.session.get(IssuanceJob, 1)
+    assert job.status == JobStatus.COMPLETED
+    assert db.session.get(Certificate, job.certificate_id).nft_id == 77
@@ -0,0 +1,54 @@
+from sqlalchemy import create_engine, inspect
+
+import migrations
+from migrations import MIGRATIONS, current_version, migrate
+from models import db
+
+
+def columns(engine, table_name):
+    return {column['name'] for column in inspect(engine).get_columns(table_name)}
+
+
+def test_fresh_database_gets_every_migration(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+
+    assert migrate(engine) == [name for _, name, _ in MIGRATIONS]
+    assert migrate(engine) == []
+    with engine.connect() as connection:
+        assert current_version(connection) == len(MIGRATIONS)
+
+
+def test_database_created_without_migrations_is_adopted(tmp_path):
+    # A baseline schema made by db.create_all() before schema_version existed
+    engine = create_engine(f"sqlite:///{tmp_path / 'baseline.db'}")
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.exec_driver_sql("INSERT INTO challenge VALUES (1, 'Week 1', 'Challenge', 1, 1)")
+
+    assert len(migrate(engine)) == len(MIGRATIONS)
+
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("SELECT title FROM challenge").scalar() == "Week 1"
+
+
+def test_existing_schema_picks_up_later_migrations(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'version3.db'}")
+    monkeypatch.setattr(migrations, "MIGRATIONS", MIGRATIONS[:3])
+    migrate(engine)
+    with engine.begin() as connection:
+        # The columns of later migrations did not exist at version 3
+        for table, column in (("certificate", "mint_txid"), ("certificate", "mint_last_valid"), ("issuance_job", "nft_id")):
+            connection.exec_driver_sql(f"ALTER TABLE {table} DROP COLUMN {column}")
+        connection.exec_driver_sql("INSERT INTO user (id, username, password_hash, role, wallet_status) "
+                                   "VALUES (1, 'trainee', 'hash', 'TRAINEE', 'READY')")
+        connection.exec_driver_sql("INSERT INTO challenge VALUES (1, 'Week 1', 'Challenge', 1, 1)")
+        connection.exec_driver_sql("INSERT INTO certificate (id, title, score, user_id, nft_id, challenge_id, ipfs_hash) "
+                                   "VALUES (1, 'Week 1', 90, 1, 1234, 1, 'Qm')")
+    monkeypatch.setattr(migrations, "MIGRATIONS", MIGRATIONS)
+
+    assert migrate(engine) == [name for number, name, _ in MIGRATIONS if number > 3]
+
+    assert {"mint_txid", "mint_last_valid"} <= columns(engine, "certificate")
+    assert "nft_id" in columns(engine, "issuance_job")
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("SELECT nft_id, mint_txid FROM certificate").one() == (1234, None)
@@ -0,0 +1,73 @@
+import pytest
+from flask import Flask
+
+import certificate_api
+from certificate_api import settle_unminted_certificates
+from migrations import migrate
+from models import db, Certificate, Challenge, User, UserRole
+
+
+class FakeAlgod:
+    """
+    Knows the pending transactions and created assets of a chain at round 2000.
+    """
+
+    def __init__(self, pending, created_assets):
+        self.pending = pending
+        self.created_assets = created_assets
+
+    def status(self):
+        return {"last-round": 2000}
+
+    def pending_transaction_info(self, txid):
+        if txid not in self.pending:
+            raise Exception("txn does not exist")
+        return self.pending[txid]
+
+    def account_info(self, address):
+        return {"created-assets": [{"index": index, "params": {"url": url}} for index, url in self.created_assets]}
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        migrate()
+        db.session.add_all([
+            User(id=1, username="issuer", password_hash="hash", role=UserRole.ISSUER, account_address="ISSUER"),
+            User(id=2, username="trainee", password_hash="hash", role=UserRole.TRAINEE),
+            Challenge(id=1, title="Week 1", description="Challenge", week_number=1, batch_number=1),
+        ])
+        db.session.commit()
+        yield app
+
+
+def add_certificate(certificate_id, ipfs_hash, **fields):
+    db.session.add(Certificate(id=certificate_id, title="Week 1", score=90, staff_id=1, user_id=2, challenge_id=1,
+                               ipfs_hash=ipfs_hash, **fields))
+
+
+def test_unminted_certificates_are_settled(app, monkeypatch):
+    add_certificate(1, "QmConfirmed", mint_txid="CONFIRMED", mint_last_valid=1500)
+    add_certificate(2, "QmForgotten", mint_txid="FORGOTTEN", mint_last_valid=1500)
+    add_certificate(3, "QmExpired", mint_txid="EXPIRED", mint_last_valid=1500)
+    add_certificate(4, "QmInFlight", mint_txid="IN-FLIGHT", mint_last_valid=2500)
+    add_certificate(5, "QmRejected", mint_txid="REJECTED", mint_last_valid=2500)
+    add_certificate(6, "QmNeverSent")
+    db.session.commit()
+    algod_client = FakeAlgod(
+        pending={
+            "CONFIRMED": {"confirmed-round": 1400, "asset-index": 101},
+            "IN-FLIGHT": {"confirmed-round": 0},
+            "REJECTED": {"confirmed-round": 0, "pool-error": "overspend"},
+        },
+        # Confirmed too long ago for the node to remember the transaction
+        created_assets=[(101, "QmConfirmed"), (102, "QmForgotten")],
+    )
+    monkeypatch.setattr(certificate_api.algorand, "set_up_algod_client", lambda: algod_client)
+
+    assert settle_unminted_certificates() == (2, 3)
+
+    assert {certificate.id: certificate.nft_id for certificate in Certificate.query.all()} == {1: 101, 2: 102, 4: None}
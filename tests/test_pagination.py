@@ -0,0 +1,98 @@
+from datetime import datetime
+
+import pytest
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token
+
+import certificate_api
+from certificate_api import certificate_bp
+from migrations import migrate
+from models import db, ApprovalStatus, Certificate, Challenge, User, UserRole
+from pagination import QueryParameterError, decode_cursor, encode_cursor, paginate
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(certificate_api, "get_jwt_identity", lambda: 1)
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config['JWT_SECRET_KEY'] = 'test-secret-key-of-sufficient-length'
+    JWTManager(app)
+    db.init_app(app)
+    app.register_blueprint(certificate_bp, url_prefix='/api/v1')
+    with app.app_context():
+        migrate()
+        db.session.add_all([
+            User(id=1, username="issuer", password_hash="hash", role=UserRole.ISSUER),
+            User(id=2, username="trainee", password_hash="hash", role=UserRole.TRAINEE),
+            Challenge(id=1, title="Week 1", description="Challenge", week_number=1, batch_number=3),
+            Challenge(id=2, title="Week 2", description="Challenge", week_number=2, batch_number=3),
+        ])
+        for day in range(1, 6):
+            db.session.add(Certificate(
+                title=f"Certificate {day}", score=90, staff_id=1, user_id=2, challenge_id=1 if day <= 3 else 2,
+                ipfs_hash="Qm", issued_date=datetime(2024, 1, day),
+                is_approved=ApprovalStatus.PENDING if day % 2 else ApprovalStatus.APPROVED,
+            ))
+        db.session.commit()
+        client = app.test_client()
+        client.environ_base['HTTP_AUTHORIZATION'] = 'Bearer ' + create_access_token(identity='1')
+        yield client
+
+
+def ids(response):
+    return [certificate['id'] for certificate in response.json['value']]
+
+
+def test_paginate_walks_every_row_once(client):
+    seen, cursor = [], None
+    while True:
+        args = {'limit': '2', **({'cursor': cursor} if cursor else {})}
+        rows, cursor = paginate(Certificate.query, [Certificate.issued_date, Certificate.id], args, descending=True)
+        seen.extend(row.id for row in rows)
+        if cursor is None:
+            break
+    assert seen == [5, 4, 3, 2, 1]
+
+
+def test_cursor_round_trips_datetimes():
+    cursor = encode_cursor({'issued_date': datetime(2024, 1, 3, 12, 30), 'id': 3})
+
+    assert decode_cursor(cursor, [Certificate.issued_date, Certificate.id]) == [datetime(2024, 1, 3, 12, 30), 3]
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", encode_cursor({'id': 3}), encode_cursor({'issued_date': 'yesterday', 'id': 3})])
+def test_invalid_cursor_is_rejected(client, cursor):
+    with pytest.raises(QueryParameterError):
+        decode_cursor(cursor, [Certificate.issued_date, Certificate.id])
+
+    response = client.get(f'/api/v1/certificates?sort=issued_date&cursor={cursor}')
+    assert response.status_code == 400
+    assert response.json['error'] == "Invalid cursor"
+
+
+def test_pages_follow_the_next_cursor_header(client):
+    first = client.get('/api/v1/certificates?limit=3')
+    second = client.get(f"/api/v1/certificates?limit=3&cursor={first.headers['X-Next-Cursor']}")
+
+    assert ids(first) == [1, 2, 3]
+    assert ids(second) == [4, 5]
+    assert 'X-Next-Cursor' not in second.headers
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("challenge_id=2", [4, 5]),
+    ("batch_number=3&week_number=1", [1, 2, 3]),
+    ("is_approved=Pending", [1, 3, 5]),
+    ("issued_after=2024-01-02&issued_before=2024-01-04", [2, 3]),
+    ("sort=issued_date&order=desc&is_approved=Approved", [4, 2]),
+])
+def test_listing_filters(client, query, expected):
+    assert ids(client.get(f'/api/v1/certificates?{query}')) == expected
+
+
+def test_listing_projects_requested_fields(client):
+    response = client.get('/api/v1/certificates?fields=id,title&limit=1')
+
+    assert response.json['value'] == [{'id': 1, 'title': "Certificate 1"}]
+    assert client.get('/api/v1/certificates?fields=password').status_code == 400
@@ -0,0 +1,57 @@
+import threading
+
+import pytest
+
+import user_api
+from config import create_app
+from migrations import migrate
+from password_hasher import HasherBusy, PasswordHasher
+
+
+def test_full_queue_fails_fast():
+    hasher = PasswordHasher(rounds=4, max_workers=1, max_queue=0)
+    release = threading.Event()
+    running = hasher._submit(release.wait)
+
+    with pytest.raises(HasherBusy):
+        hasher.hash("secret")
+
+    release.set()
+    running.result()
+    assert hasher.verify(hasher.hash("secret"), "secret")
+    assert hasher.stats()["rejected"] == 1
+
+
+def test_busy_hasher_answers_503(monkeypatch):
+    def busy(password):
+        raise HasherBusy("Too many password hashing requests queued")
+    monkeypatch.setattr(user_api.password_hasher, "hash", busy)
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://'})
+    with app.app_context():
+        migrate()
+
+        response = app.test_client().post('/api/v1/register', json={'username': "new", 'password': "pw", 'role': "Trainee"})
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+
+
+def test_hashes_of_another_cost_are_rehashed_in_the_background():
+    old_hash = PasswordHasher(rounds=4).hash("secret")
+    hasher = PasswordHasher(rounds=5)
+    saved = []
+    stored = threading.Event()
+
+    def save(password_hash):
+        saved.append(password_hash)
+        stored.set()
+
+    assert hasher.needs_rehash(old_hash)
+    assert hasher.needs_rehash("not a bcrypt hash")
+    hasher.rehash("secret", save)
+
+    # The new hash is saved from a callback after the hash itself is done
+    assert stored.wait(5)
+    new_hash, = saved
+    assert not hasher.needs_rehash(new_hash)
+    assert hasher.verify(new_hash, "secret")
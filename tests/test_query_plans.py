@@ -0,0 +1,90 @@
+import pytest
+from flask import Flask
+from sqlalchemy import create_engine, inspect
+
+from migrations import MIGRATIONS, migrate
+from models import db, ApprovalStatus, Certificate, Challenge
+
+
+LEGACY_SCHEMA = [
+    """CREATE TABLE user (
+        id INTEGER PRIMARY KEY, username VARCHAR(50) NOT NULL UNIQUE, password_hash VARCHAR(255) NOT NULL,
+        role VARCHAR(7) NOT NULL, account_address VARCHAR(255) NOT NULL)""",
+    """CREATE TABLE challenge (
+        id INTEGER PRIMARY KEY, title VARCHAR(100) NOT NULL, description VARCHAR(255) NOT NULL,
+        week_number INTEGER NOT NULL, batch_number INTEGER NOT NULL)""",
+    """CREATE TABLE certificate (
+        id INTEGER PRIMARY KEY, title VARCHAR(100) NOT NULL, score INTEGER NOT NULL, issued_date DATETIME,
+        staff_id INTEGER REFERENCES user (id), user_id INTEGER NOT NULL REFERENCES user (id),
+        nft_id VARCHAR(255) NOT NULL UNIQUE, challenge_id INTEGER NOT NULL REFERENCES challenge (id),
+        is_approved VARCHAR(10), ipfs_hash VARCHAR(255) NOT NULL)""",
+]
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        migrate()
+        yield app
+
+
+def query_plan(query):
+    sql = str(query.statement.compile(db.engine, compile_kwargs={"literal_binds": True}))
+    with db.engine.connect() as connection:
+        return " | ".join(row[-1] for row in connection.exec_driver_sql("EXPLAIN QUERY PLAN " + sql))
+
+
+def test_issuer_pending_certificates_use_index(app):
+    plan = query_plan(
+        Certificate.query.filter_by(staff_id=1, is_approved=ApprovalStatus.PENDING).order_by(Certificate.issued_date)
+    )
+    assert "ix_certificate_staff_id_is_approved_issued_date" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_trainee_certificates_use_index(app):
+    plan = query_plan(Certificate.query.filter_by(user_id=1).order_by(Certificate.issued_date.desc()))
+    assert "ix_certificate_user_id_issued_date" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_challenge_certificate_lookup_uses_index(app):
+    plan = query_plan(Certificate.query.filter_by(challenge_id=1))
+    assert "ix_certificate_challenge_id" in plan
+
+
+def test_challenges_by_batch_and_week_use_index(app):
+    plan = query_plan(Challenge.query.filter_by(batch_number=3, week_number=2))
+    assert "ix_challenge_batch_number_week_number" in plan
+
+
+def test_migrate_upgrades_legacy_schema(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as connection:
+        for statement in LEGACY_SCHEMA:
+            connection.exec_driver_sql(statement)
+        connection.exec_driver_sql("INSERT INTO user VALUES (1, 'trainee', 'hash', 'TRAINEE', 'ADDRESS')")
+        connection.exec_driver_sql("INSERT INTO challenge VALUES (1, 'Week 1', 'Challenge', 1, 1)")
+        connection.exec_driver_sql(
+            "INSERT INTO certificate VALUES (1, 'Week 1', 90, '2024-01-13 00:00:00', 1, 1, '1234', 1, 'PENDING', 'Qm')"
+        )
+
+    assert len(migrate(engine)) == len(MIGRATIONS)
+    assert migrate(engine) == []
+
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("SELECT typeof(nft_id), nft_id FROM certificate").one() == ("integer", 1234)
+        assert connection.exec_driver_sql("SELECT wallet_status FROM user").scalar() == "READY"
+
+    # Users registered since background provisioning have no address until their wallet is ready
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            "INSERT INTO user (id, username, password_hash, role, account_address, wallet_status) "
+            "VALUES (2, 'pending', 'hash', 'TRAINEE', NULL, 'PENDING')"
+        )
+
+    indexes = {index['name'] for index in inspect(engine).get_indexes('certificate')}
+    assert {"ix_certificate_staff_id_is_approved_issued_date", "ix_certificate_user_id_issued_date"} <= indexes
@@ -0,0 +1,78 @@
+import pytest
+from flask import Flask
+
+import user_api
+from config import create_app
+from migrations import migrate
+from models import db, User, UserRole, WalletStatus
+from password_hasher import password_hasher
+from registration import RegistrationPipeline
+
+
+class FlakyAlgorand:
+    """
+    Stands in for KMD: wallet creation fails until `outage` is cleared.
+    """
+
+    def __init__(self):
+        self.outage = True
+        self.passwords = []
+
+    def list_wallets(self):
+        return []
+
+    def create_user(self, wallet_name, password):
+        self.passwords.append(password)
+        return None if self.outage else f"ADDRESS-{wallet_name}"
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+    with app.app_context():
+        migrate()
+        db.session.add(User(username="trainee", password_hash="hash", role=UserRole.TRAINEE,
+                            wallet_status=WalletStatus.PENDING))
+        db.session.commit()
+        yield app
+
+
+def test_failed_provisioning_is_resumed_on_login(app):
+    algorand = FlakyAlgorand()
+    pipeline = RegistrationPipeline(algorand, max_workers=1, max_attempts=2, backoff=0)
+    user = User.query.filter_by(username="trainee").one()
+
+    assert pipeline.submit(app, user.id, "secret").result() is None
+    db.session.refresh(user)
+    assert user.wallet_status == WalletStatus.FAILED
+    assert algorand.passwords == ["secret", "secret"]
+
+    algorand.outage = False
+    assert pipeline.resume(app, user, "secret").result() == "ADDRESS-trainee"
+
+    db.session.refresh(user)
+    assert user.wallet_status == WalletStatus.READY
+    assert user.account_address == "ADDRESS-trainee"
+    assert pipeline.resume(app, user, "secret") is None
+
+
+def test_registration_status_is_polled_with_the_issued_token(monkeypatch):
+    monkeypatch.setattr(password_hasher, "rounds", 4)
+    monkeypatch.setattr(user_api.registration_pipeline, "submit", lambda app, user_id, password: None)
+    app = create_app({'SQLALCHEMY_DATABASE_URI': 'sqlite://', 'SECRET_KEY': 'test'})
+    with app.app_context():
+        migrate()
+        client = app.test_client()
+
+        registered = client.post('/api/v1/register', json={'username': "new", 'password': "pw", 'role': "Trainee"})
+        token = registered.json['value']['registration_token']
+        status = client.get(f'/api/v1/register/status/{token}')
+
+        assert registered.status_code == 202
+        assert status.status_code == 200
+        assert status.json['value'] == {'wallet_status': "Pending", 'account_address': None}
+        # Ids are neither returned nor accepted in place of a token
+        assert 'id' not in registered.json['value']
+        assert client.get('/api/v1/register/status/1').status_code == 404
@@ -0,0 +1,50 @@
+import time
+
+from flask import Flask, session
+
+from response_cache import LRUCacheBackend
+from session_store import SESSION_KEY, WalletRef, WalletSessionStore
+
+
+def test_session_holds_only_an_opaque_id_in_the_cookie():
+    store = WalletSessionStore(backend=LRUCacheBackend(), ttl=60)
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = 'test'
+
+    with app.test_request_context():
+        session_id = store.login('alice', 'secret')
+
+        assert dict(session) == {SESSION_KEY: session_id}
+        assert store.current() == WalletRef(name='alice', pswd='secret')
+
+        store.logout()
+
+        assert SESSION_KEY not in session
+        assert store.get(session_id) is None
+
+
+def test_sessions_expire_after_their_last_use():
+    store = WalletSessionStore(backend=LRUCacheBackend(), ttl=0.2)
+    session_id = store.create('alice', 'secret')
+
+    time.sleep(0.15)
+    assert store.get(session_id) is not None  # extends the session
+    time.sleep(0.15)
+    assert store.get(session_id) is not None
+    time.sleep(0.25)
+
+    assert store.get(session_id) is None
+    assert store.get('unknown') is None
+    assert store.stats() == {"created": 1, "hits": 2, "misses": 2}
+
+
+def test_store_holds_neither_the_session_id_nor_the_password():
+    backend = LRUCacheBackend()
+    store = WalletSessionStore(backend=backend, ttl=60)
+    session_id = store.create('alice', 'correct horse battery staple')
+
+    (key, (entry, _)), = backend._entries.items()
+
+    assert session_id not in key
+    assert b'correct horse' not in entry and session_id.encode('utf-8') not in entry
+    assert store.get(session_id) == WalletRef(name='alice', pswd='correct horse battery staple')
@@ -0,0 +1,53 @@
+import json
+import os
+import subprocess
+import sys
+
+# Generous enough for a loaded CI machine; importing flask and SQLAlchemy
+# dominates, building the app itself takes a few milliseconds
+STARTUP_BUDGET_SECONDS = 1.5
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, sys, threading, time
+started_at = time.perf_counter()
+from backend.config import create_app
+imported_at = time.perf_counter()
+app = create_app()
+finished_at = time.perf_counter()
+print(json.dumps({
+    "import_seconds": imported_at - started_at,
+    "total_seconds": finished_at - started_at,
+    "heavy_modules": [name for name in ("cv2", "PIL", "numpy") if name in sys.modules],
+    "threads": threading.active_count(),
+}))
+"""
+
+
+def boot(database_path):
+    # A fresh interpreter, so nothing is imported yet
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{database_path}",
+        PYTHONPATH=os.pathsep.join([root_dir, os.path.join(root_dir, "backend")]),
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=root_dir,
+        env=env,
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_app_boots_within_budget_without_touching_the_database(tmp_path):
+    database_path = tmp_path / "app.db"
+
+    startup = boot(database_path)
+
+    print(f"create_app cold start: {startup['total_seconds'] * 1000:.0f}ms")
+    assert startup["total_seconds"] < STARTUP_BUDGET_SECONDS
+    assert startup["heavy_modules"] == []
+    assert startup["threads"] == 1
+    assert not database_path.exists()
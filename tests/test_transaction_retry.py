@@ -0,0 +1,157 @@
+import pytest
+from algosdk import account, error, transaction
+
+from account_cache import AccountInfoCache
+from algorand_utils import Algorand
+from params_cache import SuggestedParamsCache
+
+GENESIS_HASH = "SGO1GKSzyE7IEPItTxCByw9x8FmnrCDexi9/cOUJOiI="
+
+
+class FakeAlgod:
+    """
+    Rejects the first `rejections` submissions with the given errors.
+    """
+
+    def __init__(self, *rejections):
+        self.rejections = list(rejections)
+        self.param_fetches = 0
+        self.submissions = []
+
+    def suggested_params(self):
+        self.param_fetches += 1
+        first = 1000 * self.param_fetches
+        return transaction.SuggestedParams(fee=1000, first=first, last=first + 1000, gh=GENESIS_HASH, flat_fee=True)
+
+    def send_transaction(self, signed_txn):
+        self.submissions.append(signed_txn)
+        if self.rejections:
+            raise self.rejections.pop(0)
+        return signed_txn.get_txid()
+
+    def send_transactions(self, signed_txns):
+        self.submissions.append(signed_txns)
+        if self.rejections:
+            raise self.rejections.pop(0)
+        return signed_txns[0].get_txid()
+
+    def pending_transaction_info(self, txid):
+        # Asset indexes follow submission order
+        txids = [signed.get_txid() for group in self.submissions for signed in group]
+        return {"asset-index": 5000 + txids.index(txid), "confirmed-round": 1}
+
+
+@pytest.fixture
+def sender():
+    return account.generate_account()
+
+
+def new_algorand():
+    return Algorand(params=SuggestedParamsCache(ttl=60, max_rounds=100), accounts=AccountInfoCache())
+
+
+def send(algod_client, sender):
+    private_key, address = sender
+    return new_algorand().send_signed_transaction(
+        algod_client,
+        lambda sp: transaction.PaymentTxn(sender=address, receiver=address, amt=0, sp=sp),
+        private_key,
+    )
+
+
+@pytest.mark.parametrize("message", [
+    "TransactionPool.Remember: txn dead: round 2050 outside of 1000--2000",
+    "round 900 outside of 1000--2000",
+])
+def test_expired_transaction_is_rebuilt_with_fresh_params(sender, message):
+    algod_client = FakeAlgod(error.AlgodHTTPError(message, 400))
+
+    txid = send(algod_client, sender)
+
+    assert algod_client.param_fetches == 2
+    assert [signed.transaction.first_valid_round for signed in algod_client.submissions] == [1000, 2000]
+    assert txid == algod_client.submissions[-1].get_txid()
+
+
+def test_other_rejections_are_raised_without_retrying(sender):
+    algod_client = FakeAlgod(error.AlgodHTTPError("TransactionPool.Remember: overspend", 400))
+
+    with pytest.raises(error.AlgodHTTPError, match="overspend"):
+        send(algod_client, sender)
+
+    assert algod_client.param_fetches == 1
+    assert len(algod_client.submissions) == 1
+
+
+def send_group(algod_client, sender):
+    private_key, address = sender
+    return new_algorand().send_signed_group(
+        algod_client,
+        lambda sp: [transaction.PaymentTxn(sender=address, receiver=address, amt=0, sp=sp) for _ in range(2)],
+        private_key,
+    )
+
+
+def test_expired_group_is_rebuilt_with_fresh_params(sender):
+    algod_client = FakeAlgod(error.AlgodHTTPError("txn dead: round 2050 outside of 1000--2000", 400))
+
+    txids = send_group(algod_client, sender)
+
+    assert [group[0].transaction.first_valid_round for group in algod_client.submissions] == [1000, 2000]
+    assert txids == [signed.get_txid() for signed in algod_client.submissions[-1]]
+
+
+def test_other_group_rejections_are_raised_without_retrying(sender):
+    algod_client = FakeAlgod(error.AlgodHTTPError("TransactionPool.Remember: overspend", 400))
+
+    with pytest.raises(error.AlgodHTTPError, match="overspend"):
+        send_group(algod_client, sender)
+
+    assert len(algod_client.submissions) == 1
+
+
+def test_batch_mint_groups_sixteen_assets_and_maps_indexes_back(sender, monkeypatch):
+    private_key, address = sender
+    algod_client = FakeAlgod()
+    algorand = new_algorand()
+    monkeypatch.setattr(algorand, "set_up_algod_client", lambda: algod_client)
+    monkeypatch.setattr(algorand, "confirm_transaction", lambda client, txid: client.pending_transaction_info(txid))
+    assets = [(f"ipfs://{i}", f"Certificate {i}") for i in range(20)]
+
+    # One worker keeps the groups in submission order
+    asset_indexes = algorand.create_assets_batch(address, private_key, assets, max_workers=1)
+
+    assert [len(group) for group in algod_client.submissions] == [16, 4]
+    assert all(len({signed.transaction.group for signed in group}) == 1 for group in algod_client.submissions)
+    assert [signed.transaction.asset_name for group in algod_client.submissions for signed in group] == \
+        [name for _, name in assets]
+    assert asset_indexes == list(range(5000, 5020))
+
+
+def test_batch_mint_reports_failed_groups_per_input(sender, monkeypatch):
+    private_key, address = sender
+    algod_client = FakeAlgod(error.AlgodHTTPError("TransactionPool.Remember: overspend", 400))
+    algorand = new_algorand()
+    monkeypatch.setattr(algorand, "set_up_algod_client", lambda: algod_client)
+    monkeypatch.setattr(algorand, "confirm_transaction", lambda client, txid: client.pending_transaction_info(txid))
+    assets = [(f"ipfs://{i}", f"Certificate {i}") for i in range(17)]
+
+    asset_indexes = algorand.create_assets_batch(address, private_key, assets, max_workers=1)
+
+    assert asset_indexes[:16] == [None] * 16
+    assert asset_indexes[16] is not None
+
+
+def test_unwaited_mint_is_tracked_until_its_own_last_valid_round(sender):
+    private_key, address = sender
+    algod_client = FakeAlgod(error.AlgodHTTPError("txn dead: round 2050 outside of 1000--2000", 400))
+    tracked, signed = [], []
+    algorand = new_algorand()
+    algorand.set_up_algod_client = lambda: algod_client
+    algorand.tracker = type("Tracker", (), {"track": lambda self, txid, **kwargs: tracked.append((txid, kwargs))})()
+
+    txid = algorand.create_asset(address, private_key, "ipfs://cid", "Certificate", wait=False, on_signed=signed.append)
+
+    # Both attempts are reported before they are sent, the tracker gets the one that went through
+    assert [signed_txn.transaction.last_valid_round for signed_txn in signed] == [2000, 3000]
+    assert tracked == [(txid, {"on_confirmed": None, "on_failed": None, "last_valid": 3000})]
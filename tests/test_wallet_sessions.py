@@ -0,0 +1,85 @@
+import time
+
+from wallet_sessions import WalletSessionCache
+
+
+class FakeKMD:
+    """
+    Hands out numbered wallet handles and remembers which were released.
+    """
+
+    def __init__(self):
+        self.opened = 0
+        self.released = []
+
+    def list_wallets(self):
+        return [{"name": name, "id": name} for name in ("alice", "bob", "carol")]
+
+    def init_wallet_handle(self, wallet_id, password):
+        self.opened += 1
+        return f"{wallet_id}-{self.opened}"
+
+    def release_wallet_handle(self, handle):
+        self.released.append(handle)
+        return True
+
+    def export_key(self, handle, password, address):
+        return f"key-of-{address}"
+
+
+class FakeClients:
+    def __init__(self):
+        self.kmd_client = FakeKMD()
+
+    def kmd(self):
+        return self.kmd_client
+
+
+def test_expired_session_is_reopened_on_read_and_its_handle_released():
+    clients = FakeClients()
+    cache = WalletSessionCache(clients, idle_ttl=0.05, sweep_interval=60)
+
+    first = cache.get_wallet("alice", "pw")
+    time.sleep(0.1)
+    second = cache.get_wallet("alice", "pw")
+
+    assert second is not first
+    assert clients.kmd_client.released == ["alice-1"]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_idle_sessions_are_swept_and_released():
+    clients = FakeClients()
+    cache = WalletSessionCache(clients, idle_ttl=0.05, sweep_interval=0.05)
+    cache.get_wallet("alice", "pw")
+    cache.get_wallet("bob", "pw")
+    time.sleep(0.1)
+
+    # Any read sweeps the other idle sessions once the interval has passed
+    cache.get_wallet("carol", "pw")
+
+    assert sorted(clients.kmd_client.released) == ["alice-1", "bob-2"]
+    assert cache.stats()["sessions"] == 1
+
+
+def test_full_cache_sweeps_idle_sessions_before_evicting_live_ones():
+    clients = FakeClients()
+    cache = WalletSessionCache(clients, max_sessions=2, idle_ttl=0.05, sweep_interval=60)
+    cache.get_wallet("alice", "pw")
+    time.sleep(0.1)
+    cache.get_wallet("bob", "pw")
+
+    cache.get_wallet("carol", "pw")
+
+    assert clients.kmd_client.released == ["alice-1"]
+    assert cache.get_wallet("bob", "pw").handle == "bob-2"
+
+
+def test_sweep_drops_expired_keys():
+    clients = FakeClients()
+    cache = WalletSessionCache(clients, idle_ttl=60, key_ttl=0.05)
+    assert cache.export_key("alice", "pw", "ADDRESS") == "key-of-ADDRESS"
+    time.sleep(0.1)
+
+    assert cache.sweep() == 0
+    assert cache._sessions["alice"].keys == {}